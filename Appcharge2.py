@@ -5,10 +5,12 @@ from kivy.uix.label import Label
 from kivy.uix.boxlayout import BoxLayout
 from kivy.uix.button import Button
 from kivy.graphics import Line, Color, Ellipse
-from kivy.clock import Clock
 import secrets
-import random
-import math
+from charging import RENDER_INTERVAL, ChargeClock
+from gameloop import GameLoop
+from instrument import default_profiler
+from sampling import (chaos_sampler, power_step_sampler, soundbite_sampler, temperature_step_sampler,
+                      uniform_samplers)
 
 kivy.require('2.0.0')
 
@@ -22,7 +24,8 @@ MEME_FEEDBACK = {
     'dank_spike': ["Dank spike—power’s lit!", "Dank spike—temp’s roasted!"]
 }
 
-DANK_SOUNDBITES = ["*boop*", "*yeet*", "*bruh*", "*womp*", "*vibes*"]
+# Fixed discrete draws served from precomputed alias tables; the shared ones live in sampling
+MEME_SAMPLERS = uniform_samplers(MEME_FEEDBACK)
 
 class ChargingGameWidget(Widget):
     def __init__(self, **kwargs):
@@ -37,29 +40,26 @@ class ChargingGameWidget(Widget):
         self.target_jitter = 0
         self.level = 1
         self.level_targets = [100, 250, 500, 750, 1000]
-        Clock.schedule_interval(self.cool_down, 1)
+        self.charge = ChargeClock()
+        self.loop = GameLoop()
+        self.loop.add_timer(self.render_charge, RENDER_INTERVAL, active=lambda: self.holding)
+        self.loop.add_timer(self.cool_down, 1, active=lambda: not self.holding and self.temperature > 30)
         self.update_display()
 
     def calculate_chaos(self):
-        a, b = secrets.randbelow(10) + 1, secrets.randbelow(10) + 1
-        c, d = secrets.randbelow(10) + 1, secrets.randbelow(10) + 1
-        trace = a + d
-        det = a * d - b * c
-        discriminant = trace**2 - 4 * det
-        if discriminant < 0:
-            return 1.0
-        eig1 = (trace + math.sqrt(discriminant)) / 2
-        return max(0.5, min(2.0, eig1 / 5))
+        return chaos_sampler().sample()
 
     def start_action(self):
         self.holding = True
         self.hold_time = 0
         self.chaos_factor = self.calculate_chaos()
-        Clock.schedule_interval(self.charge_up, 0.05)
+        self.charge.start()
+        self.loop.wake()
 
     def stop_action(self):
+        self.charge.stop()
+        self.charge.settle(self.charge_up)  # Increments owed since the last draw
         self.holding = False
-        Clock.unschedule(self.charge_up)
         diff = abs(self.target - self.player_power)
         chaos_boost = secrets.randbelow(21) - 10
         
@@ -68,37 +68,38 @@ class ChargingGameWidget(Widget):
             del self.dank_spike
         elif self.temperature > 50:
             self.score = max(0, self.score - 10 - chaos_boost)
-            meme = random.choice(MEME_FEEDBACK['overheat'])
+            meme = MEME_SAMPLERS['overheat'].sample()
         elif diff < 50:
             self.score += int((100 - diff) * self.chaos_factor) + chaos_boost
-            meme = random.choice(MEME_FEEDBACK['great'])
+            meme = MEME_SAMPLERS['great'].sample()
         elif diff < 100:
             self.score += int((50 - diff // 2) * self.chaos_factor) + chaos_boost
-            meme = random.choice(MEME_FEEDBACK['good'])
+            meme = MEME_SAMPLERS['good'].sample()
         else:
             self.score = max(0, self.score - 5 - chaos_boost)
-            meme = random.choice(MEME_FEEDBACK['bad'])
+            meme = MEME_SAMPLERS['bad'].sample()
 
         if self.level <= 5 and self.score >= self.level_targets[self.level - 1]:
             if self.level == 5:
-                meme = random.choice(MEME_FEEDBACK['win'])
+                meme = MEME_SAMPLERS['win'].sample()
                 self.score = 1000
             else:
                 self.level += 1
-                meme = random.choice(MEME_FEEDBACK['level_up'])
+                meme = MEME_SAMPLERS['level_up'].sample()
 
         self.player_power = 0
         self.temperature = max(30, self.temperature - 5)
         self.target = secrets.randbelow(601) + 300
         self.target_jitter = 0
         self.update_display()
-        soundbite = random.choice(DANK_SOUNDBITES)
+        self.loop.wake()
+        soundbite = soundbite_sampler().sample()
         return f"Hold: {self.hold_time:.2f}s | Diff: {diff} | Chaos: {self.chaos_factor:.2f} | {meme} {soundbite}"
 
     def charge_up(self, dt):
         self.hold_time += dt
-        self.player_power = min(1000, self.player_power + secrets.randbelow(26) + 5)
-        self.temperature += secrets.randbelow(29) / 100 + 0.02
+        self.player_power = min(1000, self.player_power + power_step_sampler().sample())
+        self.temperature += temperature_step_sampler().sample()
         if secrets.randbelow(100) < 10:  # 10% chance for dank spike
             if secrets.randbelow(2) == 0:  # 50/50 power or temp
                 self.player_power = min(1000, self.player_power * 2)
@@ -107,6 +108,10 @@ class ChargingGameWidget(Widget):
                 self.temperature = min(100, self.temperature * 2)
                 self.dank_spike = MEME_FEEDBACK['dank_spike'][1]
         self.target_jitter = secrets.randbelow(21) - 10
+
+    def render_charge(self, dt):
+        """Catch the charge up to the clock and draw it; only scheduled while holding."""
+        self.charge.settle(self.charge_up)
         self.update_display()
 
     def cool_down(self, dt):
@@ -129,12 +134,13 @@ class ChargingGameWidget(Widget):
 class ChargingGameApp(App):
     def build(self):
         layout = BoxLayout(orientation='vertical', spacing=10, padding=10)
+        self.profiler = default_profiler()
         self.game = ChargingGameWidget()
         layout.add_widget(self.game)
 
         button_box = BoxLayout(size_hint=(1, 0.2))
-        start_btn = Button(text="Yeet the Juice", on_press=lambda x: self.game.start_action())
-        stop_btn = Button(text="Drop the Dank", on_press=lambda x: self.show_results())
+        start_btn = Button(text="Yeet the Juice", on_press=self.profiler.handler("start_action", lambda x: self.game.start_action()))
+        stop_btn = Button(text="Drop the Dank", on_press=self.profiler.handler("show_results", lambda x: self.show_results()))
         button_box.add_widget(start_btn)
         button_box.add_widget(stop_btn)
         layout.add_widget(button_box)
@@ -144,7 +150,8 @@ class ChargingGameApp(App):
         self.feedback_label = Label(text="Score: 0 | Level: 1 | Dankness awaits!")
         layout.add_widget(self.feedback_label)
 
-        Clock.schedule_interval(self.update_score, 1)
+        self.game.loop.add_timer(self.update_score, 1)
+        self.profiler.attach(self, self.game)
         return layout
 
     def show_results(self):
@@ -155,5 +162,9 @@ class ChargingGameApp(App):
         target = self.game.level_targets[self.game.level - 1] if self.game.level <= 5 else "WON!"
         self.feedback_label.text = f"Score: {self.game.score} | Level: {self.game.level} | Target: {target}"
 
-if __name__ == "__main__":
+def main():
     ChargingGameApp().run()
+
+
+if __name__ == "__main__":
+    main()
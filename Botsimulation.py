@@ -1,54 +1,91 @@
-import secrets
-import numpy as np
-import os
 import sqlite3
-import json
 import time
+from collections import Counter, namedtuple
+from history import RoundHistory, RoundStats
+from ledger import Ledger
+from metrics import DETAIL_BOTS, default_emitter
+from sampling import LIVE_ENTROPY, AliasSampler
+import tokendb
 
-def custom_encoder(obj):
-    if isinstance(obj, np.complex128):
-        return str(obj)
-    raise TypeError(f'Object of type {obj.__class__.__name__} is not JSON serializable')
+BEHAVIORS = ("casual", "aggressive", "strategic")
+
+# Economy knobs; chances are integer percentages so draws match the hard-coded originals
+EconomyConfig = namedtuple("EconomyConfig", [
+    "behavior_weights",  # Relative weights of casual, aggressive, strategic bots
+    "casual_mint",
+    "aggressive_mint",
+    "aggressive_rare",
+    "aggressive_burn",
+    "strategic_mint",
+    "strategic_rare",
+], defaults=[(1, 1, 1), 50, 70, 10, 50, 30, 20])
 
 class Simulation:
-    def __init__(self):
+    def __init__(self, token_store=None, db_path="simulation.db", rng=None, metrics=None, score_rarity=False,
+                 config=None):
+        # With a MemmapTokenStore, tokens and holdings live on disk instead of in lists
+        self.token_store = token_store
         self.tokens = []  # List of all tokens in circulation
         self.energy_levels = {}
         self.bots = []
+        self._bots_by_id = None  # Owner index: (bots list it covers, {bot id: bot}), built on first lookup
+        self.round_num = 0  # Last completed round, restored from checkpoints
+        self.rng = rng or LIVE_ENTROPY  # Source of every decision draw, swappable for record/replay
+        self.metrics = metrics or default_emitter()  # Events and round summaries, rendered off-thread
+        # Bounded per-round distributions (quantile sketches), however long the run
+        self.history = RoundHistory()
+        self.round_stats = RoundStats(1)
+        self.db_path = db_path
+        self.config = config or EconomyConfig()
+        self.score_rarity = score_rarity  # k-NN rarity per mint; off by default, it dominates mint cost
+        self._sigma_index = None
         self.setup_database()
 
     def setup_database(self):
         """Set up SQLite database to store simulation data."""
-        self.conn = sqlite3.connect("simulation.db")
+        self.conn = sqlite3.connect(self.db_path)
         self.cursor = self.conn.cursor()
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS tokens (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                owner TEXT,
-                energy_level REAL,
-                rare INTEGER,
-                metadata TEXT
-            )
-        ''')
-        self.conn.commit()
+        tokendb.setup(self.conn, tokendb.SIMULATION)  # Migrates databases that still hold JSON metadata
+        self.ledger = Ledger(self.conn, tokendb.SIMULATION)  # Hash chain over minted rows; see gaslite-ledger
+        self.unledgered = []  # Rows minted this round, appended to the ledger as one batch by close_round
+
+    @property
+    def sigma_index(self):
+        """Nearest-neighbour index over token sigmas, saved next to the database and synced on open."""
+        if self._sigma_index is None:
+            from sigmaindex import SigmaIndex  # numpy-backed, so only loaded once tokens are minted or queried
+            path = None if self.db_path == ":memory:" else self.db_path + ".sigma.npz"
+            self._sigma_index = SigmaIndex.open(path)
+            self._sigma_index.sync(tokendb.last_id(self.conn), self._sigma_rows)  # Same new-row test as Gaslite
+        return self._sigma_index
+
+    def _sigma_rows(self, after_id):
+        return self.conn.execute("SELECT id, sigma_x, sigma_y, sigma_z FROM tokens WHERE id > ? ORDER BY id",
+                                 (after_id,))
 
     def create_bots(self, num_bots):
         """Initialize bots with unique behaviors."""
+        self._bots_by_id = None
+        weights = self.config.behavior_weights
+        # An even mix keeps the original single choice() draw, so old recordings replay
+        sampler = None if len(set(weights)) == 1 else AliasSampler(BEHAVIORS, weights)
         for i in range(num_bots):
-            behavior = secrets.choice(["casual", "aggressive", "strategic"])
-            self.bots.append({"id": f"bot_{i}", "behavior": behavior, "tokens": []})
+            behavior = self.rng.choice(BEHAVIORS) if sampler is None else sampler.sample(self.rng.randbelow)
+            bot_id = f"bot_{i}"
+            tokens = self.token_store.holdings(bot_id) if self.token_store is not None else []
+            self.bots.append({"id": bot_id, "behavior": behavior, "tokens": tokens})
 
     def generate_token(self, bot_id, rare=False):
         """Generate a token with energy attributes."""
-        entropy_seed = os.urandom(16)
-        seed_value = int.from_bytes(entropy_seed, 'big') % (2**32)
+        import numpy as np  # Deferred so importing the module stays cheap
+        seed_value = self.rng.seed32()
         sigma_matrix = np.random.RandomState(seed=seed_value).rand(3, 3)
         eigenvalues = np.linalg.eigvals(sigma_matrix)
         sigma_x, sigma_y, sigma_z = eigenvalues.round(2)
 
         token = {
             "owner": bot_id,
-            "energy_level": secrets.randbelow(90) + 10,  # random.uniform(10, 100)
+            "energy_level": self.rng.randbelow(90) + 10,  # random.uniform(10, 100)
             "rare": rare,
             "metadata": {
                 "sigma_x": sigma_x,
@@ -57,13 +94,22 @@ class Simulation:
             }
         }
 
-        self.cursor.execute('''
-            INSERT INTO tokens (owner, energy_level, rare, metadata)
-            VALUES (?, ?, ?, ?)
-        ''', (bot_id, token["energy_level"], int(rare), json.dumps(token["metadata"], default=custom_encoder)))
+        index = self.sigma_index  # Opened and synced before this token's row exists
+        if self.score_rarity:
+            token["rarity"] = index.rarity((sigma_x, sigma_y, sigma_z))
+        sigma_parts = tokendb.split_sigmas((sigma_x, sigma_y, sigma_z))
+        self.cursor.execute(tokendb.INSERT[tokendb.SIMULATION], (bot_id, token["energy_level"], int(rare), *sigma_parts))
         self.conn.commit()
+        self.unledgered.append((self.cursor.lastrowid, token["energy_level"], int(rare), *sigma_parts))
+        token["id"] = self.cursor.lastrowid
+        index.add(token["id"], (sigma_x, sigma_y, sigma_z))
 
-        self.tokens.append(token)
+        self.round_stats.add_token(token["energy_level"], (sigma_x, sigma_y, sigma_z))
+        if self.token_store is not None:
+            token["index"] = self.token_store.append(bot_id, token["energy_level"], rare,
+                                                     (sigma_x, sigma_y, sigma_z), token["id"])
+        else:
+            self.tokens.append(token)
         return token
 
     def bot_action(self, bot):
@@ -77,36 +123,107 @@ class Simulation:
 
     def casual_action(self, bot):
         """Action for casual bots."""
-        if secrets.randbelow(100) < 50:
+        if self.rng.randbelow(100) < self.config.casual_mint:
             token = self.generate_token(bot["id"])
             bot["tokens"].append(token)
 
     def aggressive_action(self, bot):
         """Action for aggressive bots."""
-        if secrets.randbelow(100) < 70:
-            token = self.generate_token(bot["id"], rare=secrets.randbelow(100) < 10)
+        config = self.config
+        if self.rng.randbelow(100) < config.aggressive_mint:
+            token = self.generate_token(bot["id"], rare=self.rng.randbelow(100) < config.aggressive_rare)
             bot["tokens"].append(token)
-        if secrets.randbelow(100) < 50 and bot["tokens"]:
+        if self.rng.randbelow(100) < config.aggressive_burn and bot["tokens"]:
             self.burn_token(bot)
 
     def strategic_action(self, bot):
         """Action for strategic bots."""
-        if secrets.randbelow(100) < 30:
-            token = self.generate_token(bot["id"], rare=secrets.randbelow(100) < 20)
+        config = self.config
+        if self.rng.randbelow(100) < config.strategic_mint:
+            token = self.generate_token(bot["id"], rare=self.rng.randbelow(100) < config.strategic_rare)
             bot["tokens"].append(token)
 
     def burn_token(self, bot):
         """Simulate burning a token for a boost."""
         if bot["tokens"]:
             token = bot["tokens"].pop(0)
-            print(f"{bot['id']} burned a token to boost energy!")
             boost = token["energy_level"] * 1.5
-            print(f"Boost: +{boost:.2f} energy!")
+            self.round_stats.burned += 1
+            self.metrics.event("burn", bot=bot["id"], energy=token["energy_level"], boost=boost)
+
+    def bot(self, bot_id):
+        """The bot dict for ``bot_id`` in O(1); its ``tokens`` are that bot's holdings."""
+        if self._bots_by_id is None or self._bots_by_id[0] is not self.bots:  # e.g. replaced by a checkpoint load
+            self._bots_by_id = (self.bots, {bot["id"]: bot for bot in self.bots})
+        return self._bots_by_id[1][bot_id]
+
+    def holdings(self, bot_id):
+        return self.bot(bot_id)["tokens"]
+
+    def db_holdings(self, bot_id):
+        """Row ids of the tokens ``simulation.db`` records for ``bot_id``, found through the owner index."""
+        return [row[0] for row in self.conn.execute("SELECT id FROM tokens WHERE owner = ?", (bot_id,))]
+
+    def transfer(self, tokens, from_bot, to_bot):
+        """Move ``tokens`` held by ``from_bot`` to ``to_bot``; bots are dicts or ids."""
+        return self.transfer_many([(tokens, from_bot, to_bot)])
+
+    def transfer_many(self, transfers):
+        """Apply ``(tokens, from_bot, to_bot)`` moves in one SQLite transaction; returns tokens moved.
+
+        Moves apply in order, so a token can change hands twice in one batch.
+        They are all checked against current holdings before anything is
+        written, so a bad move leaves the database and the bots untouched.
+        """
+        store = self.token_store
+        key = (lambda token: token["index"]) if store is not None else id
+        held = {}  # Bot id -> keys of the tokens it will hold, for bots seen in this batch
+
+        def holding(bot):
+            keys = held.get(bot["id"])
+            if keys is None:
+                tokens = store.indices(bot["id"]) if store is not None else map(key, bot["tokens"])
+                keys = held[bot["id"]] = set(tokens)
+            return keys
+
+        moves = []
+        for tokens, from_bot, to_bot in transfers:
+            giver = from_bot if isinstance(from_bot, dict) else self.bot(from_bot)
+            taker = to_bot if isinstance(to_bot, dict) else self.bot(to_bot)
+            tokens = list(tokens)
+            if not tokens or giver is taker:
+                continue
+            keys = [key(token) for token in tokens]
+            have = holding(giver)
+            if len(set(keys)) != len(keys) or not have.issuperset(keys):
+                raise ValueError(f"{giver['id']} does not hold every token it is transferring")
+            have.difference_update(keys)
+            holding(taker).update(keys)
+            moves.append((tokens, giver, taker))
+        if not moves:
+            return 0
+
+        self.cursor.executemany("UPDATE tokens SET owner = ? WHERE id = ?",
+                                ((taker["id"], token["id"]) for tokens, _, taker in moves for token in tokens))
+        self.conn.commit()
+        moved = 0
+        for tokens, giver, taker in moves:
+            if store is not None:
+                store.transfer([token["index"] for token in tokens], giver["id"], taker["id"])
+            else:
+                leaving = {id(token) for token in tokens}
+                giver["tokens"][:] = [token for token in giver["tokens"] if id(token) not in leaving]
+                taker["tokens"].extend(tokens)
+            for token in tokens:
+                token["owner"] = taker["id"]
+            moved += len(tokens)
+        self.round_stats.transferred += moved
+        self.metrics.event("transfer", transfers=len(moves), tokens=moved)
+        return moved
 
     def get_ecosystem_stats(self):
         """Calculate and return current ecosystem statistics."""
-        total_tokens = len(self.tokens)
-        rare_tokens = sum(1 for t in self.tokens if t["rare"])
+        total_tokens, rare_tokens = self.count_tokens()
         avg_energy = self.calculate_avg_energy()
         bot_token_counts = self.calculate_bot_token_counts()
         behavior_counts = self.calculate_behavior_counts()
@@ -118,9 +235,20 @@ class Simulation:
             "behavior_counts": behavior_counts
         }
 
+    def count_tokens(self):
+        """Return ``(total, rare)`` token counts."""
+        if self.token_store is not None:
+            return len(self.token_store), self.token_store.total("rare")
+        return len(self.tokens), sum(1 for t in self.tokens if t["rare"])
+
     def calculate_avg_energy(self):
         """Calculate average energy of tokens."""
-        return np.mean([t["energy_level"] for t in self.tokens]) if self.tokens else 0
+        if self.token_store is not None:
+            return self.token_store.mean("energy_level")
+        if not self.tokens:
+            return 0
+        import numpy as np
+        return np.mean([t["energy_level"] for t in self.tokens])
 
     def calculate_bot_token_counts(self):
         """Calculate the number of tokens each bot has."""
@@ -135,34 +263,72 @@ class Simulation:
         }
 
     def print_ecosystem_status(self, round_num):
-        """Print current ecosystem status."""
-        stats = self.get_ecosystem_stats()
-        print(f"\n=== Round {round_num} ===")
-        print(f"Total Tokens in Circulation: {stats['total_tokens']}")
-        print(f"Rare Tokens: {stats['rare_tokens']} ({stats['rare_tokens']/max(stats['total_tokens'], 1)*100:.1f}%)")
-        print(f"Average Token Energy: {stats['avg_energy']:.2f}")
-        print("\nBot Behavior Distribution:")
-        for behavior, count in stats['behavior_counts'].items():
-            print(f"  {behavior.capitalize()}: {count}")
-        print("\nTokens per Bot:")
-        for bot_id, count in stats['bot_token_counts'].items():
-            print(f"  {bot_id}: {count} tokens")
-        print("=" * 30)
-
-    def run_simulation(self, rounds):
-        """Run the simulation for a number of rounds with ecosystem monitoring."""
-        for round_num in range(1, rounds + 1):
+        """Emit the ecosystem status as a ``round`` event; the console view prints it."""
+        total_tokens, rare_tokens = self.count_tokens()
+        held = [len(bot["tokens"]) for bot in self.bots]
+        fields = {
+            "round": round_num,
+            "total_tokens": total_tokens,
+            "rare_tokens": rare_tokens,
+            "avg_energy": float(self.calculate_avg_energy()),
+            "behavior_counts": self.calculate_behavior_counts(),
+            "holdings": Counter(held),
+        }
+        if self.history.recent and self.history.recent[-1]["rounds"][1] == round_num:
+            summary = self.history.recent[-1]
+            fields["energy_quantiles"] = summary["energy"]["quantiles"]
+            fields["holdings_gini"] = summary["holdings_gini"]
+        if len(self.bots) <= DETAIL_BOTS:
+            fields["bot_token_counts"] = {bot["id"]: count for bot, count in zip(self.bots, held)}
+        self.metrics.aggregate("round", **fields)
+
+    def close_round(self):
+        """Move the current round's stats into ``history``, ledger its mints and start the next round."""
+        self.append_ledger()
+        stats = self.round_stats
+        total_tokens = len(self.token_store) if self.token_store is not None else len(self.tokens)
+        stats.close((len(bot["tokens"]) for bot in self.bots), total_tokens)
+        self.history.append(stats)
+        self.round_stats = RoundStats(stats.last_round + 1, stats.k)
+
+    def run_simulation(self, rounds, checkpointer=None):
+        """Run the simulation up to round ``rounds`` with ecosystem monitoring.
+
+        A resumed simulation continues after its restored ``round_num``.
+        """
+        self.round_stats.first_round = self.round_stats.last_round = self.round_num + 1  # After a resume
+        for round_num in range(self.round_num + 1, rounds + 1):
             for bot in self.bots:
                 self.bot_action(bot)
+            self.round_num = round_num
+            self.close_round()
             self.print_ecosystem_status(round_num)
+            if checkpointer is not None:
+                checkpointer.maybe_checkpoint(self)
             time.sleep(0.5)  # Add slight delay to make output readable
 
+    def append_ledger(self):
+        """Append the rows minted since the last call to the ledger as one batch."""
+        if self.unledgered:
+            with self.conn:
+                self.ledger.append(self.unledgered)
+            self.unledgered = []
+
     def close(self):
         """Clean up database connection."""
+        self.append_ledger()
+        if self._sigma_index is not None:
+            self._sigma_index.save()
         self.conn.close()
+        if self.token_store is not None:
+            self.token_store.close()
+
+def main():
+    # Initialize and run the simulation
+    sim = Simulation()
+    sim.create_bots(10)  # Create 10 bots
+    sim.run_simulation(20)  # Simulate 20 rounds
+    sim.close()
 
-# Initialize and run the simulation
-sim = Simulation()
-sim.create_bots(10)  # Create 10 bots
-sim.run_simulation(20)  # Simulate 20 rounds
-sim.close()
+if __name__ == "__main__":
+    main()
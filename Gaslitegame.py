@@ -1,5 +1,4 @@
 import sqlite3
-import numpy as np
 import os
 from kivy.app import App
 from kivy.uix.widget import Widget
@@ -7,9 +6,19 @@ from kivy.uix.boxlayout import BoxLayout
 from kivy.uix.label import Label
 from kivy.uix.button import Button
 from kivy.graphics import Line, Color, Ellipse, Rectangle
-from kivy.clock import Clock
+from charging import RENDER_INTERVAL, ChargeClock
+from gameloop import GameLoop
+from instrument import default_profiler
+from ledger import Ledger, head_path, load_head, save_head
+from metrics import default_emitter
+import tokendb
 import secrets
-import json
+
+
+def token_row(token):
+    """A token's values for ``tokendb.COLUMNS[GASLITE]``."""
+    metadata = token["metadata"]
+    return token["sigma_x"], token["sigma_y"], token["sigma_z"], int(metadata["rare"]), metadata["level"]
 
 class GaslightTokenWidget(Widget):
     def __init__(self, **kwargs):
@@ -26,44 +35,69 @@ class GaslightTokenWidget(Widget):
         self.hold_time = 0
         self.temperature = 30
         self.max_temperature = 70
+        self.charge = ChargeClock()
+        self.loop = GameLoop()
+        self.loop.add_timer(self.render_charge, RENDER_INTERVAL, active=lambda: self.holding)
+        self.metrics = default_emitter()
         self.wallet = 1000
         self.level = 1
         self.load_tokens()
+        self.check_ledger()
         self.update_display()
 
     def setup_database(self):
         self.conn = sqlite3.connect("tokens.db")
         self.cursor = self.conn.cursor()
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS tokens (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                sigma_x REAL,
-                sigma_y REAL,
-                sigma_z REAL,
-                rare INTEGER,
-                level INTEGER,
-                metadata TEXT
-            )
-        ''')
-        self.conn.commit()
+        tokendb.setup(self.conn, tokendb.GASLITE)  # Migrates databases that still hold JSON metadata
+        self.ledger = Ledger(self.conn, tokendb.GASLITE)  # Hash chain over minted rows, checked before rare payouts
+        self.changes = tokendb.UnitOfWork(tokendb.GASLITE, token_row, self.ledger)  # Written by save_tokens
+        self._sigma_index = None
+
+    def check_ledger(self, since=None):
+        """Recheck the rows minted after ``since``, by default the head saved by the last clean run.
+
+        O(new rows), not O(table). ``trusted`` only moves to a head whose
+        rows all checked out; after a failure it stays put, and so does the
+        saved head, so the next start reports the same rows again.
+        """
+        since = load_head(head_path("tokens.db")) if since is None else since
+        result = self.ledger.verify(since)
+        self.ledger_ok = result.ok
+        self.trusted = result.head if result.ok else since
+        if not result.ok:
+            self.metrics.event("tampered", tokens=result.tampered, unrecorded=len(result.unrecorded),
+                               problems=result.problems)
+
+    @property
+    def sigma_index(self):
+        """Nearest-neighbour index over minted sigmas, kept in ``tokens.db.sigma.npz``."""
+        if self._sigma_index is None:
+            from sigmaindex import SigmaIndex  # numpy-backed; load with the first mint, not at startup
+            self._sigma_index = SigmaIndex.open("tokens.db.sigma.npz")
+            # Sold tokens' rows are gone, but their sigmas still count as earlier mints
+            self._sigma_index.sync(tokendb.last_id(self.conn), lambda after_id: self.conn.execute(
+                "SELECT id, sigma_x, sigma_y, sigma_z FROM tokens WHERE id > ? ORDER BY id", (after_id,)))
+        return self._sigma_index
 
     def start_action(self):
         if not self.holding:
             self.holding = True
             self.hold_time = 0
-            Clock.schedule_interval(self.charge_up, 0.05)
+            self.charge.start()
+            self.loop.wake()
 
     def stop_action(self):
         if not self.holding:
             return None
+        self.charge.stop()
+        self.charge.settle(self.charge_up)  # Increments owed since the last draw
         self.holding = False
-        Clock.unschedule(self.charge_up)
         real_diff = abs(self.real_target - self.player_power)
         if real_diff < 150:
             self.mint_token(real_diff)
             self.save_tokens()
         else:
-            print("Missed target! No token minted.")
+            self.metrics.event("miss", diff=real_diff)
         self.reset_round()
         return f"Hold: {self.hold_time:.2f}s, Diff: {real_diff}"
 
@@ -73,10 +107,16 @@ class GaslightTokenWidget(Widget):
         self.temperature = min(self.max_temperature, self.temperature + secrets.randbelow(5) / 10 + 0.1)
         if self.temperature >= self.max_temperature:
             self.token_price -= 10
-            self.stop_action()
+            return True  # Overheated: the hold ends at this increment
+
+    def render_charge(self, dt):
+        """Catch the charge up to the clock and draw it; only scheduled while holding."""
+        if self.charge.settle(self.charge_up):
+            self.stop_action()  # Overheated at one of the increments just applied
         self.update_display()
 
     def mint_token(self, real_diff):
+        import numpy as np  # Only minting needs numpy; keep app startup light
         entropy_seed = os.urandom(16)
         seed_value = int.from_bytes(entropy_seed, 'big') % (2**32)
         sigma_matrix = np.random.RandomState(seed=seed_value).rand(3, 3)
@@ -86,15 +126,11 @@ class GaslightTokenWidget(Widget):
         metadata = {"sigma_x": sigma_x, "sigma_y": sigma_y, "sigma_z": sigma_z, "rare": rare, "level": self.level}
         token = {"sigma_x": sigma_x, "sigma_y": sigma_y, "sigma_z": sigma_z, "metadata": metadata}
         self.tokens.append(token)
-        if rare:
-            print("Legendary token minted!")
+        # How far the new sigmas sit from earlier mints; larger means a rarer token
+        rarity = self.sigma_index.rarity((sigma_x, sigma_y, sigma_z))
+        self.metrics.event("mint", rare=rare, diff=real_diff, level=self.level, rarity=rarity)
         self.token_price += secrets.randbelow(6)
-        # Save to SQLite
-        self.cursor.execute('''
-            INSERT INTO tokens (sigma_x, sigma_y, sigma_z, rare, level, metadata)
-            VALUES (?, ?, ?, ?, ?, ?)
-        ''', (sigma_x, sigma_y, sigma_z, int(rare), self.level, json.dumps(metadata)))
-        self.conn.commit()
+        self.changes.add(token)  # Inserted, and added to the sigma index, by the next save_tokens
 
     def buy_token(self):
         if self.wallet >= self.token_price and len(self.tokens) < 5:
@@ -102,37 +138,59 @@ class GaslightTokenWidget(Widget):
             self.wallet -= self.token_price
             self.token_price += secrets.randbelow(21) - 10
             self.save_tokens()
+            self.loop.wake()
 
     def sell_token(self):
         if self.tokens:
             token = self.tokens.pop(0)  # Sell oldest token
-            self.wallet += self.token_price
-            if secrets.randbelow(100) < 10:  # 10% surge chance
-                price_raise = self.token_price * (secrets.randbelow(11) + 5) / 100
-                self.token_price += int(price_raise)
-                print(f"Price surged by {int(price_raise)}!")
+            self.changes.delete(token)
+            # O(log n) proof against the trusted head. None means there is nothing to prove against
+            # (a row the ledger never saw, or one minted after a failed check), not an edit
+            if token["metadata"]["rare"] and "id" in token and self.ledger.check(token["id"], self.trusted) is False:
+                self.metrics.event("tampered", tokens=[token["id"]], withheld=True)  # Edited since minting: no payout
             else:
-                base_change = secrets.randbelow(21) - 10
-                self.token_price += base_change
-            self.token_price = max(10, self.token_price)
+                self.wallet += self.token_price
+                if secrets.randbelow(100) < 10:  # 10% surge chance
+                    price_raise = self.token_price * (secrets.randbelow(11) + 5) / 100
+                    self.token_price += int(price_raise)
+                    self.metrics.event("surge", amount=int(price_raise), price=self.token_price)
+                else:
+                    base_change = secrets.randbelow(21) - 10
+                    self.token_price += base_change
+                self.token_price = max(10, self.token_price)
             self.save_tokens()
+            self.loop.wake()
 
     def load_tokens(self):
-        self.cursor.execute("SELECT sigma_x, sigma_y, sigma_z, rare, level, metadata FROM tokens")
-        rows = self.cursor.fetchall()
+        self.cursor.execute("SELECT id, sigma_x, sigma_y, sigma_z, rare, level FROM tokens ORDER BY id")
         self.tokens = [
             {
-                "sigma_x": row[0],
-                "sigma_y": row[1],
-                "sigma_z": row[2],
-                "metadata": json.loads(row[5])
-            } for row in rows
+                "id": token_id,
+                "sigma_x": sigma_x,
+                "sigma_y": sigma_y,
+                "sigma_z": sigma_z,
+                "metadata": {"sigma_x": sigma_x, "sigma_y": sigma_y, "sigma_z": sigma_z,
+                             "rare": bool(rare), "level": level}
+            } for token_id, sigma_x, sigma_y, sigma_z, rare, level in self.cursor.fetchall()
         ]
 
     def save_tokens(self):
-        # JSON backup (optional, since SQLite is primary now)
-        with open("tokens.json", "w") as f:
-            json.dump(self.tokens, f)
+        """Write the tokens minted, changed or sold since the last save in one transaction."""
+        inserted = self.changes.flush(self.conn)
+        if inserted and self.ledger_ok:
+            # Covers our own batch plus any another writer (gaslite-server) appended since trusted
+            self.check_ledger(self.trusted)
+        for token in inserted:
+            if self._sigma_index is not None:  # Otherwise it picks the rows up when first opened
+                self._sigma_index.add(token["id"], (token["sigma_x"], token["sigma_y"], token["sigma_z"]))
+
+    def close(self):
+        self.save_tokens()
+        if self.ledger_ok:
+            save_head(self.trusted, head_path("tokens.db"))
+        if self._sigma_index is not None:
+            self._sigma_index.save()
+        self.conn.close()
 
     def reset_round(self):
         self.player_power = 0
@@ -143,6 +201,7 @@ class GaslightTokenWidget(Widget):
             self.level += 1
             self.real_target = max(300, self.real_target - 50)  # Difficulty increase
         self.update_display()
+        self.loop.wake()
 
     def update_display(self):
         self.canvas.clear()
@@ -161,19 +220,21 @@ class GaslightTokenWidget(Widget):
 class GaslightTokenApp(App):
     def build(self):
         layout = BoxLayout(orientation='vertical', spacing=10, padding=10)
+        self.profiler = default_profiler()
         self.game = GaslightTokenWidget()
         layout.add_widget(self.game)
         button_box = BoxLayout(size_hint=(1, 0.2))
-        charge_btn = Button(text="Charge", on_press=lambda x: self.game.start_action())
-        release_btn = Button(text="Release", on_press=lambda x: self.show_results())
-        buy_btn = Button(text="Buy", on_press=lambda x: self.game.buy_token())
-        sell_btn = Button(text="Sell", on_press=lambda x: self.game.sell_token())
+        charge_btn = Button(text="Charge", on_press=self.profiler.handler("start_action", lambda x: self.game.start_action()))
+        release_btn = Button(text="Release", on_press=self.profiler.handler("show_results", lambda x: self.show_results()))
+        buy_btn = Button(text="Buy", on_press=self.profiler.handler("buy_token", lambda x: self.game.buy_token()))
+        sell_btn = Button(text="Sell", on_press=self.profiler.handler("sell_token", lambda x: self.game.sell_token()))
         for btn in (charge_btn, release_btn, buy_btn, sell_btn):
             button_box.add_widget(btn)
         layout.add_widget(button_box)
         self.feedback_label = Label(text="Wallet: 1000 | Price: 100 | Level: 1")
         layout.add_widget(self.feedback_label)
-        Clock.schedule_interval(self.update_ui, 0.5)
+        self.game.loop.add_timer(self.update_ui, 0.5)
+        self.profiler.attach(self, self.game)
         return layout
 
     def show_results(self):
@@ -189,7 +250,11 @@ class GaslightTokenApp(App):
 
     def on_stop(self):
         if hasattr(self.game, 'conn'):
-            self.game.conn.close()
+            self.game.close()
 
-if __name__ == "__main__":
+def main():
     GaslightTokenApp().run()
+
+
+if __name__ == "__main__":
+    main()
@@ -4,10 +4,12 @@ from kivy.uix.boxlayout import BoxLayout
 from kivy.uix.label import Label
 from kivy.uix.button import Button
 from kivy.graphics import Line, Color, Ellipse, Rectangle
-from kivy.clock import Clock
+from charging import RENDER_INTERVAL, ChargeClock
+from gameloop import GameLoop
+from instrument import default_profiler
+from metrics import default_emitter
 import secrets
 import json
-import psutil
 
 
 class GaslightTokenWidget(Widget):
@@ -23,6 +25,11 @@ class GaslightTokenWidget(Widget):
         self.hold_time = 0
         self.temperature = 30
         self.max_temperature = 70
+        self.charge = ChargeClock()
+        self.loop = GameLoop()
+        self.loop.add_timer(self.render_charge, RENDER_INTERVAL, active=lambda: self.holding)
+        self.metrics = default_emitter()
+        self.profiler = default_profiler()
         self.wallet = 1000
         self.load_tokens()
         self.update_display()
@@ -32,14 +39,16 @@ class GaslightTokenWidget(Widget):
         if not self.holding:
             self.holding = True
             self.hold_time = 0
-            Clock.schedule_interval(self.charge_up, 0.05)
+            self.charge.start()
+            self.loop.wake()
 
     def stop_action(self):
         """End charging, potentially mint and save token."""
         if not self.holding:
             return None
+        self.charge.stop()
+        self.charge.settle(self.charge_up)  # Increments owed since the last draw
         self.holding = False
-        Clock.unschedule(self.charge_up)
         real_diff = abs(self.real_target - self.player_power)
         if real_diff < 150:
             self.mint_token()
@@ -51,19 +60,26 @@ class GaslightTokenWidget(Widget):
         """Simulate charging with battery data if accessible."""
         self.hold_time += dt
         try:
-            battery = psutil.sensors_battery()
+            with self.profiler.section("psutil"):
+                import psutil  # Deferred to the first charge; later ticks hit sys.modules
+                battery = psutil.sensors_battery()
             if battery:
                 self.player_power = min(1000, battery.percent * 10)  # Battery % scaled to 0-1000
                 self.temperature = min(self.max_temperature, battery.power_plugged * 40 + 30)  # Temp from charge state
             else:
                 self.player_power = min(1000, self.player_power + secrets.randbelow(21) + 10)
                 self.temperature = min(self.max_temperature, self.temperature + secrets.randbelow(5) / 10 + 0.1)
-        except (PermissionError, AttributeError):  # Handle permission denied or other psutil errors
+        except (ImportError, PermissionError, AttributeError):  # psutil missing, permission denied or other psutil errors
             self.player_power = min(1000, self.player_power + secrets.randbelow(21) + 10)
             self.temperature = min(self.max_temperature, self.temperature + secrets.randbelow(5) / 10 + 0.1)
         if self.temperature >= self.max_temperature:
             self.token_price -= 10
-            self.stop_action()
+            return True  # Overheated: the hold ends at this increment
+
+    def render_charge(self, dt):
+        """Catch the charge up to the clock and draw it; only scheduled while holding."""
+        if self.charge.settle(self.charge_up):
+            self.stop_action()  # Overheated at one of the increments just applied
         self.update_display()
 
     def mint_token(self):
@@ -82,6 +98,7 @@ class GaslightTokenWidget(Widget):
         if self.tokens:
             self.tokens.pop(0)
             self.save_tokens()
+            self.loop.wake()
 
     def buy_token(self):
         """Buy a token at current price."""
@@ -90,6 +107,7 @@ class GaslightTokenWidget(Widget):
             self.wallet -= self.token_price
             self.token_price += secrets.randbelow(21) - 10
             self.save_tokens()
+            self.loop.wake()
 
     def sell_token(self):
         """Sell a token with a chance of price surge."""
@@ -99,12 +117,13 @@ class GaslightTokenWidget(Widget):
             if secrets.randbelow(100) < 10:  # 10% chance
                 price_raise = self.token_price * (secrets.randbelow(11) + 5) / 100  # 5-15%
                 self.token_price += int(price_raise)
-                print(f"Price surged by {int(price_raise)}!")
+                self.metrics.event("surge", amount=int(price_raise), price=self.token_price)
             else:
                 base_change = secrets.randbelow(21) - 10 - int(token["preeminent"] / 10)
                 self.token_price += base_change
             self.token_price = max(10, self.token_price)
             self.save_tokens()
+            self.loop.wake()
 
     def save_tokens(self):
         """Persist tokens to file."""
@@ -126,6 +145,7 @@ class GaslightTokenWidget(Widget):
         self.real_target = secrets.randbelow(601) + 300
         self.fake_target = self.real_target + secrets.randbelow(201) - 100
         self.update_display()
+        self.loop.wake()
 
     def update_display(self):
         """Render game visuals."""
@@ -147,15 +167,16 @@ class GaslightTokenApp(App):
     """Appcharge-compatible gaslight token game with market."""
     def build(self):
         layout = BoxLayout(orientation='vertical', spacing=10, padding=10)
+        self.profiler = default_profiler()
         self.game = GaslightTokenWidget()
         self.game.load_tokens()  # Load tokens on start
         layout.add_widget(self.game)
 
         button_box = BoxLayout(size_hint=(1, 0.2))
-        charge_btn = Button(text="Charge", on_press=lambda x: self.game.start_action())
-        release_btn = Button(text="Release", on_press=lambda x: self.show_results())
-        buy_btn = Button(text="Buy", on_press=lambda x: self.game.buy_token())
-        sell_btn = Button(text="Sell", on_press=lambda x: self.game.sell_token())
+        charge_btn = Button(text="Charge", on_press=self.profiler.handler("start_action", lambda x: self.game.start_action()))
+        release_btn = Button(text="Release", on_press=self.profiler.handler("show_results", lambda x: self.show_results()))
+        buy_btn = Button(text="Buy", on_press=self.profiler.handler("buy_token", lambda x: self.game.buy_token()))
+        sell_btn = Button(text="Sell", on_press=self.profiler.handler("sell_token", lambda x: self.game.sell_token()))
         for btn in (charge_btn, release_btn, buy_btn, sell_btn):
             button_box.add_widget(btn)
         layout.add_widget(button_box)
@@ -168,7 +189,8 @@ class GaslightTokenApp(App):
         self.feedback_label = Label(text="Wallet: 1000 | Price: 100")
         layout.add_widget(self.feedback_label)
 
-        Clock.schedule_interval(self.update_ui, 0.5)
+        self.game.loop.add_timer(self.update_ui, 0.5)
+        self.profiler.attach(self, self.game)
         return layout
 
     def show_results(self):
@@ -193,5 +215,9 @@ class GaslightTokenApp(App):
         )
 
 
-if __name__ == "__main__":
+def main():
     GaslightTokenApp().run()
+
+
+if __name__ == "__main__":
+    main()
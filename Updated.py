@@ -4,7 +4,9 @@ from kivy.uix.label import Label
 from kivy.uix.boxlayout import BoxLayout
 from kivy.uix.button import Button
 from kivy.graphics import Line, Color, Ellipse
-from kivy.clock import Clock
+from charging import RENDER_INTERVAL, ChargeClock
+from gameloop import GameLoop
+from instrument import default_profiler
 import secrets  # Use secrets for cryptographic security
 
 
@@ -17,6 +19,9 @@ class ChargingGameWidget(Widget):
         self.temperature = 30  # Simulated temperature
         self.holding = False
         self.hold_time = 0  # Time the button was held
+        self.charge = ChargeClock()  # Charge follows the press time, not how often the UI runs
+        self.loop = GameLoop()  # Single timer driver, idle while not charging
+        self.loop.add_timer(self.render_charge, RENDER_INTERVAL, active=lambda: self.holding)
 
         self.canvas.clear()
         with self.canvas:
@@ -36,12 +41,14 @@ class ChargingGameWidget(Widget):
         """Start holding."""
         self.holding = True
         self.hold_time = 0
-        Clock.schedule_interval(self.charge_up, 0.05)
+        self.charge.start()
+        self.loop.wake()
 
     def stop_action(self):
         """Stop holding and calculate results."""
+        self.charge.stop()
+        self.charge.settle(self.charge_up)  # Increments owed since the last draw
         self.holding = False
-        Clock.unschedule(self.charge_up)
 
         # Calculate score based on proximity to target
         diff = abs(self.target - self.player_power)
@@ -54,6 +61,7 @@ class ChargingGameWidget(Widget):
 
         # Update display with results
         self.update_display()
+        self.loop.wake()
         return f"Hold Time: {self.hold_time:.2f}s, Distance to Target: {diff}, {reward}"
 
     def charge_up(self, dt):
@@ -61,6 +69,10 @@ class ChargingGameWidget(Widget):
         self.hold_time += dt
         self.player_power = min(1000, self.player_power + secrets.randbelow(21) + 10)  # Randomly add between 10 and 30
         self.temperature += secrets.randbelow(5) / 10 + 0.1  # Randomly increase temperature between 0.1 and 0.5
+
+    def render_charge(self, dt):
+        """Catch the charge up to the clock and draw it; only scheduled while holding."""
+        self.charge.settle(self.charge_up)
         self.update_display()
 
     def update_display(self):
@@ -86,14 +98,16 @@ class ChargingGameApp(App):
     def build(self):
         layout = BoxLayout(orientation='vertical', spacing=10, padding=10)
 
+        self.profiler = default_profiler()
+
         # Game widget
         self.game = ChargingGameWidget()
         layout.add_widget(self.game)
 
         # Control buttons
         button_box = BoxLayout(size_hint=(1, 0.2))
-        start_btn = Button(text="Hold", on_press=lambda x: self.game.start_action())
-        stop_btn = Button(text="Release", on_press=lambda x: self.show_results())
+        start_btn = Button(text="Hold", on_press=self.profiler.handler("start_action", lambda x: self.game.start_action()))
+        stop_btn = Button(text="Release", on_press=self.profiler.handler("show_results", lambda x: self.show_results()))
         button_box.add_widget(start_btn)
         button_box.add_widget(stop_btn)
         layout.add_widget(button_box)
@@ -109,8 +123,8 @@ class ChargingGameApp(App):
         layout.add_widget(self.feedback_label)
 
         # Regular updates
-        Clock.schedule_interval(self.update_score, 1)
-
+        self.game.loop.add_timer(self.update_score, 1)
+        self.profiler.attach(self, self.game)
         return layout
 
     def show_results(self):
@@ -123,5 +137,9 @@ class ChargingGameApp(App):
         self.feedback_label.text = f"Score: {self.game.score}"
 
 
-if __name__ == "__main__":
+def main():
     ChargingGameApp().run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+import argparse
+import os
+import random
+import tempfile
+import time
+
+import numpy as np
+
+import tokendb
+from Botsimulation import Simulation
+from checkpoint import Checkpointer, load
+from tokenstore import MemmapTokenStore
+
+
+def populate(sim, tokens_per_bot):
+    """Give every bot synthetic tokens with real row ids, skipping the per-mint eigenvalue work."""
+    rng = np.random.default_rng()
+    sigmas = rng.random((len(sim.bots) * tokens_per_bot, 3)).round(2).astype(np.complex128)
+    energies = rng.integers(10, 100, len(sigmas)).tolist()
+    holders = [bot for bot in sim.bots for _ in range(tokens_per_bot)]
+    first = tokendb.last_id(sim.conn) + 1
+    with sim.conn:
+        sim.conn.executemany(tokendb.INSERT[tokendb.SIMULATION], (
+            (bot["id"], energy, 0, *tokendb.split_sigmas(row))
+            for bot, energy, row in zip(holders, energies, sigmas)))
+    for token_id, (bot, energy, (sx, sy, sz)) in enumerate(zip(holders, energies, sigmas), first):
+        if sim.token_store is not None:
+            token = {"id": token_id, "index": sim.token_store.append(bot["id"], energy, False, (sx, sy, sz), token_id)}
+        else:
+            token = {"id": token_id, "owner": bot["id"], "energy_level": energy, "rare": False,
+                     "metadata": {"sigma_x": sx, "sigma_y": sy, "sigma_z": sz}}
+            sim.tokens.append(token)
+        bot["tokens"].append(token)
+
+
+def holdings_of(sim):
+    """Each bot's holdings in FIFO order: record indices for a store, token values otherwise."""
+    if sim.token_store is not None:
+        return [list(sim.token_store.indices(bot["id"])) for bot in sim.bots]
+    return [[(t["energy_level"], complex(t["metadata"]["sigma_x"])) for t in bot["tokens"]] for bot in sim.bots]
+
+
+def db_matches(sim):
+    """Whether ``simulation.db`` gives every bot exactly the row ids it holds in memory."""
+    store = sim.token_store
+    if store is not None:
+        token_ids = store.column("token_id")
+        held = (token_ids[list(store.indices(bot["id"]))].tolist() for bot in sim.bots)
+    else:
+        held = ([token["id"] for token in bot["tokens"]] for bot in sim.bots)
+    return all(sorted(sim.db_holdings(bot["id"])) == sorted(ids) for bot, ids in zip(sim.bots, held))
+
+
+def transfer_some(sim, count, rng):
+    """``count`` one-token moves out of the middle of random bots' holdings."""
+    for _ in range(count):
+        giver, taker = rng.sample(sim.bots, 2)
+        if sim.token_store is not None:
+            held = list(sim.token_store.indices(giver["id"]))
+            tokens = [sim.token_store.get(held[len(held) // 2])] if held else []
+        else:
+            tokens = giver["tokens"][len(giver["tokens"]) // 2:][:1]
+        sim.transfer(tokens, giver, taker)
+
+
+def make_sim(workdir, use_store):
+    store = MemmapTokenStore(os.path.join(workdir, "tokens.bin")) if use_store else None
+    return Simulation(token_store=store, db_path=os.path.join(workdir, "simulation.db"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Checkpoint size and write/load time benchmark")
+    parser.add_argument("--bots", type=int, default=1_000_000)
+    parser.add_argument("--tokens-per-bot", type=int, default=1)
+    parser.add_argument("--store", action="store_true", help="keep tokens in a MemmapTokenStore")
+    parser.add_argument("--transfers", type=int, default=1000,
+                        help="token moves made after the checkpoint, which the resume must undo")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        sim = make_sim(workdir, args.store)
+        start = time.perf_counter()
+        sim.create_bots(args.bots)
+        populate(sim, args.tokens_per_bot)
+        sim.round_num = 42
+        print(f"Built {args.bots} bots / {args.bots * args.tokens_per_bot} tokens "
+              f"in {time.perf_counter() - start:.2f}s ({'store' if args.store else 'in-memory'})")
+
+        path = os.path.join(workdir, "sim.ckpt.npz")
+        checkpointer = Checkpointer(path)
+        checkpointer.checkpoint(sim)
+        stall = checkpointer.snapshot_seconds
+        expected = holdings_of(sim)
+        transfer_some(sim, args.transfers, random.Random(0))
+        checkpointer.close()
+        sim.close()
+        print(f"Snapshot stall: {stall * 1000:.0f} ms | Background write: {checkpointer.write_seconds * 1000:.0f} ms | "
+              f"Size: {checkpointer.last_bytes / 1024 / 1024:.1f} MB "
+              f"({checkpointer.last_bytes / args.bots:.1f} bytes/bot)")
+
+        resumed = make_sim(workdir, args.store)
+        start = time.perf_counter()
+        meta = load(resumed, path)
+        elapsed = time.perf_counter() - start
+        held = sum(len(bot["tokens"]) for bot in resumed.bots)
+        same = holdings_of(resumed) == expected and db_matches(resumed)
+        print(f"Resume: {elapsed * 1000:.0f} ms | Round {meta['round_num']} | "
+              f"{len(resumed.bots)} bots holding {held} tokens | "
+              f"holdings after {args.transfers} later transfers: {'as checkpointed' if same else 'CORRUPTED'}")
+        resumed.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+import argparse
+import os
+import subprocess
+import sys
+
+# Cold-import budgets in milliseconds (cumulative time from ``python -X importtime``).
+# Headless modules must not pull in kivy, pygame, numpy or psutil at import.
+BUDGET_MS = {
+    "sampling": 20,
+    "market": 20,
+    "metrics": 20,
+    "sketch": 20,
+    "history": 20,
+    "instrument": 20,
+    "charging": 20,
+    "Botsimulation": 40,
+    "stress_testing": 30,
+    "server": 80,
+    "loadgen": 100,
+    "recording": 30,
+    "sweep": 60,
+    "tokendb": 20,
+    "ledger": 20,
+    "tokenstore": 150,
+    "checkpoint": 200,
+    "columnar": 300,
+    "evolve": 200,
+    "sigmaindex": 200,
+    "tilerender": 400,
+    "Appcharge2": 600,
+    "Yeet": 600,
+    "Updated": 600,
+    "Gaslitegame": 600,
+    "Simulation": 600,
+}
+HEAVY = ("kivy", "pygame", "numpy", "psutil")
+HEADLESS = ("sampling", "market", "metrics", "sketch", "history", "instrument", "charging", "Botsimulation", "stress_testing", "server", "loadgen", "recording", "sweep", "tokendb", "ledger")
+
+
+def import_time_ms(module, runs):
+    """Best-of-``runs`` cumulative import time of ``module`` and the heavy packages it loaded."""
+    best, heavy = None, set()
+    env = dict(os.environ, KIVY_NO_ARGS="1", KIVY_NO_CONSOLELOG="1")
+    for _ in range(runs):
+        result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                                capture_output=True, text=True, env=env,
+                                cwd=os.path.dirname(os.path.abspath(__file__)))
+        if result.returncode:
+            raise RuntimeError(f"importing {module} failed:\n{result.stderr[-2000:]}")
+        for line in result.stderr.splitlines():
+            if not line.startswith("import time:") or "|" not in line:
+                continue
+            _, cumulative, name = line.split("|")
+            name = name.strip()
+            if name in HEAVY:
+                heavy.add(name)
+            if name == module:
+                ms = int(cumulative) / 1000
+                best = ms if best is None else min(best, ms)
+    return best, heavy
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import-time budget check")
+    parser.add_argument("modules", nargs="*", default=list(BUDGET_MS))
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    failures = 0
+    print(f"{'module':<16}{'import ms':>10}{'budget':>8}  heavy imports")
+    for module in args.modules:
+        ms, heavy = import_time_ms(module, args.runs)
+        budget = BUDGET_MS.get(module)
+        over = budget is not None and ms > budget
+        leaked = module in HEADLESS and heavy
+        failures += over or bool(leaked)
+        status = "OVER" if over else ("LEAK" if leaked else "ok")
+        print(f"{module:<16}{ms:>10.1f}{budget or '-':>8}  {', '.join(sorted(heavy)) or '-'}  {status}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
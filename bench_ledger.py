@@ -0,0 +1,96 @@
+import argparse
+import hashlib
+import os
+import random
+import sqlite3
+import tempfile
+import time
+
+import ledger
+import tokendb
+
+
+def mint(conn, ledger_, count, rng, batch):
+    """Insert ``count`` Gaslite rows in transactions of ``batch``, appending each to the ledger."""
+    for start in range(0, count, batch):
+        rows = [(round(rng.random(), 2), round(rng.random(), 2), round(rng.random(), 2), int(rng.random() < 0.01), 1)
+                for _ in range(min(batch, count - start))]
+        first = tokendb.last_id(conn) + 1
+        with conn:
+            conn.executemany(tokendb.INSERT[tokendb.GASLITE], rows)
+            ledger_.append((token_id, *row) for token_id, row in enumerate(rows, first))
+
+
+def full_table_hash(conn, packer):
+    """The naive check: one hash over every row, recomputed each time."""
+    digest = hashlib.blake2b(digest_size=32)
+    for row in conn.execute(f"SELECT {ledger.LEAF_COLUMNS[tokendb.GASLITE][0]} FROM tokens ORDER BY id"):
+        digest.update(packer.pack(*[value + 0.0 for value in row]))
+    return digest.digest()
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Hash-chained token ledger: incremental checks and proofs vs full-table hashing")
+    parser.add_argument("--rows", type=int, default=10_000_000)
+    parser.add_argument("--batch", type=int, default=10_000, help="rows minted per transaction while building")
+    parser.add_argument("--new", type=int, default=1000, help="rows minted after the trusted head")
+    parser.add_argument("--proofs", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--dir", help="where to build the database (default: a temporary directory)")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    with tempfile.TemporaryDirectory(dir=args.dir) as workdir:
+        path = os.path.join(workdir, "tokens.db")
+        conn = sqlite3.connect(path)
+        conn.execute("PRAGMA journal_mode = WAL")
+        tokendb.setup(conn, tokendb.GASLITE)
+        plain = sqlite3.connect(os.path.join(workdir, "plain.db"))
+        tokendb.setup(plain, tokendb.GASLITE)
+        ledger_ = ledger.Ledger(conn, tokendb.GASLITE)
+        packer = ledger.LEAF_COLUMNS[tokendb.GASLITE][1]
+
+        _, seconds = timed(mint, conn, ledger_, args.rows, rng, args.batch)
+        start = time.perf_counter()
+        with plain:
+            plain.executemany(tokendb.INSERT[tokendb.GASLITE], conn.execute(
+                f"SELECT {tokendb.COLUMNS[tokendb.GASLITE]} FROM tokens ORDER BY id"))
+        plain_seconds = time.perf_counter() - start
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        print(f"{args.rows} rows minted in {seconds:.1f}s with the ledger ({seconds / args.rows * 1e6:.1f} us/row); "
+              f"copying them without it took {plain_seconds:.1f}s")
+        print(f"database {os.path.getsize(path) / 2**20:.0f} MiB with the ledger, "
+              f"{os.path.getsize(os.path.join(workdir, 'plain.db')) / 2**20:.0f} MiB without")
+        plain.close()
+
+        trusted = ledger_.head()
+        mint(conn, ledger_, args.new, rng, args.batch)
+        result, incremental = timed(ledger_.verify, trusted)
+        assert result.ok and result.checked == args.new, result
+        _, naive = timed(full_table_hash, conn, packer)
+        print(f"verify {args.new} new rows since the trusted head: {incremental * 1e3:9.1f} ms")
+        print(f"hash the full table ({args.rows + args.new} rows):   {naive * 1e3:9.1f} ms "
+              f"({naive / incremental:.0f}x)")
+
+        head = ledger_.head()
+        ids = [rng.randint(1, head.leaves) for _ in range(args.proofs)]
+        checks, seconds = timed(lambda: [ledger_.check(token_id, head) for token_id in ids])
+        assert all(checks)
+        proof = ledger_.proof(ids[0])
+        print(f"single-token proof: {seconds / len(ids) * 1e6:.0f} us/check, "
+              f"{len(proof.siblings)} siblings + {len(proof.peaks)} peaks")
+
+        conn.execute("UPDATE tokens SET level = level + 1 WHERE id = ?", (ids[0],))
+        conn.commit()
+        print(f"after editing token {ids[0]}: proof {'fails' if not ledger_.check(ids[0], head) else 'STILL PASSES'}")
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
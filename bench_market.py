@@ -0,0 +1,74 @@
+import argparse
+import random
+import time
+
+from market import OrderBook, OrderGenerator
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0
+    index = min(len(sorted_values) - 1, max(0, int(round(pct / 100 * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def run_benchmark(orders, seed=0, warmup=10000, **generator_kwargs):
+    """Feed synthetic orders through an OrderBook and time every submission."""
+    book = OrderBook()
+    generator = OrderGenerator(random.Random(seed), **generator_kwargs)
+    for _ in range(warmup):
+        generator.apply(book, generator.next_order(book))
+
+    # Generation depends on book state, so time each apply call on its own
+    latencies = []
+    start_trades = book.trade_count
+    clock = time.perf_counter_ns
+    start = clock()
+    for _ in range(orders):
+        order = generator.next_order(book)
+        t0 = clock()
+        generator.apply(book, order)
+        latencies.append(clock() - t0)
+    elapsed = (clock() - start) / 1e9
+    matching = sum(latencies) / 1e9
+
+    latencies.sort()
+    return {
+        "orders": orders,
+        "elapsed_s": elapsed,
+        "matching_s": matching,
+        "orders_per_sec": orders / matching if matching else 0,
+        "trades": book.trade_count - start_trades,
+        "resting_orders": len(book.orders),
+        "token_price": book.token_price,
+        "p50_us": percentile(latencies, 50) / 1000,
+        "p90_us": percentile(latencies, 90) / 1000,
+        "p99_us": percentile(latencies, 99) / 1000,
+        "p999_us": percentile(latencies, 99.9) / 1000,
+        "max_us": latencies[-1] / 1000 if latencies else 0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Order book throughput benchmark")
+    parser.add_argument("--orders", type=int, default=200000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--owners", type=int, default=1000)
+    parser.add_argument("--market-ratio", type=float, default=0.1)
+    parser.add_argument("--cancel-ratio", type=float, default=0.2)
+    args = parser.parse_args()
+
+    result = run_benchmark(args.orders, seed=args.seed, owners=args.owners,
+                           market_ratio=args.market_ratio, cancel_ratio=args.cancel_ratio)
+    print("Order Book Benchmark:")
+    print(f"Orders: {result['orders']} in {result['matching_s']:.2f}s matching "
+          f"({result['elapsed_s']:.2f}s wall) = {result['orders_per_sec']:.0f} orders/sec")
+    print(f"Trades: {result['trades']} | Resting: {result['resting_orders']} | "
+          f"Token price: {result['token_price']}")
+    print(f"Match latency (us): p50 {result['p50_us']:.2f} | p90 {result['p90_us']:.2f} | "
+          f"p99 {result['p99_us']:.2f} | p99.9 {result['p999_us']:.2f} | max {result['max_us']:.2f}")
+
+
+if __name__ == "__main__":
+    main()
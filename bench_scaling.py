@@ -0,0 +1,201 @@
+import argparse
+import csv
+import gc
+import importlib
+import math
+import multiprocessing
+import os
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+
+SIZES = (10, 100, 1000, 10_000, 100_000)
+WORKLOADS = ("stress", "economy")
+PRELOAD = {"stress": ("stress_testing",), "economy": ("numpy", "sigmaindex", "Botsimulation", "metrics")}
+SUPERLINEAR = 1.2  # Tick-time growth exponent between sizes above which a step is flagged
+FIELDS = ("workload", "bots", "ticks", "ticks_requested", "build_s", "tick_mean_ms", "tick_p50_ms", "tick_p99_ms", "us_per_bot",
+          "exponent", "rss_mb", "rss_growth_mb", "gc_collections", "gc_total_ms", "gc_max_ms", "top_allocators")
+
+
+class GCPauses:
+    """Times every collection through ``gc.callbacks`` while installed."""
+    def __init__(self):
+        self.pauses = []
+        self._start = None
+
+    def _callback(self, phase, info):
+        if phase == "start":
+            self._start = time.perf_counter()
+        elif self._start is not None:
+            self.pauses.append((info["generation"], time.perf_counter() - self._start))
+            self._start = None
+
+    def __enter__(self):
+        gc.callbacks.append(self._callback)
+        return self
+
+    def __exit__(self, *exc):
+        gc.callbacks.remove(self._callback)
+
+
+def preload(workload):
+    """Import what a workload loads lazily, so imports stay out of tick times and allocator counts."""
+    for name in PRELOAD[workload]:
+        importlib.import_module(name)
+
+
+def build(workload, bots, seed):
+    """Set up ``bots`` bots for one workload; returns a function advancing it one tick."""
+    from sampling import SeededEntropy
+    rng = SeededEntropy(seed)
+    if workload == "stress":
+        from stress_testing import FPS, Bot, BotScheduler
+        fleet = [Bot(i, None, rng=rng) for i in range(bots)]
+        for bot in fleet:
+            bot.all_bots = fleet
+            # Spread first presses over the idle delay so early ticks look like steady state
+            bot.action_timer = rng.uniform(0, bot.next_action)
+        scheduler = BotScheduler(fleet)
+        return lambda: scheduler.step(1 / FPS)
+    from Botsimulation import Simulation
+    from metrics import MetricsEmitter
+    sim = Simulation(db_path=":memory:", rng=rng, metrics=MetricsEmitter())
+    sim.create_bots(bots)
+
+    def round_():
+        for bot in sim.bots:
+            sim.bot_action(bot)
+        sim.round_num += 1
+        sim.close_round()
+    return round_
+
+
+def _run(step, ticks, max_seconds):
+    times = []
+    deadline = time.perf_counter() + max_seconds
+    while len(times) < ticks and time.perf_counter() < deadline:
+        start = time.perf_counter()
+        step()
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def measure(workload, bots, ticks, max_seconds, seed):
+    """Tick times, RSS and GC pauses for one size; runs in its own process so RSS starts clean."""
+    import psutil
+    preload(workload)
+    process = psutil.Process()
+    baseline = process.memory_info().rss
+    start = time.perf_counter()
+    step = build(workload, bots, seed)
+    build_s = time.perf_counter() - start
+    with GCPauses() as pauses:
+        times = _run(step, ticks, max_seconds)
+    times.sort()
+    gc_times = [pause for _, pause in pauses.pauses]
+    rss = process.memory_info().rss
+    return {
+        "workload": workload,
+        "bots": bots,
+        "ticks": len(times),
+        "ticks_requested": ticks,
+        "build_s": build_s,
+        "tick_mean_ms": sum(times) / len(times) * 1e3,
+        "tick_p50_ms": times[len(times) // 2] * 1e3,
+        "tick_p99_ms": times[min(len(times) - 1, int(len(times) * 0.99))] * 1e3,
+        "us_per_bot": sum(times) / len(times) / bots * 1e6,
+        "rss_mb": rss / 2**20,
+        "rss_growth_mb": (rss - baseline) / 2**20,
+        "gc_collections": len(gc_times),
+        "gc_total_ms": sum(gc_times) * 1e3,
+        "gc_max_ms": max(gc_times, default=0) * 1e3,
+    }
+
+
+def top_allocators(workload, bots, ticks, max_seconds, seed, top=3):
+    """Source lines holding the most live memory after building and running under ``tracemalloc``."""
+    preload(workload)
+    tracemalloc.start()
+    step = build(workload, bots, seed)
+    _run(step, ticks, max_seconds)
+    snapshot = tracemalloc.take_snapshot().filter_traces([
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+    ])
+    tracemalloc.stop()
+    return [(f"{os.path.basename(stat.traceback[0].filename)}:{stat.traceback[0].lineno}", stat.size)
+            for stat in snapshot.statistics("lineno")[:top]]
+
+
+def in_subprocess(fn, *args):
+    """Run ``fn`` in a fresh interpreter, so each size gets its own heap and RSS."""
+    with ProcessPoolExecutor(1, mp_context=multiprocessing.get_context("spawn")) as pool:
+        return pool.submit(fn, *args).result()
+
+
+def flag_superlinear(rows):
+    """Fill in the growth exponent of tick time from the previous size of the same workload."""
+    previous = None
+    for row in rows:
+        row["exponent"] = None
+        if previous is not None and previous["workload"] == row["workload"] and previous["tick_mean_ms"] > 0:
+            row["exponent"] = (math.log(row["tick_mean_ms"] / previous["tick_mean_ms"])
+                               / math.log(row["bots"] / previous["bots"]))
+        previous = row
+
+
+def print_table(rows):
+    print(f"{'workload':<9} {'bots':>7} {'ticks':>9} {'mean ms':>9} {'p99 ms':>9} {'us/bot':>8} {'exp':>5} "
+          f"{'RSS MB':>7} {'+MB':>6} {'GCs':>5} {'GC ms':>7} {'GC max':>7}  top allocator")
+    for row in rows:
+        exponent = "" if row["exponent"] is None else f"{row['exponent']:.2f}"
+        mark = "*" if row["exponent"] is not None and row["exponent"] > SUPERLINEAR else " "
+        allocator = row["top_allocators"][0] if row["top_allocators"] else ("", 0)
+        ticks = f"{row['ticks']}/{row['ticks_requested']}"
+        print(f"{row['workload']:<9} {row['bots']:>7} {ticks:>9} {row['tick_mean_ms']:>9.3f} "
+              f"{row['tick_p99_ms']:>9.3f} {row['us_per_bot']:>8.2f} {exponent:>5}{mark}"
+              f"{row['rss_mb']:>7.1f} {row['rss_growth_mb']:>6.1f} {row['gc_collections']:>5} "
+              f"{row['gc_total_ms']:>7.1f} {row['gc_max_ms']:>7.2f}  {allocator[0]} ({allocator[1] / 2**20:.1f} MB)")
+    print(f"* tick time grew faster than bots^{SUPERLINEAR} from the previous size")
+    if any(row["ticks"] < row["ticks_requested"] for row in rows):
+        print("Sizes that ran fewer ticks than requested hit --max-seconds; their times cover only the start of the run")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scale the stress and economy workloads by bot count: "
+                                                 "tick time, RSS, GC pauses and top allocators")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(SIZES))
+    parser.add_argument("--workloads", nargs="+", choices=WORKLOADS, default=list(WORKLOADS))
+    parser.add_argument("--ticks", type=int, default=300, help="stress-test frames per size (at 60 FPS)")
+    parser.add_argument("--rounds", type=int, default=5, help="economy rounds per size")
+    parser.add_argument("--max-seconds", type=float, default=30, help="stop timing a size after this long")
+    parser.add_argument("--traced-ticks", type=int, default=10, help="ticks run under tracemalloc")
+    parser.add_argument("--no-trace", action="store_true", help="skip the tracemalloc pass")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--csv", help="write one row per (workload, bots) here")
+    args = parser.parse_args()
+
+    rows = []
+    for workload in args.workloads:
+        ticks = args.ticks if workload == "stress" else args.rounds
+        for bots in sorted(args.sizes):
+            row = in_subprocess(measure, workload, bots, ticks, args.max_seconds, args.seed)
+            row["top_allocators"] = [] if args.no_trace else in_subprocess(
+                top_allocators, workload, bots, min(ticks, args.traced_ticks), args.max_seconds, args.seed)
+            rows.append(row)
+            print(f"{workload} x {bots}: {row['ticks']} ticks, {row['tick_mean_ms']:.2f} ms/tick", flush=True)
+    flag_superlinear(rows)
+    print()
+    print_table(rows)
+
+    if args.csv:
+        with open(args.csv, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(FIELDS)
+            for row in rows:
+                allocators = "; ".join(f"{where} {size}" for where, size in row["top_allocators"])
+                writer.writerow([allocators if name == "top_allocators" else row[name] for name in FIELDS])
+
+
+if __name__ == "__main__":
+    main()
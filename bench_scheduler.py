@@ -0,0 +1,45 @@
+import argparse
+import time
+
+from sampling import SeededEntropy
+from stress_testing import Bot, BotScheduler, fleet_checksum, update_bots
+
+
+def fleet(n, seed):
+    rng = SeededEntropy(seed)
+    bots = [Bot(i, None, rng=rng) for i in range(n)]
+    for bot in bots:
+        bot.all_bots = bots
+    return bots
+
+
+def frame_cost(step, frames, dt):
+    start = time.perf_counter()
+    for _ in range(frames):
+        step(dt)
+    return (time.perf_counter() - start) / frames
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-frame bot update cost: full sweep vs deadline scheduler")
+    parser.add_argument("--bots", type=int, nargs="+", default=[1000, 5000, 20_000])
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    dt = 1 / 60
+    print(f"{'bots':>8} {'sweep ms':>9} {'sched ms':>9} {'speedup':>8} {'holding':>8}  same games")
+    for n in args.bots:
+        swept = fleet(n, args.seed)
+        sweep = frame_cost(lambda dt: update_bots(swept, dt), args.frames, dt)
+        scheduled = fleet(n, args.seed)
+        scheduler = BotScheduler(scheduled)
+        sched = frame_cost(scheduler.step, args.frames, dt)
+        scheduler.settle_idle()
+        same = fleet_checksum(swept) == fleet_checksum(scheduled)
+        print(f"{n:>8} {sweep * 1e3:>9.2f} {sched * 1e3:>9.2f} {sweep / sched:>7.1f}x "
+              f"{len(scheduler.holding):>8}  {'yes' if same else 'NO'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from sigmaindex import DEFAULT_CELL, SigmaIndex
+
+
+def mint_sigmas(n, seed):
+    """Sigma triples the way tokens get them: eigenvalues of a random 3x3, rounded to 0.01."""
+    rng = np.random.default_rng(seed)
+    sigmas = np.linalg.eigvals(rng.random((n, 3, 3))).round(2)
+    return sigmas.real.copy()
+
+
+def latencies(fn, queries):
+    times = []
+    for query in queries:
+        start = time.perf_counter()
+        fn(query)
+        times.append(time.perf_counter() - start)
+    times = np.array(times) * 1e6
+    return np.percentile(times, 50), np.percentile(times, 99)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sigma index insert and query latency against a brute-force scan")
+    parser.add_argument("--tokens", type=int, default=1_000_000)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("-k", type=int, default=8)
+    parser.add_argument("--radius", type=float, default=0.05)
+    parser.add_argument("--cell", type=float, default=DEFAULT_CELL)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    points = mint_sigmas(args.tokens, args.seed)
+    index = SigmaIndex(args.cell)
+    start = time.perf_counter()
+    for token_id, sigmas in enumerate(points.tolist(), 1):
+        index.add(token_id, sigmas)
+    insert = time.perf_counter() - start
+    print(f"{args.tokens} tokens inserted one at a time: {insert:.2f}s ({insert / args.tokens * 1e6:.1f} us/token)")
+
+    rng = np.random.default_rng(args.seed + 1)
+    # Half the queries are fresh mints, half land anywhere in the occupied box
+    queries = np.vstack([mint_sigmas(args.queries // 2, args.seed + 2),
+                         rng.uniform(points.min(axis=0), points.max(axis=0), (args.queries - args.queries // 2, 3))])
+
+    for query in queries[:50]:
+        exact = np.sort(np.sqrt(((points - query) ** 2).sum(axis=1)))
+        _, dist = index.knn(query, args.k)
+        assert np.allclose(dist, exact[:args.k]), "k-NN disagrees with brute force"
+        ids, _ = index.radius(query, args.radius)
+        assert len(ids) == int((exact <= args.radius).sum()), "radius query disagrees with brute force"
+
+    brute = lambda q: np.argpartition(((points - q) ** 2).sum(axis=1), args.k)[:args.k]
+    print(f"{'query':<22} {'p50 us':>9} {'p99 us':>9}")
+    for name, fn in [(f"k-NN k={args.k}", lambda q: index.knn(q, args.k)),
+                     (f"radius {args.radius}", lambda q: index.radius(q, args.radius)),
+                     ("rarity", lambda q: index.rarity(q, args.k)),
+                     ("brute-force k-NN", brute)]:
+        p50, p99 = latencies(fn, queries if fn is not brute else queries[:100])
+        print(f"{name:<22} {p50:>9.1f} {p99:>9.1f}")
+
+    with tempfile.TemporaryDirectory() as workdir:
+        path = os.path.join(workdir, "simulation.db.sigma.npz")
+        start = time.perf_counter()
+        index.save(path)
+        saved = time.perf_counter() - start
+        start = time.perf_counter()
+        SigmaIndex.open(path)
+        print(f"save {saved * 1e3:.0f} ms, open {(time.perf_counter() - start) * 1e3:.0f} ms, "
+              f"{os.path.getsize(path) / 2**20:.1f} MiB on disk")
+
+
+if __name__ == "__main__":
+    main()
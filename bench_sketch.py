@@ -0,0 +1,95 @@
+import argparse
+import time
+
+import numpy as np
+
+from Botsimulation import Simulation
+from history import QUANTILES, SIGMAS
+from metrics import MetricsEmitter
+from sketch import KLLSketch
+
+CHECK_QUANTILES = np.linspace(0.01, 0.99, 99)
+
+
+def rank_error(sketch, exact):
+    """Worst gap between each requested quantile and the true rank of the sketch's answer."""
+    ordered = np.sort(np.asarray(exact, dtype=np.float64))
+    values = sketch.quantiles(CHECK_QUANTILES)
+    lo = np.searchsorted(ordered, values, side="left") / len(ordered)
+    hi = np.searchsorted(ordered, values, side="right") / len(ordered)
+    # With ties any rank in [lo, hi] is correct
+    return float(np.max(np.maximum(0, np.maximum(lo - CHECK_QUANTILES, CHECK_QUANTILES - hi))))
+
+
+def exact_gini(values):
+    ordered = np.sort(np.asarray(values, dtype=np.float64))
+    n = len(ordered)
+    return float((2 * np.arange(1, n + 1) - n - 1).dot(ordered) / (n * ordered.sum())) if ordered.sum() else 0.0
+
+
+def check_streams(n, k, shards, seed):
+    rng = np.random.default_rng(seed)
+    streams = {
+        "uniform": rng.uniform(0, 100, n),
+        "normal": rng.normal(50, 10, n),
+        "lognormal": rng.lognormal(3, 1, n),
+        "integers": rng.integers(0, 6, n).astype(np.float64),
+    }
+    print(f"Synthetic streams, n={n}, k={k}")
+    print(f"{'stream':<10} {'single':>8} {'merged':>8} {'retained':>9} {'update/s':>10}")
+    for name, data in streams.items():
+        sketch = KLLSketch(k, seed=seed)
+        start = time.perf_counter()
+        for value in data.tolist():
+            sketch.update(value)
+        rate = n / (time.perf_counter() - start)
+        merged = KLLSketch(k, seed=seed)
+        for part in np.array_split(data, shards):
+            shard = KLLSketch(k)
+            shard.update_many(part)
+            merged.merge(KLLSketch.from_dict(shard.to_dict()))  # As if shipped from another process
+        print(f"{name:<10} {rank_error(sketch, data):>8.4f} {rank_error(merged, data):>8.4f} "
+              f"{len(sketch):>9} {rate:>10.0f}")
+
+
+def check_simulation(bots, rounds):
+    sim = Simulation(db_path=":memory:", metrics=MetricsEmitter())
+    sim.create_bots(bots)
+    for round_num in range(1, rounds + 1):
+        for bot in sim.bots:
+            sim.bot_action(bot)
+        sim.round_num = round_num
+        sim.close_round()
+    total = sim.history.total()
+    last = sim.history.series()[-1]  # Merged buckets keep their latest round's holdings
+    held = [len(bot["tokens"]) for bot in sim.bots]
+    print(f"\nSimulation, {bots} bots x {rounds} rounds, {len(sim.tokens)} tokens, "
+          f"{len(sim.history.buckets)} buckets of {sim.history.span} round(s)")
+    print(f"{'distribution':<14} {'rank err':>8}   p50 sketch/exact")
+    checks = [("energy", total.energy, [t["energy_level"] for t in sim.tokens])]
+    checks += [(name, total.sigmas[name], [complex(t["metadata"][name]).real for t in sim.tokens]) for name in SIGMAS]
+    checks.append(("holdings", last.holdings, held))
+    for name, sketch, exact in checks:
+        print(f"{name:<14} {rank_error(sketch, exact):>8.4f}   {sketch.quantile(0.5):.2f}/{np.median(exact):.2f}")
+    print(f"holdings Gini  sketch {last.holdings.gini():.4f} / exact {exact_gini(held):.4f}")
+    minted = sum(s.minted for s in sim.history.series())
+    print(f"minted across buckets {minted} / exact {len(sim.tokens)}")
+    sim.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Accuracy of the KLL sketches against exact quantiles")
+    parser.add_argument("--n", type=int, default=200_000)
+    parser.add_argument("-k", type=int, default=200)
+    parser.add_argument("--shards", type=int, default=16)
+    parser.add_argument("--bots", type=int, default=300)
+    parser.add_argument("--rounds", type=int, default=150)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    print(f"Quantiles reported per round: {', '.join(f'p{q * 100:g}' for q in QUANTILES)}")
+    check_streams(args.n, args.k, args.shards, args.seed)
+    check_simulation(args.bots, args.rounds)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+import argparse
+import json
+import os
+import sqlite3
+import tempfile
+import time
+
+import numpy as np
+
+import tokendb
+
+# The JSON-metadata schemas and write paths tokendb replaced
+LEGACY_SCHEMAS = {
+    tokendb.SIMULATION: '''
+        CREATE TABLE tokens (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            owner TEXT,
+            energy_level REAL,
+            rare INTEGER,
+            metadata TEXT
+        )
+    ''',
+    tokendb.GASLITE: '''
+        CREATE TABLE tokens (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            sigma_x REAL,
+            sigma_y REAL,
+            sigma_z REAL,
+            rare INTEGER,
+            level INTEGER,
+            metadata TEXT
+        )
+    ''',
+}
+
+
+def legacy_encoder(obj):
+    if isinstance(obj, complex):
+        return str(obj)
+    raise TypeError(f"Object of type {obj.__class__.__name__} is not JSON serializable")
+
+
+def make_tokens(n, seed):
+    """Sigma triples as the simulation mints them: complex eigenvalues rounded to 0.01."""
+    rng = np.random.default_rng(seed)
+    sigmas = np.linalg.eigvals(rng.random((n, 3, 3))).round(2)
+    energy = rng.integers(10, 100, n)
+    rare = rng.random(n) < 0.1
+    return [(f"bot_{i % 1000}", int(e), bool(r), tuple(s)) for i, (e, r, s) in enumerate(zip(energy, rare, sigmas.tolist()))]
+
+
+def legacy_rows(kind, tokens):
+    for owner, energy, rare, sigmas in tokens:
+        if kind == tokendb.SIMULATION:
+            metadata = dict(zip(tokendb.SIGMAS, sigmas))
+            yield owner, energy, int(rare), json.dumps(metadata, default=legacy_encoder)
+        else:
+            real = [s.real for s in sigmas]
+            metadata = {**dict(zip(tokendb.SIGMAS, real)), "rare": rare, "level": 1}
+            yield (*real, int(rare), 1, json.dumps(metadata))
+
+
+def packed_rows(kind, tokens):
+    for owner, energy, rare, sigmas in tokens:
+        if kind == tokendb.SIMULATION:
+            yield (owner, energy, int(rare), *tokendb.split_sigmas(sigmas))
+        else:
+            yield (*(s.real for s in sigmas), int(rare), 1)
+
+
+LEGACY_INSERT = {
+    tokendb.SIMULATION: "INSERT INTO tokens (owner, energy_level, rare, metadata) VALUES (?, ?, ?, ?)",
+    tokendb.GASLITE: "INSERT INTO tokens (sigma_x, sigma_y, sigma_z, rare, level, metadata) VALUES (?, ?, ?, ?, ?, ?)",
+}
+
+
+def load_legacy(conn, kind):
+    if kind == tokendb.SIMULATION:
+        return [(owner, energy, rare, tuple(complex(v) for v in json.loads(metadata).values()))
+                for owner, energy, rare, metadata in conn.execute(
+                    "SELECT owner, energy_level, rare, metadata FROM tokens")]
+    return [json.loads(metadata) for (metadata,) in conn.execute("SELECT metadata FROM tokens")]
+
+
+def load_packed(conn, kind):
+    if kind == tokendb.SIMULATION:
+        return [(owner, energy, rare, tokendb.join_sigmas(parts))
+                for owner, energy, rare, *parts in conn.execute(
+                    f"SELECT owner, energy_level, rare, {tokendb.SIGMA_COLUMNS[kind]} FROM tokens")]
+    return [{"sigma_x": sx, "sigma_y": sy, "sigma_z": sz, "rare": bool(rare), "level": level}
+            for sx, sy, sz, rare, level in conn.execute("SELECT sigma_x, sigma_y, sigma_z, rare, level FROM tokens")]
+
+
+def measure(path, kind, tokens, legacy, row_commits):
+    conn = sqlite3.connect(path)
+    if legacy:
+        conn.execute(LEGACY_SCHEMAS[kind])
+    else:
+        conn.execute(tokendb.SCHEMAS[kind].format(table="tokens"))
+    insert = LEGACY_INSERT[kind] if legacy else tokendb.INSERT[kind]
+    rows = legacy_rows if legacy else packed_rows
+
+    start = time.perf_counter()
+    with conn:
+        conn.executemany(insert, rows(kind, tokens))
+    bulk = len(tokens) / (time.perf_counter() - start)
+    # What the games do: one INSERT and commit per mint
+    start = time.perf_counter()
+    for row in rows(kind, tokens[:row_commits]):
+        conn.execute(insert, row)
+        conn.commit()
+    single = row_commits / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    loaded = (load_legacy if legacy else load_packed)(conn, kind)
+    load = len(loaded) / (time.perf_counter() - start)
+    conn.close()
+    return bulk, single, load, os.path.getsize(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Token DB size and throughput: JSON metadata vs typed sigma columns")
+    parser.add_argument("--tokens", type=int, default=200_000)
+    parser.add_argument("--row-commits", type=int, default=2000, help="tokens inserted with a commit each")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    tokens = make_tokens(args.tokens, args.seed)
+    print(f"{args.tokens} tokens (+{args.row_commits} committed one at a time)")
+    print(f"{'kind':<11} {'format':<7} {'bulk ins/s':>11} {'commit ins/s':>13} {'load/s':>10} {'size MiB':>9} {'B/token':>8}")
+    with tempfile.TemporaryDirectory() as workdir:
+        for kind in (tokendb.SIMULATION, tokendb.GASLITE):
+            for legacy in (True, False):
+                path = os.path.join(workdir, f"{kind}_{'json' if legacy else 'packed'}.db")
+                bulk, single, load, size = measure(path, kind, tokens, legacy, args.row_commits)
+                print(f"{kind:<11} {'json' if legacy else 'packed':<7} {bulk:>11.0f} {single:>13.0f} {load:>10.0f} "
+                      f"{size / 2**20:>9.1f} {size / (args.tokens + args.row_commits):>8.1f}")
+            path = os.path.join(workdir, f"{kind}_json.db")
+            conn = sqlite3.connect(path)
+            start = time.perf_counter()
+            moved = tokendb.migrate(conn, kind)
+            elapsed = time.perf_counter() - start
+            conn.close()
+            print(f"{kind:<11} migrated {moved} rows in {elapsed:.2f}s ({moved / elapsed:.0f} rows/s), "
+                  f"now {os.path.getsize(path) / 2**20:.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
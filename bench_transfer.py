@@ -0,0 +1,98 @@
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from Botsimulation import Simulation
+from metrics import MetricsEmitter
+from tokenstore import MemmapTokenStore
+import tokendb
+
+
+def populate(sim, tokens_per_bot, rng):
+    """Give every bot tokens with real row ids, skipping the per-mint eigenvalue work."""
+    rows, holders = [], []
+    for bot in sim.bots:
+        for _ in range(tokens_per_bot):
+            rows.append((bot["id"], rng.randrange(10, 100), 0, *tokendb.split_sigmas((rng.random(),) * 3)))
+            holders.append(bot)
+    first = sim.conn.execute("SELECT COALESCE(MAX(id), 0) FROM tokens").fetchone()[0] + 1
+    with sim.conn:
+        sim.conn.executemany(tokendb.INSERT[tokendb.SIMULATION], rows)
+    for token_id, (row, bot) in enumerate(zip(rows, holders), first):
+        owner, energy, rare = row[:3]
+        token = {"id": token_id, "owner": owner, "energy_level": energy, "rare": False, "metadata": {}}
+        if sim.token_store is not None:
+            token["index"] = sim.token_store.append(owner, energy, rare, (0, 0, 0), token_id)
+        else:
+            sim.tokens.append(token)
+        bot["tokens"].append(token)
+
+
+def random_moves(sim, count, rng):
+    """``count`` moves of 1-3 tokens between random bots, each taken from the front of the giver's holdings."""
+    moves = []
+    taken = {}
+    for _ in range(count):
+        giver, taker = rng.sample(sim.bots, 2)
+        if sim.token_store is not None:
+            held = taken.setdefault(giver["id"], list(sim.token_store.indices(giver["id"])))
+            tokens = [sim.token_store.get(i) for i in held[:rng.randint(1, 3)]]
+        else:
+            held = taken.setdefault(giver["id"], list(giver["tokens"]))
+            tokens = held[:rng.randint(1, 3)]
+        del held[:len(tokens)]
+        if tokens:
+            moves.append((tokens, giver, taker))
+    return moves
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk token transfers and owner lookups in Botsimulation")
+    parser.add_argument("--bots", type=int, default=10_000)
+    parser.add_argument("--tokens-per-bot", type=int, default=20)
+    parser.add_argument("--transfers", type=int, default=5000, help="moves per round")
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--store", action="store_true", help="keep tokens in a MemmapTokenStore")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    with tempfile.TemporaryDirectory() as workdir:
+        store = MemmapTokenStore(os.path.join(workdir, "tokens.bin")) if args.store else None
+        sim = Simulation(token_store=store, db_path=os.path.join(workdir, "simulation.db"), metrics=MetricsEmitter())
+        sim.create_bots(args.bots)
+        populate(sim, args.tokens_per_bot, rng)
+        print(f"{args.bots} bots x {args.tokens_per_bot} tokens ({'memmap store' if args.store else 'in memory'})")
+
+        elapsed = moved = 0
+        for _ in range(args.rounds):
+            moves = random_moves(sim, args.transfers, rng)
+            start = time.perf_counter()
+            moved += sim.transfer_many(moves)
+            elapsed += time.perf_counter() - start
+        print(f"transfer_many: {args.rounds} rounds x {args.transfers} moves, {moved} tokens "
+              f"in {elapsed:.2f}s ({moved / elapsed:.0f} tokens/s, {elapsed / args.rounds * 1e3:.0f} ms/round)")
+
+        moves = random_moves(sim, min(args.transfers, 500), rng)
+        start = time.perf_counter()
+        single = sum(sim.transfer(*move) for move in moves)
+        elapsed = time.perf_counter() - start
+        print(f"transfer, one commit per move: {single} tokens in {elapsed:.2f}s ({single / elapsed:.0f} tokens/s)")
+
+        bot_ids = [bot["id"] for bot in rng.sample(sim.bots, min(1000, args.bots))]
+        for name, lookup in [("holdings (owner index)", lambda b: len(sim.holdings(b))),
+                             ("SQLite, owner index", sim.db_holdings),
+                             ("SQLite, full scan", lambda b: sim.conn.execute(
+                                 "SELECT id FROM tokens NOT INDEXED WHERE owner = ?", (b,)).fetchall())]:
+            ids = bot_ids if "scan" not in name else bot_ids[:20]
+            start = time.perf_counter()
+            for bot_id in ids:
+                lookup(bot_id)
+            print(f"{name:<24} {(time.perf_counter() - start) / len(ids) * 1e6:>10.1f} us/lookup")
+        sim.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+import time
+
+STEP = 0.05  # Seconds of holding per charge increment, the games' original Clock tick
+RENDER_INTERVAL = 0.1  # Redraw cadence while holding; charge no longer depends on it
+
+
+class ChargeClock:
+    """Press and release times on the monotonic clock, turned into charge steps on demand.
+
+    The games used to add one random increment per 50 ms Clock tick, so a
+    late or dropped tick cost the player charge and a hold needed 20
+    wakeups a second. Here a hold of ``t`` seconds is worth ``t // step``
+    increments whenever it is sampled: ``settle`` applies the ones not yet
+    applied in one batch, on release and when the display draws.
+    """
+    def __init__(self, step=STEP, clock=time.monotonic):
+        self.step = step
+        self.clock = clock
+        self.started = None
+        self.stopped = None
+        self.steps = 0  # Increments applied so far
+
+    @property
+    def holding(self):
+        return self.started is not None and self.stopped is None
+
+    def start(self, now=None):
+        self.started = self.clock() if now is None else now
+        self.stopped = None
+        self.steps = 0
+
+    def stop(self, now=None):
+        """Record the release; a hold that already ended (e.g. by overheating) keeps its end time."""
+        if self.holding:
+            self.stopped = self.clock() if now is None else now
+
+    def held(self, now=None):
+        """Seconds held so far, or in total once released."""
+        if self.started is None:
+            return 0.0
+        end = self.stopped if self.stopped is not None else (self.clock() if now is None else now)
+        return end - self.started
+
+    def settle(self, charge_up, now=None):
+        """Call ``charge_up(step)`` once per increment owed; returns True if one ended the hold.
+
+        A truthy return from ``charge_up`` (e.g. overheating) ends the hold
+        at that increment, so later sampling owes nothing more.
+        """
+        owed = int(self.held(now) / self.step + 1e-9)  # 0.15 / 0.05 is 2.9999999999999996
+        while self.steps < owed:
+            self.steps += 1
+            if charge_up(self.step):
+                self.stopped = self.started + self.steps * self.step
+                return True
+        return False
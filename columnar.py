@@ -0,0 +1,237 @@
+import argparse
+import json
+import os
+import sqlite3
+import urllib.request
+
+import numpy as np
+
+import tokendb
+
+SIGMAS = ("sigma_x", "sigma_y", "sigma_z")
+COLUMNS = {
+    "id": np.int64,
+    "owner": np.int32,          # Code into owner_names.json, -1 when the source has no owner
+    "energy_level": np.float64,  # NaN when the source has no energy
+    "rare": np.uint8,
+    "level": np.int16,
+    **{name: np.float64 for name in SIGMAS},
+    **{f"{name}_imag": np.float64 for name in SIGMAS},
+}
+MANIFEST = "manifest.json"
+OWNER_NAMES = "owner_names.json"
+ARROW_FILE = "tokens.arrow"
+BATCH_ROWS = 100_000
+
+
+def _pyarrow():
+    """Import pyarrow on demand: it is optional and slow to load."""
+    try:
+        import pyarrow as pa
+        import pyarrow.ipc
+    except ImportError:
+        raise RuntimeError("pyarrow is not installed; use the npy format") from None
+    return pa
+
+
+def _read_batches(conn, kind, owner_codes):
+    if kind == tokendb.SIMULATION:
+        cursor = conn.execute(f"SELECT id, owner, energy_level, rare, {tokendb.SIGMA_COLUMNS[kind]} "
+                              "FROM tokens ORDER BY id")
+    else:
+        cursor = conn.execute("SELECT id, sigma_x, sigma_y, sigma_z, rare, level FROM tokens ORDER BY id")
+    while True:
+        rows = cursor.fetchmany(BATCH_ROWS)
+        if not rows:
+            return
+        batch = {name: np.empty(len(rows), dtype) for name, dtype in COLUMNS.items()}
+        for i, row in enumerate(rows):
+            batch["id"][i] = row[0]
+            if kind == tokendb.SIMULATION:
+                batch["owner"][i] = owner_codes.setdefault(row[1], len(owner_codes))
+                batch["energy_level"][i] = row[2]
+                batch["rare"][i] = row[3]
+                batch["level"][i] = 0
+                sigmas = zip(row[4::2], row[5::2])
+            else:
+                batch["owner"][i] = -1
+                batch["energy_level"][i] = np.nan
+                batch["rare"][i] = row[4]
+                batch["level"][i] = row[5] or 0
+                sigmas = ((value, 0.0) for value in row[1:4])
+            for name, (real, imag) in zip(SIGMAS, sigmas):
+                batch[name][i] = real
+                batch[f"{name}_imag"][i] = imag
+        yield batch
+
+
+def export_tokens(db_path, out_dir, fmt="npy"):
+    """Stream the tokens table of ``db_path`` into per-column files under ``out_dir``.
+
+    ``fmt`` is ``"npy"`` (one memory-mappable ``.npy`` per column) or
+    ``"arrow"`` (an uncompressed Arrow IPC file, needs pyarrow). Rows are
+    read once here so readers never touch SQLite again. Returns the row count.
+    The database is opened read-only; one that still stores JSON metadata
+    raises ``ValueError`` rather than being migrated in place.
+    """
+    pa = _pyarrow() if fmt == "arrow" else None
+    conn = sqlite3.connect(f"file:{urllib.request.pathname2url(os.path.abspath(db_path))}?mode=ro", uri=True)
+    try:
+        kind = tokendb.kind_of(conn)
+        if "metadata" in tokendb.columns(conn):
+            raise ValueError(f"{db_path} still stores JSON metadata; run gaslite-migrate on it first")
+        os.makedirs(out_dir, exist_ok=True)
+        total = conn.execute("SELECT COUNT(*) FROM tokens").fetchone()[0]
+        owner_codes = {}
+        offset = 0
+        if fmt == "npy":
+            files = {name: np.lib.format.open_memmap(os.path.join(out_dir, f"{name}.npy"), mode="w+",
+                                                     dtype=dtype, shape=(total,))
+                     for name, dtype in COLUMNS.items()}
+            for batch in _read_batches(conn, kind, owner_codes):
+                end = offset + len(batch["id"])
+                for name, values in batch.items():
+                    files[name][offset:end] = values
+                offset = end
+            for column in files.values():
+                column.flush()
+            del files
+        else:
+            schema = pa.schema([(name, pa.from_numpy_dtype(dtype)) for name, dtype in COLUMNS.items()])
+            with pa.OSFile(os.path.join(out_dir, ARROW_FILE), "wb") as sink:
+                with pa.ipc.new_file(sink, schema) as writer:
+                    for batch in _read_batches(conn, kind, owner_codes):
+                        writer.write_batch(pa.record_batch(list(batch.values()), schema=schema))
+                        offset += len(batch["id"])
+    finally:
+        conn.close()
+
+    with open(os.path.join(out_dir, OWNER_NAMES), "w") as f:
+        json.dump(sorted(owner_codes, key=owner_codes.get), f)
+    with open(os.path.join(out_dir, MANIFEST), "w") as f:
+        json.dump({"rows": offset, "format": fmt, "source": os.path.abspath(db_path), "kind": kind,
+                   "columns": {name: np.dtype(dtype).str for name, dtype in COLUMNS.items()}}, f, indent=2)
+    return offset
+
+
+class TokenColumns:
+    """Read-only, memory-mapped view of an exported token history.
+
+    Columns come back as ``np.memmap`` (npy) or zero-copy Arrow buffers, so
+    only the pages a scan touches are resident.
+    """
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, MANIFEST)) as f:
+            self.manifest = json.load(f)
+        with open(os.path.join(path, OWNER_NAMES)) as f:
+            self.owner_names = json.load(f)
+        self.rows = self.manifest["rows"]
+        self.format = self.manifest["format"]
+        self._columns = {}
+        self._arrow = None
+        if self.format == "arrow":
+            pa = _pyarrow()
+            self._arrow = pa.ipc.open_file(pa.memory_map(os.path.join(path, ARROW_FILE), "r"))
+
+    @property
+    def names(self):
+        return list(self.manifest["columns"])
+
+    def column(self, name):
+        """Whole column as an array; zero-copy for npy, copies multi-batch Arrow files."""
+        if name not in self._columns:
+            if self._arrow is None:
+                self._columns[name] = np.load(os.path.join(self.path, f"{name}.npy"), mmap_mode="r")
+            else:
+                self._columns[name] = self._arrow.read_all().column(name).to_numpy()
+        return self._columns[name]
+
+    def __getitem__(self, name):
+        return self.column(name)
+
+    def iter_chunks(self, name, chunk_rows=1 << 20):
+        """Yield a column in zero-copy slices for out-of-core scans."""
+        if self._arrow is None:
+            values = self.column(name)
+            for start in range(0, self.rows, chunk_rows):
+                yield values[start:start + chunk_rows]
+        else:
+            for i in range(self._arrow.num_record_batches):
+                yield self._arrow.get_batch(i).column(name).to_numpy(zero_copy_only=True)
+
+
+def summarize(columns, bins=20, chunk_rows=1 << 20):
+    """Distribution summary computed chunk by chunk (never the whole column in RAM)."""
+    summary = {"rows": columns.rows, "rare": 0}
+    for chunk in columns.iter_chunks("rare", chunk_rows):
+        summary["rare"] += int(chunk.sum(dtype=np.int64))
+
+    for name in ("energy_level",) + SIGMAS:
+        lo, hi, total, count = np.inf, -np.inf, 0.0, 0
+        for chunk in columns.iter_chunks(name, chunk_rows):
+            chunk = chunk[~np.isnan(chunk)]
+            if chunk.size:
+                lo, hi = min(lo, chunk.min()), max(hi, chunk.max())
+                total += float(chunk.sum())
+                count += chunk.size
+        if not count:
+            continue
+        edges = np.linspace(lo, hi if hi > lo else lo + 1, bins + 1)
+        counts = np.zeros(bins, dtype=np.int64)
+        for chunk in columns.iter_chunks(name, chunk_rows):
+            counts += np.histogram(chunk[~np.isnan(chunk)], bins=edges)[0]
+        summary[name] = {"min": float(lo), "max": float(hi), "mean": total / count,
+                         "edges": edges.tolist(), "counts": counts.tolist()}
+
+    if columns.owner_names:
+        holdings = np.zeros(len(columns.owner_names), dtype=np.int64)
+        for chunk in columns.iter_chunks("owner", chunk_rows):
+            owned = chunk[chunk >= 0]
+            holdings += np.bincount(owned, minlength=len(holdings))
+        ordered = np.sort(holdings)
+        n = len(ordered)
+        # Gini coefficient from the sorted per-owner counts
+        gini = (2 * np.arange(1, n + 1) - n - 1).dot(ordered) / (n * ordered.sum()) if ordered.sum() else 0.0
+        top = np.argsort(holdings)[::-1][:5]
+        # The DB never deletes burned tokens, so these are mints per owner
+        summary["owners"] = {"count": n, "gini": float(gini),
+                               "top": [(columns.owner_names[i], int(holdings[i])) for i in top]}
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Columnar export and analytics for token history")
+    sub = parser.add_subparsers(dest="command", required=True)
+    export = sub.add_parser("export", help="write simulation.db/tokens.db to column files")
+    export.add_argument("db")
+    export.add_argument("out_dir")
+    export.add_argument("--format", choices=("npy", "arrow"), default="npy")
+    stats = sub.add_parser("stats", help="summarize an export without loading it into RAM")
+    stats.add_argument("path")
+    stats.add_argument("--bins", type=int, default=20)
+    args = parser.parse_args()
+
+    if args.command == "export":
+        try:
+            rows = export_tokens(args.db, args.out_dir, args.format)
+        except ValueError as e:
+            parser.error(str(e))
+        print(f"Exported {rows} tokens to {args.out_dir} ({args.format})")
+    else:
+        summary = summarize(TokenColumns(args.path), bins=args.bins)
+        print(f"Tokens: {summary['rows']} | Rare: {summary['rare']} "
+              f"({summary['rare'] / max(summary['rows'], 1) * 100:.1f}%)")
+        for name in ("energy_level",) + SIGMAS:
+            if name in summary:
+                s = summary[name]
+                print(f"{name}: min {s['min']:.2f} | max {s['max']:.2f} | mean {s['mean']:.3f}")
+        if "owners" in summary:
+            h = summary["owners"]
+            print(f"Owners: {h['count']} | Mint Gini: {h['gini']:.3f}")
+            for owner, count in h["top"]:
+                print(f"  {owner}: {count} tokens")
+
+
+if __name__ == "__main__":
+    main()
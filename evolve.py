@@ -0,0 +1,243 @@
+import argparse
+import csv
+import json
+import os
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from sampling import chaos_distribution
+
+# One row per individual; bounds keep mutations inside values Bot accepts
+GENES = ("skill", "randomness", "charge_rate", "delay_min", "delay_max")
+LOWER = np.array([0.5, 0.0, 5.0, 0.1, 0.1])
+UPPER = np.array([2.0, 0.5, 100.0, 3.0, 3.0])
+BASELINE = np.array([1.0, 0.2, 15.0, 0.5, 2.0])  # What stress_testing.Bot starts with
+LEVEL_TARGETS = np.array([100, 250, 500, 750, 1000])
+
+Generation = namedtuple("Generation", "generation best mean seconds best_genome")
+
+
+def genome_dict(genome):
+    return {name: round(float(value), 4) for name, value in zip(GENES, genome)}
+
+
+def apply_genome(bot, genome):
+    """Give a ``stress_testing.Bot`` the strategy encoded by ``genome`` (array or dict)."""
+    if isinstance(genome, dict):
+        genome = [genome[name] for name in GENES]
+    skill, randomness, charge_rate, delay_min, delay_max = (float(v) for v in genome)
+    bot.skill_level = skill
+    bot.randomness = randomness
+    bot.charge_rate = charge_rate
+    bot.action_delay = (min(delay_min, delay_max), max(delay_min, delay_max))
+
+
+def evaluate(genomes, matches=8, seconds=60, fps=60, seed=None):
+    """Mean final score of each genome over ``matches`` headless games.
+
+    Every (genome, match) pair is one lane of a flat array and all lanes
+    advance frame by frame with the same rules as ``Bot.update``, so the
+    Python cost is per frame rather than per bot.
+    """
+    rng = np.random.default_rng(seed)
+    n = len(genomes) * matches
+    params = np.repeat(np.asarray(genomes, dtype=np.float64), matches, axis=0)
+    skill, randomness, charge_rate = params[:, 0], params[:, 1], params[:, 2]
+    delay_low = np.minimum(params[:, 3], params[:, 4])
+    delay_high = np.maximum(params[:, 3], params[:, 4])
+    counts = chaos_distribution()
+    chaos_values = np.array(list(counts), dtype=np.float64)
+    chaos_p = np.array([counts[v] for v in counts], dtype=np.float64)
+    chaos_p /= chaos_p.sum()
+    dt = 1.0 / fps
+
+    def estimate(mask):
+        noise = rng.uniform(-randomness[mask], randomness[mask]) / skill[mask]
+        base = target[mask] / charge_rate[mask] * 0.05 / chaos[mask]
+        hold_duration[mask] = np.maximum(0.1, base * (1 + noise))
+
+    target = rng.integers(300, 901, n).astype(np.float64)
+    power = np.zeros(n)
+    temperature = np.full(n, 30.0)
+    score = np.zeros(n, dtype=np.int64)
+    level = np.ones(n, dtype=np.int64)
+    holding = np.zeros(n, dtype=bool)
+    spike = np.zeros(n, dtype=bool)
+    hold_time = np.zeros(n)
+    action_timer = np.zeros(n)
+    chaos = rng.choice(chaos_values, n, p=chaos_p)
+    next_action = rng.uniform(0.5, 2.0, n)
+    hold_duration = rng.uniform(0.5, 2.0, n)
+
+    for _ in range(int(seconds * fps)):
+        action_timer += dt
+        charging = holding.copy()
+        idle = ~charging
+
+        # charge_up
+        c = np.flatnonzero(charging)
+        hold_time[c] += dt
+        power[c] = np.minimum(1000, power[c] + rng.integers(5, 31, len(c)))
+        temperature[c] += rng.integers(0, 29, len(c)) / 100 + 0.02
+        spiking = c[rng.integers(0, 100, len(c)) < 10]
+        doubled = rng.integers(0, 2, len(spiking)) == 0
+        power[spiking[doubled]] = np.minimum(1000, power[spiking[doubled]] * 2)
+        temperature[spiking[~doubled]] = np.minimum(100, temperature[spiking[~doubled]] * 2)
+        spike[spiking] = True
+
+        # stop_action
+        s = c[hold_time[c] >= hold_duration[c]]
+        if len(s):
+            diff = np.abs(target[s] - power[s])
+            boost = rng.integers(-10, 11, len(s))
+            gain = np.select(
+                [spike[s], temperature[s] > 50, diff < 50, diff < 100],
+                [0, -10 - boost, ((100 - diff) * chaos[s]).astype(np.int64) + boost,
+                 ((50 - diff // 2) * chaos[s]).astype(np.int64) + boost],
+                -5 - boost)
+            penalised = ~spike[s] & ((temperature[s] > 50) | (diff >= 100))
+            score[s] = np.where(penalised, np.maximum(0, score[s] + gain), score[s] + gain)
+            reached = score[s] >= LEVEL_TARGETS[np.minimum(level[s], 5) - 1]
+            won = reached & (level[s] == 5)
+            score[s[won]] = 1000
+            level[s[reached & ~won]] += 1
+            spike[s] = False
+            power[s] = 0
+            temperature[s] = np.maximum(30, temperature[s] - 5)
+            target[s] = rng.integers(300, 901, len(s))
+            holding[s] = False
+            action_timer[s] = 0
+            next_action[s] = rng.uniform(delay_low[s], delay_high[s])
+            stopped = np.zeros(n, dtype=bool)
+            stopped[s] = True
+            estimate(stopped)
+
+        # cool_down and start_action
+        temperature[idle] = np.maximum(30, temperature[idle] - 0.5)
+        starting = idle & (action_timer >= next_action)
+        if starting.any():
+            holding[starting] = True
+            hold_time[starting] = 0
+            chaos[starting] = rng.choice(chaos_values, int(starting.sum()), p=chaos_p)
+            action_timer[starting] = 0
+            estimate(starting)
+
+    return score.reshape(len(genomes), matches).mean(axis=1)
+
+
+class EvolutionEngine:
+    """Generational search over bot strategies.
+
+    Each generation the population is evaluated in chunks across a process
+    pool, the best ``elite`` genomes survive unchanged and the rest are
+    tournament-selected parents with Gaussian mutation.
+    """
+    def __init__(self, population=256, matches=8, seconds=60, elite=4, mutation=0.1,
+                 tournament=3, workers=None, seed=None):
+        self.population = population
+        self.matches = matches
+        self.seconds = seconds
+        self.elite = elite
+        self.mutation = mutation
+        self.tournament = tournament
+        self.workers = workers or os.cpu_count() or 1
+        self.seeds = np.random.SeedSequence(seed)
+        self.rng = np.random.default_rng(self.seeds.spawn(1)[0])
+        self.genomes = self.rng.uniform(LOWER, UPPER, (population, len(GENES)))
+        self.genomes[0] = BASELINE  # The hand-tuned bot competes from generation zero
+        self.fitness = None
+        self.history = []
+        self._pool = ProcessPoolExecutor(self.workers) if self.workers > 1 else None
+
+    def evaluate(self, genomes):
+        chunks = np.array_split(genomes, min(self.workers, len(genomes)))
+        seeds = self.seeds.spawn(len(chunks))
+        if self._pool is None:
+            results = [evaluate(chunk, self.matches, self.seconds, seed=s) for chunk, s in zip(chunks, seeds)]
+        else:
+            futures = [self._pool.submit(evaluate, chunk, self.matches, self.seconds, seed=s)
+                       for chunk, s in zip(chunks, seeds)]
+            results = [future.result() for future in futures]
+        return np.concatenate(results)
+
+    def _select(self, count):
+        contenders = self.rng.integers(0, self.population, (count, self.tournament))
+        winners = contenders[np.arange(count), self.fitness[contenders].argmax(axis=1)]
+        return self.genomes[winners]
+
+    def _breed(self):
+        order = np.argsort(self.fitness)[::-1]
+        elite = self.genomes[order[:self.elite]]
+        children = self._select(self.population - self.elite)
+        children += self.rng.normal(0, self.mutation, children.shape) * (UPPER - LOWER)
+        self.genomes = np.vstack([elite, np.clip(children, LOWER, UPPER)])
+
+    def step(self):
+        start = time.perf_counter()
+        if self.fitness is not None:
+            self._breed()
+        self.fitness = self.evaluate(self.genomes)
+        best = int(self.fitness.argmax())
+        record = Generation(len(self.history), float(self.fitness[best]), float(self.fitness.mean()),
+                            time.perf_counter() - start, self.genomes[best].copy())
+        self.history.append(record)
+        return record
+
+    def run(self, generations, callback=None):
+        for _ in range(generations):
+            record = self.step()
+            if callback is not None:
+                callback(record)
+        return self.history[-1]
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evolve stress-test bot strategies in vectorized headless matches")
+    parser.add_argument("--generations", type=int, default=20)
+    parser.add_argument("--population", type=int, default=256)
+    parser.add_argument("--matches", type=int, default=8, help="games per genome per generation")
+    parser.add_argument("--seconds", type=float, default=60, help="length of each game at 60 FPS")
+    parser.add_argument("--elite", type=int, default=4)
+    parser.add_argument("--mutation", type=float, default=0.1, help="mutation sigma as a fraction of each gene's range")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--csv", help="write the best/mean fitness curve here")
+    parser.add_argument("--save", help="write the best genome as JSON (stress_testing --genome reads it)")
+    args = parser.parse_args()
+
+    engine = EvolutionEngine(args.population, args.matches, args.seconds, args.elite, args.mutation,
+                             workers=args.workers, seed=args.seed)
+    print(f"{'gen':>4} {'best':>8} {'mean':>8} {'gen/s':>7}  best genome")
+    start = time.perf_counter()
+    try:
+        best = engine.run(args.generations, lambda g: print(
+            f"{g.generation:>4} {g.best:>8.1f} {g.mean:>8.1f} {1 / g.seconds:>7.2f}  {genome_dict(g.best_genome)}"))
+        baseline = engine.evaluate(np.tile(BASELINE, (args.population, 1))).mean()
+    finally:
+        engine.close()
+    elapsed = time.perf_counter() - start
+    print(f"\n{args.generations} generations of {args.population} x {args.matches} games in {elapsed:.1f}s "
+          f"({args.generations / elapsed:.2f} gen/s, "
+          f"{args.generations * args.population * args.matches * args.seconds / elapsed:.0f} simulated bot-seconds/s)")
+    print(f"Best fitness {best.best:.1f} vs baseline bot {baseline:.1f}: {genome_dict(best.best_genome)}")
+
+    if args.csv:
+        with open(args.csv, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["generation", "best", "mean", "seconds", *GENES])
+            for g in engine.history:
+                writer.writerow([g.generation, g.best, g.mean, g.seconds, *g.best_genome])
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(genome_dict(best.best_genome), f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
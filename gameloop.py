@@ -0,0 +1,108 @@
+from kivy.clock import Clock
+
+
+class _Timer:
+    def __init__(self, callback, interval, active):
+        self.callback = callback
+        self.interval = interval
+        self.active = active
+        self.elapsed = 0.0
+
+    @property
+    def is_display(self):
+        return self.active is None
+
+
+class GameLoop:
+    """One Clock event per app that drives every game timer.
+
+    Game timers run while their ``active()`` predicate holds and receive a
+    fixed ``dt`` equal to their interval, fired as many times as the
+    accumulated time allows (up to ``max_catchup`` per tick). Display timers
+    (no predicate) follow the game timers and get one final refresh when the
+    game goes idle. With nothing active the Clock event is cancelled, so an
+    idle app schedules no wakeups until ``wake()`` is called from input.
+    """
+    def __init__(self, max_catchup=4):
+        self.timers = []
+        self.max_catchup = max_catchup
+        self._event = None
+        self._interval = None
+        self._refresh_event = None
+
+    @property
+    def running(self):
+        return self._event is not None
+
+    def add_timer(self, callback, interval, active=None):
+        """Register ``callback(dt)`` every ``interval`` seconds."""
+        timer = _Timer(callback, interval, active)
+        self.timers.append(timer)
+        self.wake()
+        return timer
+
+    def wake(self):
+        """Resume or re-pace scheduling after input changed the game state."""
+        self._reschedule(refresh=True)
+
+    def stop(self):
+        """Cancel all scheduling, e.g. from ``App.on_stop``."""
+        self._cancel()
+        if self._refresh_event is not None:
+            self._refresh_event.cancel()
+            self._refresh_event = None
+
+    def _active_timers(self):
+        return [t for t in self.timers if not t.is_display and t.active()]
+
+    def _cancel(self):
+        if self._event is not None:
+            self._event.cancel()
+            self._event = None
+            self._interval = None
+
+    def _reschedule(self, refresh=False):
+        active = self._active_timers()
+        if not active:
+            was_running = self.running
+            self._cancel()
+            display = [t.interval for t in self.timers if t.is_display]
+            if display and (refresh or was_running) and self._refresh_event is None:
+                # Keep the display cadence: results shown on input stay up for one interval
+                self._refresh_event = Clock.schedule_once(self._refresh_display, min(display))
+            return
+        interval = min(t.interval for t in active + [t for t in self.timers if t.is_display])
+        if interval != self._interval:
+            self._cancel()
+            for timer in active:
+                timer.elapsed = 0.0
+            self._event = Clock.schedule_interval(self._tick, interval)
+            self._interval = interval
+
+    def _refresh_display(self, dt):
+        self._refresh_event = None
+        for timer in self.timers:
+            if timer.is_display:
+                timer.elapsed = 0.0
+                timer.callback(0)
+
+    def _tick(self, dt):
+        for timer in self.timers:
+            if not timer.is_display and not timer.active():
+                timer.elapsed = 0.0
+                continue
+            timer.elapsed += dt
+            fires = int(timer.elapsed // timer.interval)
+            if not fires:
+                continue
+            if fires > self.max_catchup:
+                # Drop backlog beyond the catch-up limit instead of spiralling
+                timer.elapsed %= timer.interval
+                fires = self.max_catchup
+            else:
+                timer.elapsed -= fires * timer.interval
+            for _ in range(fires):
+                timer.callback(timer.interval)
+                if not timer.is_display and not timer.active():
+                    break
+        self._reschedule()
@@ -0,0 +1,114 @@
+from collections import deque
+
+from sketch import KLLSketch
+
+QUANTILES = (0.01, 0.1, 0.25, 0.5, 0.75, 0.9, 0.99)
+SIGMAS = ("sigma_x", "sigma_y", "sigma_z")
+
+
+class RoundStats:
+    """Aggregates for one round, or a run of consecutive rounds once merged.
+
+    Flows (tokens minted, burned, transferred) add up across rounds; levels (tokens in
+    circulation, holdings per bot) keep the later round's value.
+    """
+    def __init__(self, round_num, k=128):
+        self.first_round = self.last_round = round_num
+        self.k = k
+        self.minted = 0
+        self.burned = 0
+        self.transferred = 0
+        self.total_tokens = 0
+        self.energy = KLLSketch(k)
+        self.sigmas = {name: KLLSketch(k) for name in SIGMAS}
+        self.holdings = KLLSketch(k)
+
+    @property
+    def rounds(self):
+        return self.last_round - self.first_round + 1
+
+    def add_token(self, energy, sigmas):
+        self.minted += 1
+        self.energy.update(float(energy))
+        for name, value in zip(SIGMAS, sigmas):
+            self.sigmas[name].update(float(getattr(value, "real", value)))
+
+    def close(self, held_counts, total_tokens):
+        """Record end-of-round levels: tokens held per bot and tokens in circulation."""
+        self.holdings.update_many(held_counts)
+        self.total_tokens = total_tokens
+
+    def merge(self, later):
+        """New stats covering ``self`` followed by ``later``; neither is modified."""
+        merged = RoundStats(self.first_round, self.k)
+        merged.last_round = later.last_round
+        merged.minted = self.minted + later.minted
+        merged.burned = self.burned + later.burned
+        merged.transferred = self.transferred + later.transferred
+        merged.total_tokens = later.total_tokens
+        merged.energy = self.energy.copy().merge(later.energy)
+        merged.sigmas = {name: self.sigmas[name].copy().merge(later.sigmas[name]) for name in SIGMAS}
+        merged.holdings = later.holdings.copy()
+        return merged
+
+    def summary(self):
+        """Plain dict of quantiles and counts, small enough to keep per round."""
+        def describe(sketch):
+            return {"count": sketch.count, "min": sketch.min, "max": sketch.max,
+                    "quantiles": dict(zip(QUANTILES, sketch.quantiles(QUANTILES)))}
+        return {
+            "rounds": (self.first_round, self.last_round),
+            "minted": self.minted,
+            "burned": self.burned,
+            "transferred": self.transferred,
+            "total_tokens": self.total_tokens,
+            "energy": describe(self.energy),
+            **{name: describe(self.sigmas[name]) for name in SIGMAS},
+            "holdings": describe(self.holdings),
+            "holdings_gini": self.holdings.gini(),
+        }
+
+
+class RoundHistory:
+    """Bounded time series of ``RoundStats`` over an arbitrarily long run.
+
+    The last ``recent`` rounds are kept as per-round summaries in a ring
+    buffer. The whole run is also kept as at most ``capacity`` mergeable
+    buckets: when the buckets fill up, neighbours are merged pairwise and
+    each bucket then covers twice as many rounds, so memory stays fixed
+    while resolution degrades gracefully for older rounds.
+    """
+    def __init__(self, recent=256, capacity=64):
+        self.recent = deque(maxlen=recent)
+        self.capacity = capacity
+        self.span = 1  # Rounds per bucket
+        self.buckets = []
+        self._pending = None
+
+    def append(self, stats):
+        self.recent.append(stats.summary())
+        self._pending = stats if self._pending is None else self._pending.merge(stats)
+        if self._pending.rounds >= self.span:
+            self.buckets.append(self._pending)
+            self._pending = None
+            if len(self.buckets) > self.capacity:
+                pairs = zip(self.buckets[0::2], self.buckets[1::2])
+                merged = [a.merge(b) for a, b in pairs]
+                if len(self.buckets) % 2:
+                    merged.append(self.buckets[-1])
+                self.buckets = merged
+                self.span *= 2
+
+    def series(self):
+        """Buckets covering every recorded round, oldest first."""
+        return self.buckets + ([self._pending] if self._pending is not None else [])
+
+    def total(self):
+        """One ``RoundStats`` for the whole run, e.g. lifetime energy percentiles."""
+        series = self.series()
+        if not series:
+            return None
+        merged = series[0]
+        for stats in series[1:]:
+            merged = merged.merge(stats)
+        return merged
@@ -0,0 +1,225 @@
+import json
+import math
+import os
+import time
+from collections import Counter
+from contextlib import nullcontext
+
+# Widget methods timed as phases of whatever callback calls them
+PHASES = ("update_display", "save_tokens", "load_tokens")
+OVERLAY_KEY = "f12"
+_NULL = nullcontext()
+
+
+class LatencyHistogram:
+    """Log-bucketed latency histogram (~2% resolution) with constant memory."""
+    GROWTH = 1.02
+
+    def __init__(self):
+        self.buckets = Counter()
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds):
+        us = max(seconds * 1e6, 1.0)
+        self.buckets[int(math.log(us, self.GROWTH))] += 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def merge(self, other):
+        self.buckets.update(other.buckets)
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+    def percentile(self, pct):
+        """Upper edge of the bucket holding the ``pct`` percentile, in seconds."""
+        if not self.count:
+            return 0.0
+        rank = pct / 100 * self.count
+        seen = 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen >= rank:
+                return min(self.GROWTH ** (bucket + 1) / 1e6, self.max)
+        return self.max
+
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+    def summary(self):
+        """Milliseconds, ready for the JSON report."""
+        return {"count": self.count, "mean_ms": self.mean() * 1e3, "p50_ms": self.percentile(50) * 1e3,
+                "p95_ms": self.percentile(95) * 1e3, "p99_ms": self.percentile(99) * 1e3, "max_ms": self.max * 1e3}
+
+
+class _Section:
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.profiler._stack.append(0.0)  # Time spent in nested sections
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc):
+        self.profiler._close(self.name, time.perf_counter() - self.start)
+
+
+class _TimedSQLite:
+    """Connection or cursor stand-in that times ``execute``, ``fetchall`` and ``commit`` as ``sqlite``."""
+    TIMED = ("execute", "executemany", "fetchall", "commit")
+
+    def __init__(self, target, profiler):
+        self._target = target
+        self._profiler = profiler
+
+    def __getattr__(self, name):
+        attr = getattr(self._target, name)
+        if name in self.TIMED:
+            return self._profiler.wrap("sqlite", attr)
+        return attr
+
+    # ``with conn:`` looks these up on the type, so __getattr__ never sees them
+    def __enter__(self):
+        self._target.__enter__()
+        return self
+
+    def __exit__(self, *exc):
+        return self._profiler.wrap("sqlite", self._target.__exit__)(*exc)  # Commits or rolls back
+
+
+class CallbackProfiler:
+    """Opt-in timing of game callbacks, event handlers and the phases inside them.
+
+    Every timed region records its inclusive duration; callbacks also record
+    ``name:self``, the time not spent in nested regions, so a
+    ``render_charge`` frame splits into the charge increments it applied,
+    ``update_display``, ``sqlite`` and ``psutil``. Handlers wrapped with ``handler`` also
+    record ``input_to_frame``: from the button press until the window next
+    flips. When disabled every method is a pass-through.
+    """
+    def __init__(self, report_path=None, enabled=True):
+        self.enabled = enabled
+        self.report_path = report_path
+        self.histograms = {}
+        self.started = time.time()
+        self._stack = []
+        self._pending_input = None
+        self._overlay = None
+        self._overlay_event = None
+
+    def _close(self, name, elapsed):
+        nested = self._stack.pop()
+        self.histograms.setdefault(name, LatencyHistogram()).record(elapsed)
+        if nested:
+            self.histograms.setdefault(name + ":self", LatencyHistogram()).record(elapsed - nested)
+        if self._stack:
+            self._stack[-1] += elapsed
+
+    def section(self, name):
+        """Context manager timing a block, e.g. ``with profiler.section("psutil"):``."""
+        return _Section(self, name) if self.enabled else _NULL
+
+    def wrap(self, name, fn):
+        if not self.enabled:
+            return fn
+
+        def timed(*args, **kwargs):
+            self._stack.append(0.0)
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self._close(name, time.perf_counter() - start)
+        return timed
+
+    def handler(self, name, fn):
+        """Wrap a Kivy event handler; a press also starts the input-to-frame clock."""
+        if not self.enabled:
+            return fn
+        timed = self.wrap(name, fn)
+
+        def on_event(*args, **kwargs):
+            if self._pending_input is None:
+                self._pending_input = time.perf_counter()
+            return timed(*args, **kwargs)
+        return on_event
+
+    def _on_flip(self, window):
+        if self._pending_input is not None:
+            self.histograms.setdefault("input_to_frame", LatencyHistogram()).record(
+                time.perf_counter() - self._pending_input)
+            self._pending_input = None
+
+    def attach(self, app, game):
+        """Time ``game``'s loop timers and phases, hook the window and write the report on ``on_stop``."""
+        if not self.enabled:
+            return
+        from kivy.core.window import Window
+        for timer in game.loop.timers:
+            timer.callback = self.wrap(timer.callback.__name__, timer.callback)
+        for name in PHASES:
+            if hasattr(game, name):
+                setattr(game, name, self.wrap(name, getattr(game, name)))
+        for name in ("conn", "cursor"):
+            if hasattr(game, name):
+                setattr(game, name, _TimedSQLite(getattr(game, name), self))
+        Window.bind(on_flip=self._on_flip, on_key_down=self._on_key_down)
+        app.bind(on_stop=lambda *_: self.write_report())
+        if self.report_path is None:
+            self.report_path = f"profile_{type(app).__name__}.json"
+
+    def _on_key_down(self, window, key, scancode, codepoint, modifiers):
+        from kivy.core.window import Keyboard
+        if key == Keyboard.keycodes[OVERLAY_KEY]:
+            self.toggle_overlay()
+            return True
+
+    def toggle_overlay(self):
+        from kivy.clock import Clock
+        from kivy.core.window import Window
+        from kivy.uix.label import Label
+        if self._overlay is None:
+            self._overlay = Label(halign="left", valign="top", font_size="12sp", font_name="RobotoMono-Regular", color=(1, 1, 0, 1))
+            self._overlay.bind(size=self._overlay.setter("text_size"))
+        if self._overlay.parent is None:
+            self._overlay.size = Window.size
+            Window.add_widget(self._overlay)
+            self._refresh_overlay(0)
+            self._overlay_event = Clock.schedule_interval(self._refresh_overlay, 0.5)
+        else:
+            self._overlay_event.cancel()
+            Window.remove_widget(self._overlay)
+
+    def _refresh_overlay(self, dt):
+        lines = [f"{'region':<22}{'n':>7}{'p50':>8}{'p95':>8}{'max':>8} ms"]
+        for name, hist in sorted(self.histograms.items()):
+            lines.append(f"{name:<22}{hist.count:>7}{hist.percentile(50) * 1e3:>8.2f}"
+                         f"{hist.percentile(95) * 1e3:>8.2f}{hist.max * 1e3:>8.2f}")
+        self._overlay.text = "\n".join(lines)
+
+    def report(self):
+        return {"started": self.started, "seconds": time.time() - self.started,
+                "regions": {name: hist.summary() for name, hist in sorted(self.histograms.items())}}
+
+    def write_report(self):
+        if not self.enabled or self.report_path is None:
+            return
+        with open(self.report_path, "w") as f:
+            json.dump(self.report(), f, indent=2)
+
+
+_default = None
+
+
+def default_profiler():
+    """Process-wide profiler, enabled by ``GASLITE_PROFILE`` (``1`` or a report path)."""
+    global _default
+    if _default is None:
+        setting = os.environ.get("GASLITE_PROFILE", "")
+        enabled = setting not in ("", "0")
+        _default = CallbackProfiler(None if setting in ("", "0", "1") else setting, enabled=enabled)
+    return _default
@@ -0,0 +1,323 @@
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import struct
+import sys
+from collections import namedtuple
+
+import tokendb
+
+# The columns a leaf covers, packed as doubles. A simulation token's owner
+# is left out because transfers change it.
+LEAF_COLUMNS = {
+    tokendb.SIMULATION: ("id, energy_level, rare, " + tokendb.SIGMA_COLUMNS[tokendb.SIMULATION], struct.Struct("<9d")),
+    tokendb.GASLITE: ("id, " + tokendb.COLUMNS[tokendb.GASLITE], struct.Struct("<6d")),
+}
+SCHEMA = [
+    # Node (level, idx) hashes leaves [idx << level, (idx + 1) << level); level 0 holds the leaves
+    "CREATE TABLE IF NOT EXISTS ledger_nodes (level INTEGER, idx INTEGER, hash BLOB, PRIMARY KEY (level, idx)) WITHOUT ROWID",
+    "CREATE TABLE IF NOT EXISTS ledger_leaves (idx INTEGER PRIMARY KEY, token_id INTEGER UNIQUE)",
+    # One row per appended batch: leaf count after it, the root over those leaves and the chain up to it
+    "CREATE TABLE IF NOT EXISTS ledger_batches (leaves INTEGER PRIMARY KEY, root BLOB, chain BLOB)",
+]
+EMPTY = hashlib.blake2b(b"", digest_size=32).digest()
+
+Head = namedtuple("Head", "leaves root chain")
+Proof = namedtuple("Proof", "idx leaves siblings peaks peak")
+
+
+class Verification(namedtuple("Verification", "head checked missing tampered unrecorded problems")):
+    __slots__ = ()
+
+    @property
+    def ok(self):
+        return not (self.tampered or self.unrecorded or self.problems)
+
+
+GENESIS = Head(0, EMPTY, EMPTY)
+
+
+def leaf_hash(packer, row):
+    # + 0.0 turns -0.0, which SQLite reads back as 0.0, into 0.0
+    return hashlib.blake2b(b"\x00" + packer.pack(*[value + 0.0 for value in row]), digest_size=32).digest()
+
+
+def node_hash(left, right):
+    return hashlib.blake2b(b"\x01" + left + right, digest_size=32).digest()
+
+
+def chain_hash(prev, leaves, root):
+    return hashlib.blake2b(b"\x02" + prev + leaves.to_bytes(8, "big") + root, digest_size=32).digest()
+
+
+def bag(peaks):
+    """One root over the peak hashes, folded from the right."""
+    if not peaks:
+        return EMPTY
+    root = peaks[-1]
+    for peak in reversed(peaks[:-1]):
+        root = node_hash(peak, root)
+    return root
+
+
+def peak_keys(leaves):
+    """``(level, idx)`` of the perfect subtrees a ledger of ``leaves`` leaves splits into, left to right."""
+    keys, start = [], 0
+    for level in range(leaves.bit_length() - 1, -1, -1):
+        if leaves >> level & 1:
+            keys.append((level, start >> level))
+            start += 1 << level
+    return keys
+
+
+def push(peaks, leaf, idx):
+    """Add leaf ``idx`` to the ``(level, hash)`` peak stack; returns the ``(level, idx, hash)`` nodes it created."""
+    created = [(0, idx, leaf)]
+    level, node = 0, leaf
+    while peaks and peaks[-1][0] == level:
+        node = node_hash(peaks.pop()[1], node)
+        level += 1
+        created.append((level, idx >> level, node))
+    peaks.append((level, node))
+    return created
+
+
+def check_proof(leaf, proof, root):
+    """True when ``leaf`` at ``proof.idx`` hashes up to ``root``."""
+    node = leaf
+    for level, sibling in enumerate(proof.siblings):
+        node = node_hash(sibling, node) if proof.idx >> level & 1 else node_hash(node, sibling)
+    return node == proof.peaks[proof.peak] and bag(list(proof.peaks)) == root
+
+
+class Ledger:
+    """Merkle mountain range over a token table's minted rows, kept in the same database.
+
+    Every batch of minted rows becomes one ``append``, best made in the
+    minting transaction: it adds a leaf per row, the nodes they complete,
+    and a batch record chaining the new root to the previous one. Trust comes
+    from a ``Head`` held outside the database (see ``load_head``):
+    ``verify(since=head)`` rechecks only the rows added after it, and
+    ``check(token_id, head)`` proves one row in O(log n) lookups.
+    Rows deleted later (sold tokens, checkpoint restores) keep their
+    leaves and show up as missing rather than tampered.
+    """
+    def __init__(self, conn, kind):
+        self.conn = conn
+        self.kind = kind
+        self.columns, self.packer = LEAF_COLUMNS[kind]
+        self._frontier = (None, None)  # (head, peaks) after our last append
+        fresh = conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'ledger_batches'").fetchone() is None
+        for statement in SCHEMA:
+            conn.execute(statement)
+        if fresh:
+            # Rows minted before the ledger existed are taken as they stand
+            with conn:
+                self.append(conn.execute(f"SELECT {self.columns} FROM tokens ORDER BY id"))
+        conn.commit()
+
+    def head(self):
+        row = self.conn.execute("SELECT leaves, root, chain FROM ledger_batches ORDER BY leaves DESC LIMIT 1").fetchone()
+        return Head(*row) if row is not None else GENESIS
+
+    def _head_at(self, leaves):
+        if leaves == 0:
+            return GENESIS
+        row = self.conn.execute("SELECT leaves, root, chain FROM ledger_batches WHERE leaves = ?", (leaves,)).fetchone()
+        return Head(*row) if row is not None else None
+
+    def _node(self, level, idx):
+        row = self.conn.execute("SELECT hash FROM ledger_nodes WHERE level = ? AND idx = ?", (level, idx)).fetchone()
+        return row[0] if row is not None else None
+
+    def _peaks(self, leaves):
+        return [(level, self._node(level, idx)) for level, idx in peak_keys(leaves)]
+
+    def append(self, rows):
+        """Add minted rows, given as tuples in ``LEAF_COLUMNS`` order; returns the new ``Head``.
+
+        Does not commit, so the caller's transaction covers the rows and their leaves together.
+        """
+        head = self.head()
+        cached, peaks = self._frontier
+        # Reuse our own peaks unless another writer appended or a rollback undid our append
+        peaks = list(peaks) if cached == head else self._peaks(head.leaves)
+        nodes, leaves = [], []
+        n = head.leaves
+        for row in rows:
+            nodes.extend(push(peaks, leaf_hash(self.packer, row), n))
+            leaves.append((n, row[0]))
+            n += 1
+        if n == head.leaves:
+            return head
+        self.conn.executemany("INSERT INTO ledger_nodes VALUES (?, ?, ?)", nodes)
+        self.conn.executemany("INSERT INTO ledger_leaves VALUES (?, ?)", leaves)
+        root = bag([hash_ for _, hash_ in peaks])
+        head = Head(n, root, chain_hash(head.chain, n, root))
+        self.conn.execute("INSERT INTO ledger_batches VALUES (?, ?, ?)", head)
+        self._frontier = (head, peaks)
+        return head
+
+    def truncate(self, max_id):
+        """Drop leaves for token ids above ``max_id``, as when a checkpoint restore deletes them. Does not commit."""
+        row = self.conn.execute("SELECT idx FROM ledger_leaves WHERE token_id <= ? ORDER BY token_id DESC LIMIT 1",
+                                (max_id,)).fetchone()
+        leaves = row[0] + 1 if row is not None else 0
+        head = self.head()
+        if leaves == head.leaves:
+            return head
+        for level in range(head.leaves.bit_length()):
+            self.conn.execute("DELETE FROM ledger_nodes WHERE level = ? AND idx >= ?", (level, leaves >> level))
+        self.conn.execute("DELETE FROM ledger_leaves WHERE idx >= ?", (leaves,))
+        self.conn.execute("DELETE FROM ledger_batches WHERE leaves > ?", (leaves,))
+        kept = self._head_at(leaves)
+        if kept is None:
+            # Cut inside a batch: record the shorter ledger as a batch of its own
+            prev = self.head()
+            root = bag([hash_ for _, hash_ in self._peaks(leaves)])
+            kept = Head(leaves, root, chain_hash(prev.chain, leaves, root))
+            self.conn.execute("INSERT INTO ledger_batches VALUES (?, ?, ?)", kept)
+        return kept
+
+    def proof(self, token_id, leaves=None):
+        """Sibling and peak hashes proving ``token_id``'s leaf, against the root at ``leaves`` (default: now)."""
+        leaves = self.head().leaves if leaves is None else leaves
+        row = self.conn.execute("SELECT idx FROM ledger_leaves WHERE token_id = ?", (token_id,)).fetchone()
+        if row is None or row[0] >= leaves:
+            return None
+        idx = row[0]
+        keys = peak_keys(leaves)
+        peak = next(i for i, (level, start) in enumerate(keys) if start << level <= idx < (start + 1) << level)
+        siblings = [self._node(level, (idx >> level) ^ 1) for level in range(keys[peak][0])]
+        return Proof(idx, leaves, siblings, [self._node(*key) for key in keys], peak)
+
+    def check(self, token_id, head=None):
+        """Whether ``token_id``'s row still matches what was minted, under ``head``'s root.
+
+        Returns None when the row or its leaf is gone.
+        """
+        head = self.head() if head is None else head
+        row = self.conn.execute(f"SELECT {self.columns} FROM tokens WHERE id = ?", (token_id,)).fetchone()
+        proof = self.proof(token_id, head.leaves)
+        if row is None or proof is None:
+            return None
+        return check_proof(leaf_hash(self.packer, row), proof, head.root)
+
+    def verify(self, since=GENESIS):
+        """Recheck the rows and batches added after the trusted head ``since``; costs O(rows added since).
+
+        Rows that no longer match their leaf are ``tampered``; token rows
+        that were never appended are ``unrecorded``.
+        ``problems`` lists where the ledger itself disagrees with ``since``
+        or with the leaves.
+        """
+        problems, tampered, missing, unrecorded = [], [], [], []
+        anchor = self._head_at(since.leaves)
+        if anchor != since:
+            problems.append(f"ledger at {since.leaves} leaves no longer matches the trusted head")
+            return Verification(since, 0, missing, tampered, unrecorded, problems)
+        peaks = self._peaks(since.leaves)
+        if bag([hash_ for _, hash_ in peaks]) != since.root:
+            problems.append(f"peaks at {since.leaves} leaves do not match the trusted root")
+            return Verification(since, 0, missing, tampered, unrecorded, problems)
+
+        batches = self.conn.execute("SELECT leaves, root, chain FROM ledger_batches WHERE leaves > ? ORDER BY leaves",
+                                    (since.leaves,))
+        batch = next(batches, None)
+        leaves = self.conn.execute(
+            "SELECT l.idx, l.token_id, n.hash FROM ledger_leaves l JOIN ledger_nodes n ON n.level = 0 AND n.idx = l.idx "
+            "WHERE l.idx >= ? ORDER BY l.idx", (since.leaves,))
+        last = self.conn.execute("SELECT token_id FROM ledger_leaves WHERE idx = ?", (since.leaves - 1,)).fetchone()
+        rows = self.conn.execute(f"SELECT {self.columns} FROM tokens WHERE id > ? ORDER BY id",
+                                 (last[0] if last is not None else 0,))
+        row = next(rows, None)
+        head, checked, n = since, 0, since.leaves
+        for idx, token_id, stored in leaves:
+            if idx != n:
+                problems.append(f"leaf {n} is missing")
+                break
+            while row is not None and row[0] < token_id:
+                unrecorded.append(row[0])
+                row = next(rows, None)
+            if row is not None and row[0] == token_id:
+                if leaf_hash(self.packer, row) != stored:
+                    tampered.append(token_id)
+                checked += 1
+                row = next(rows, None)
+            else:
+                missing.append(token_id)
+            push(peaks, stored, n)
+            n += 1
+            if batch is not None and batch[0] == n:
+                root = bag([hash_ for _, hash_ in peaks])
+                if root != batch[1] or chain_hash(head.chain, n, root) != batch[2]:
+                    problems.append(f"batch ending at {n} leaves does not match its leaves or the chain")
+                    break
+                head = Head(*batch)
+                batch = next(batches, None)
+        if not problems and (batch is not None or head.leaves != n):
+            problems.append(f"batches and leaves disagree after {head.leaves} leaves")
+        if row is not None:
+            unrecorded += [row[0]] + [r[0] for r in rows]
+        return Verification(head, checked, missing, tampered, unrecorded, problems)
+
+
+def head_path(db_path):
+    return db_path + ".ledger-head"
+
+
+def load_head(path):
+    """The trusted head saved by ``save_head``, or the empty ledger when there is none yet."""
+    try:
+        with open(path) as f:
+            saved = json.load(f)
+    except FileNotFoundError:
+        return GENESIS
+    return Head(saved["leaves"], bytes.fromhex(saved["root"]), bytes.fromhex(saved["chain"]))
+
+
+def save_head(head, path):
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w") as f:
+        json.dump({"leaves": head.leaves, "root": head.root.hex(), "chain": head.chain.hex()}, f)
+    os.replace(tmp, path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check tokens.db/simulation.db rows against their hash ledger")
+    parser.add_argument("database")
+    parser.add_argument("--token", type=int, action="append", default=[], help="prove one token instead of verifying")
+    parser.add_argument("--head", help=f"trusted head file (default: DATABASE{head_path('')})")
+    parser.add_argument("--full", action="store_true", help="verify from the first row, ignoring the saved head")
+    args = parser.parse_args()
+
+    path = args.head or head_path(args.database)
+    conn = sqlite3.connect(args.database)
+    try:
+        ledger = Ledger(conn, tokendb.kind_of(conn))
+        trusted = GENESIS if args.full else load_head(path)
+        if args.token:
+            checks = [ledger.check(token_id, trusted if trusted.leaves else None) for token_id in args.token]
+            for token_id, result in zip(args.token, checks):
+                print(f"token {token_id}: {'gone' if result is None else 'ok' if result else 'TAMPERED'}")
+            sys.exit(1 if False in checks else 0)
+        result = ledger.verify(trusted)
+    finally:
+        conn.close()
+    print(f"{args.database}: {result.checked} rows checked from leaf {trusted.leaves} to {result.head.leaves}, "
+          f"{len(result.missing)} deleted since minting")
+    for token_id in result.tampered:
+        print(f"token {token_id}: TAMPERED")
+    if result.unrecorded:
+        print(f"{len(result.unrecorded)} rows never appended to the ledger, from token {result.unrecorded[0]}")
+    for problem in result.problems:
+        print(f"ledger: {problem}")
+    if not result.ok:
+        sys.exit(1)
+    save_head(result.head, path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,240 @@
+import argparse
+import asyncio
+import random
+import os
+import re
+import tempfile
+import time
+from collections import Counter
+
+from Botsimulation import EconomyConfig, Simulation
+from instrument import LatencyHistogram
+from sampling import LIVE_ENTROPY
+from server import GameClient, GameServer
+from stress_testing import Bot
+from sweep import parse_assignment, parse_value
+
+BEHAVIORS = ("casual", "aggressive", "strategic", "adaptive")
+CLIENT_ERRORS = (ConnectionError, OSError, asyncio.TimeoutError, ValueError)
+DIFF_PATTERN = re.compile(r"Diff: (\d+)")
+
+
+class LoadStats:
+    """Per-op latency histograms plus error and rejection counters."""
+    def __init__(self):
+        self.latency = {}
+        self.errors = Counter()
+        self.rejected = Counter()
+        self.started = time.monotonic()
+        self.finished = None
+
+    def record(self, op, seconds, ok):
+        self.latency.setdefault(op, LatencyHistogram()).record(seconds)
+        if not ok:
+            self.rejected[op] += 1
+
+    def error(self, op, exc):
+        self.errors[(op, type(exc).__name__)] += 1
+
+    def requests(self):
+        return sum(h.count for h in self.latency.values())
+
+    def total_errors(self):
+        return sum(self.errors.values())
+
+    def combined(self):
+        combined = LatencyHistogram()
+        for histogram in self.latency.values():
+            combined.merge(histogram)
+        return combined
+
+    def elapsed(self):
+        return (self.finished or time.monotonic()) - self.started
+
+
+class _IntentRecorder:
+    """Stands in for ``Simulation`` so its behavior methods emit requests.
+
+    ``Simulation.casual_action`` and friends only read ``config``, draw from
+    ``rng`` and call ``generate_token`` and ``burn_token``; recording those
+    calls reuses the exact economy rules. Minting maps to a market buy and
+    burning to a sell.
+    """
+    def __init__(self, config):
+        self.ops = []
+        self.rng = LIVE_ENTROPY
+        self.config = config
+
+    def generate_token(self, bot_id, rare=False):
+        self.ops.append("buy")
+        return {"owner": bot_id, "rare": rare}
+
+    def burn_token(self, bot):
+        if bot["tokens"]:
+            bot["tokens"].pop(0)
+            self.ops.append("sell")
+
+
+class LoadGenerator:
+    def __init__(self, host, port, mix, think_time=(0.5, 2.0), timeout=10.0, seed=None, config=None):
+        self.host = host
+        self.port = port
+        self.config = config or EconomyConfig()  # Mint and burn chances, as in Botsimulation and gaslite-sweep
+        self.behaviors, self.weights = zip(*mix.items())
+        self.think_time = think_time
+        self.timeout = timeout
+        self.rng = random.Random(seed)
+        self.adaptive_bots = []
+
+    async def _request(self, client, op, stats):
+        start = time.perf_counter()
+        reply = await asyncio.wait_for(client.request(op), self.timeout)
+        stats.record(op, time.perf_counter() - start, reply.get("ok", False))
+        return reply
+
+    async def _think(self):
+        await asyncio.sleep(self.rng.uniform(*self.think_time))
+
+    async def _economy_round(self, client, bot, stats):
+        recorder = _IntentRecorder(self.config)
+        getattr(Simulation, f"{bot['behavior']}_action")(recorder, bot)
+        for op in recorder.ops:
+            reply = await self._request(client, op, stats)
+            if op == "buy" and not reply.get("ok") and bot["tokens"]:
+                bot["tokens"].pop()  # The market refused, so the bot never got it
+
+    async def _adaptive_round(self, client, bot, stats):
+        state = await self._request(client, "state", stats)
+        bot.target = state["fake_target"]
+        bot.start_action()
+        hold = bot.estimate_hold_duration()
+        await self._request(client, "charge", stats)
+        await asyncio.sleep(hold)
+        reply = await self._request(client, "release", stats)
+        match = DIFF_PATTERN.search(reply.get("result") or "")
+        if match:
+            # Replay the server's outcome through the bot so it keeps learning
+            bot.player_power = bot.target - int(match.group(1))
+            bot.stop_action()
+
+    async def client(self, index, deadline, stats):
+        behavior = self.rng.choices(self.behaviors, self.weights)[0]
+        op = "connect"
+        try:
+            start = time.perf_counter()
+            client = await asyncio.wait_for(GameClient.connect(self.host, self.port), self.timeout)
+            stats.record(op, time.perf_counter() - start, True)
+        except CLIENT_ERRORS as e:
+            stats.error(op, e)
+            return
+        if behavior == "adaptive":
+            bot = Bot(index, self.adaptive_bots)
+            self.adaptive_bots.append(bot)
+            play = self._adaptive_round
+        else:
+            bot = {"id": f"bot_{index}", "behavior": behavior, "tokens": []}
+            play = self._economy_round
+        try:
+            while time.monotonic() < deadline:
+                op = behavior
+                await play(client, bot, stats)
+                await self._think()
+        except CLIENT_ERRORS as e:
+            stats.error(op, e)
+        finally:
+            await client.close()
+
+    async def run_stage(self, clients, duration, ramp_up):
+        """Start ``clients`` evenly over ``ramp_up`` seconds, then hold for ``duration``."""
+        stats = LoadStats()
+        deadline = time.monotonic() + ramp_up + duration
+        tasks = []
+        for i in range(clients):
+            tasks.append(asyncio.create_task(self.client(i, deadline, stats)))
+            if ramp_up:
+                await asyncio.sleep(ramp_up / clients)
+        await asyncio.gather(*tasks)
+        stats.finished = time.monotonic()
+        return stats
+
+
+def parse_mix(text):
+    """Parse ``casual=4,aggressive=3`` into a weight mapping."""
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in BEHAVIORS:
+            raise argparse.ArgumentTypeError(f"unknown behavior: {name}")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def print_stage(clients, stats):
+    combined = stats.combined()
+    requests = stats.requests()
+    errors = stats.total_errors()
+    print(f"\n=== {clients} clients ===")
+    print(f"Requests: {requests} | Throughput: {requests / stats.elapsed():.0f} req/s | "
+          f"Errors: {errors} ({errors / max(requests + errors, 1) * 100:.2f}%)")
+    print(f"{'op':<10}{'count':>9}{'rejected':>10}{'mean ms':>10}{'p50 ms':>9}{'p90 ms':>9}{'p99 ms':>9}{'max ms':>9}")
+    rejected = dict(stats.rejected, all=sum(stats.rejected.values()))
+    for op, hist in sorted(stats.latency.items()) + [("all", combined)]:
+        print(f"{op:<10}{hist.count:>9}{rejected.get(op, 0):>10}{hist.mean() * 1000:>10.2f}"
+              f"{hist.percentile(50) * 1000:>9.2f}{hist.percentile(90) * 1000:>9.2f}"
+              f"{hist.percentile(99) * 1000:>9.2f}{hist.max * 1000:>9.2f}")
+    for (op, name), count in stats.errors.most_common():
+        print(f"  error {name} during {op}: {count}")
+
+
+async def run(args):
+    server = None
+    port = args.port
+    workdir = None
+    if args.spawn_server:
+        db_path = args.db
+        if db_path is None:
+            workdir = tempfile.TemporaryDirectory(prefix="gaslite-loadgen-")
+            db_path = os.path.join(workdir.name, "tokens.db")
+        server = await GameServer(port=0, db_path=db_path).start()
+        port = server.port
+    generator = LoadGenerator(args.host, port, args.mix, (args.think_min, args.think_max),
+                              timeout=args.timeout, seed=args.seed,
+                              config=EconomyConfig()._replace(**{name: parse_value(name, value)
+                                                                 for name, value in args.economy}))
+    try:
+        for clients in args.stages:
+            stats = await generator.run_stage(clients, args.duration, args.ramp_up)
+            print_stage(clients, stats)
+    finally:
+        if server is not None:
+            await server.close()
+        if workdir is not None:
+            workdir.cleanup()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Async load generator for the Gaslight game server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--stages", type=lambda s: [int(n) for n in s.split(",")], default=[100],
+                        help="comma-separated client counts, run one after another to find saturation")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds to hold each stage after ramp-up")
+    parser.add_argument("--ramp-up", type=float, default=10.0)
+    parser.add_argument("--think-min", type=float, default=0.5)
+    parser.add_argument("--think-max", type=float, default=2.0)
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix("casual=1,aggressive=1,strategic=1,adaptive=1"))
+    parser.add_argument("--economy", type=parse_assignment, action="append", default=[], metavar="FIELD=VALUE",
+                        help="economy setting for the casual/aggressive/strategic bots, as in gaslite-sweep, "
+                             "e.g. aggressive_burn=80")
+    parser.add_argument("--timeout", type=float, default=10.0)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--spawn-server", action="store_true",
+                        help="run a GameServer in-process (shares the event loop, so latencies are pessimistic)")
+    parser.add_argument("--db", help="database for --spawn-server (default: a temporary file removed afterwards)")
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+import heapq
+import itertools
+from collections import OrderedDict, namedtuple
+
+BUY = "buy"
+SELL = "sell"
+
+Trade = namedtuple("Trade", ["buy_id", "sell_id", "buyer", "seller", "price", "quantity"])
+
+
+class Order:
+    __slots__ = ("order_id", "owner", "side", "price", "quantity", "seq")
+
+    def __init__(self, order_id, owner, side, price, quantity, seq):
+        self.order_id = order_id
+        self.owner = owner
+        self.side = side
+        self.price = price
+        self.quantity = quantity
+        self.seq = seq
+
+
+class _BookSide:
+    """Price levels for one side: a heap of prices plus FIFO queues per price.
+
+    Insert is O(log n) (only when a new level opens), cancel is O(1) with the
+    emptied level dropped lazily from the heap when it reaches the top.
+    """
+    def __init__(self, side):
+        self.side = side
+        self.sign = -1 if side == BUY else 1  # heapq is a min-heap; bids want max
+        self.levels = {}
+        self._heap = []
+        self._in_heap = set()
+
+    def add(self, order):
+        level = self.levels.get(order.price)
+        if level is None:
+            level = self.levels[order.price] = OrderedDict()
+            if order.price not in self._in_heap:
+                heapq.heappush(self._heap, self.sign * order.price)
+                self._in_heap.add(order.price)
+        level[order.order_id] = order
+
+    def remove(self, order):
+        level = self.levels[order.price]
+        del level[order.order_id]
+        if not level:
+            del self.levels[order.price]
+
+    def best_price(self):
+        while self._heap:
+            price = self.sign * self._heap[0]
+            if price in self.levels:
+                return price
+            heapq.heappop(self._heap)
+            self._in_heap.discard(price)
+        return None
+
+    def crosses(self, best, limit):
+        """Whether an incoming order at ``limit`` trades against this side's ``best``."""
+        if limit is None:
+            return True
+        return best <= limit if self.side == SELL else best >= limit
+
+    def depth(self):
+        return sum(o.quantity for level in self.levels.values() for o in level.values())
+
+
+class OrderBook:
+    """Price-time-priority limit order book for Gaslight tokens.
+
+    Every trade executes at the resting order's price and moves
+    ``token_price`` to it, so the book replaces the single-player random
+    walk in ``GaslightTokenWidget`` when many players trade at once.
+    """
+    def __init__(self, token_price=100, on_trade=None):
+        self.token_price = token_price
+        self.on_trade = on_trade
+        self.bids = _BookSide(BUY)
+        self.asks = _BookSide(SELL)
+        self.orders = {}
+        self.trade_count = 0
+        self.volume = 0
+        self._ids = itertools.count(1)
+        self._seq = itertools.count()
+
+    def _sides(self, side):
+        if side == BUY:
+            return self.bids, self.asks
+        if side == SELL:
+            return self.asks, self.bids
+        raise ValueError(f"Unknown side: {side}")
+
+    def submit_limit(self, owner, side, price, quantity=1):
+        """Match a limit order, rest any remainder; returns ``(order_id, trades)``."""
+        if quantity <= 0 or price <= 0:
+            raise ValueError("price and quantity must be positive")
+        own, opposite = self._sides(side)
+        order = Order(next(self._ids), owner, side, price, quantity, next(self._seq))
+        trades = self._match(order, opposite, price)
+        if order.quantity:
+            own.add(order)
+            self.orders[order.order_id] = order
+        return order.order_id, trades
+
+    def submit_market(self, owner, side, quantity=1):
+        """Match against the best prices available; unfilled quantity is dropped."""
+        if quantity <= 0:
+            raise ValueError("quantity must be positive")
+        _, opposite = self._sides(side)
+        order = Order(next(self._ids), owner, side, None, quantity, next(self._seq))
+        return self._match(order, opposite, None)
+
+    def cancel(self, order_id):
+        """Remove a resting order; returns False if it already filled or never existed."""
+        order = self.orders.pop(order_id, None)
+        if order is None:
+            return False
+        self._sides(order.side)[0].remove(order)
+        return True
+
+    def best_bid(self):
+        return self.bids.best_price()
+
+    def best_ask(self):
+        return self.asks.best_price()
+
+    def spread(self):
+        bid, ask = self.best_bid(), self.best_ask()
+        return None if bid is None or ask is None else ask - bid
+
+    def _match(self, order, opposite, limit):
+        trades = []
+        while order.quantity:
+            best = opposite.best_price()
+            if best is None or not opposite.crosses(best, limit):
+                break
+            level = opposite.levels[best]
+            resting = next(iter(level.values()))
+            filled = min(order.quantity, resting.quantity)
+            order.quantity -= filled
+            resting.quantity -= filled
+            if resting.quantity == 0:
+                opposite.remove(resting)
+                del self.orders[resting.order_id]
+            if order.side == BUY:
+                trade = Trade(order.order_id, resting.order_id, order.owner, resting.owner, best, filled)
+            else:
+                trade = Trade(resting.order_id, order.order_id, resting.owner, order.owner, best, filled)
+            trades.append(trade)
+            self.token_price = best
+            self.trade_count += 1
+            self.volume += filled
+            if self.on_trade:
+                self.on_trade(trade)
+        return trades
+
+
+class OrderGenerator:
+    """Synthetic order flow around the current ``token_price``.
+
+    Yields ``("limit", owner, side, price, qty)``, ``("market", owner, side, qty)``
+    or ``("cancel", order_id)`` tuples; apply them with ``apply``.
+    """
+    def __init__(self, rng, owners=1000, market_ratio=0.1, cancel_ratio=0.2, spread=10, max_quantity=5):
+        self.rng = rng
+        self.owners = [f"player_{i}" for i in range(owners)]
+        self.market_ratio = market_ratio
+        self.cancel_ratio = cancel_ratio
+        self.spread = spread
+        self.max_quantity = max_quantity
+        self.open_ids = []
+
+    def next_order(self, book):
+        rng = self.rng
+        roll = rng.random()
+        if roll < self.cancel_ratio and self.open_ids:
+            # Swap-remove keeps picking a random resting order O(1)
+            i = rng.randrange(len(self.open_ids))
+            self.open_ids[i], self.open_ids[-1] = self.open_ids[-1], self.open_ids[i]
+            return ("cancel", self.open_ids.pop())
+        owner = rng.choice(self.owners)
+        side = BUY if rng.random() < 0.5 else SELL
+        quantity = rng.randint(1, self.max_quantity)
+        if roll < self.cancel_ratio + self.market_ratio:
+            return ("market", owner, side, quantity)
+        offset = rng.randint(0, self.spread)
+        price = book.token_price - offset if side == BUY else book.token_price + offset
+        return ("limit", owner, side, max(1, price), quantity)
+
+    def apply(self, book, order):
+        kind = order[0]
+        if kind == "cancel":
+            book.cancel(order[1])
+            return []
+        if kind == "market":
+            return book.submit_market(*order[1:])
+        order_id, trades = book.submit_limit(*order[1:])
+        if order_id in book.orders:
+            self.open_ids.append(order_id)
+        return trades
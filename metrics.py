@@ -0,0 +1,256 @@
+import argparse
+import atexit
+import json
+import os
+import queue
+import random
+import sys
+import threading
+import time
+
+DEFAULT_RATE_LIMITS = {"burn": 200, "mint": 200}  # Events per second kept per type
+DETAIL_BOTS = 50  # Round events list every bot's holdings up to this many bots
+_STOP = object()
+
+
+class NDJSONSink:
+    """One JSON object per line through a large write buffer."""
+    def __init__(self, target, buffer_bytes=1 << 16):
+        self._owned = isinstance(target, str)
+        self.stream = open(target, "a", buffering=buffer_bytes) if self._owned else target
+
+    def write(self, record):
+        self.stream.write(json.dumps(record, default=str) + "\n")
+
+    def flush(self):
+        self.stream.flush()
+
+    def close(self):
+        if self._owned:
+            self.stream.close()
+        else:
+            self.stream.flush()
+
+
+def _format_round(r):
+    lines = [
+        f"\n=== Round {r['round']} ===",
+        f"Total Tokens in Circulation: {r['total_tokens']}",
+        f"Rare Tokens: {r['rare_tokens']} ({r['rare_tokens'] / max(r['total_tokens'], 1) * 100:.1f}%)",
+        f"Average Token Energy: {r['avg_energy']:.2f}",
+    ]
+    if "energy_quantiles" in r:
+        q = {float(k): v for k, v in r["energy_quantiles"].items()}
+        lines.append(f"Minted Energy p10/p50/p90: {q[0.1]:.0f}/{q[0.5]:.0f}/{q[0.9]:.0f} | "
+                     f"Holdings Gini: {r['holdings_gini']:.3f}")
+    lines.append("\nBot Behavior Distribution:")
+    lines += [f"  {behavior.capitalize()}: {count}" for behavior, count in r["behavior_counts"].items()]
+    if "bot_token_counts" in r:
+        lines.append("\nTokens per Bot:")
+        lines += [f"  {bot_id}: {count} tokens" for bot_id, count in r["bot_token_counts"].items()]
+    else:
+        lines.append("\nBots by Tokens Held:")
+        lines += [f"  {held} tokens: {bots} bots" for held, bots in sorted(r["holdings"].items(), key=lambda kv: int(kv[0]))]
+    lines.append("=" * 30)
+    return "\n".join(lines)
+
+
+def _format_tampered(r):
+    if r.get("withheld"):
+        return f"Token {r['tokens'][0]} was edited after minting: sale voided, no payout."
+    found = [f"{len(r['tokens'])} edited tokens" if r["tokens"] else "",
+             f"{r['unrecorded']} tokens missing from the ledger" if r["unrecorded"] else ""]
+    found += r["problems"]
+    return "Token ledger check failed: " + "; ".join(part for part in found if part)
+
+
+def _format_summary(r):
+    if not r["dropped"]:
+        return None
+    dropped = ", ".join(f"{name}: {count}" for name, count in r["dropped"].items())
+    return f"Metrics: {r['emitted']} events emitted, dropped {dropped}"
+
+
+CONSOLE_FORMATS = {
+    "round": _format_round,
+    "burn": lambda r: f"{r['bot']} burned a token to boost energy!\nBoost: +{r['boost']:.2f} energy!",
+    "mint": lambda r: "Legendary token minted!" if r.get("rare") else None,
+    "miss": lambda r: "Missed target! No token minted.",
+    "surge": lambda r: f"Price surged by {r['amount']}!",
+    "tampered": _format_tampered,
+    "summary": _format_summary,
+}
+
+
+class ConsoleView:
+    """Human-readable rendering of the event stream; unknown events are skipped."""
+    def __init__(self, stream=None, formats=None):
+        self.stream = stream or sys.stdout
+        self.formats = formats or CONSOLE_FORMATS
+
+    def write(self, record):
+        formatter = self.formats.get(record["event"])
+        text = formatter(record) if formatter is not None else None
+        if text is not None:
+            self.stream.write(text + "\n")
+
+    def flush(self):
+        self.stream.flush()
+
+    def close(self):
+        self.flush()
+
+
+class MetricsEmitter:
+    """Structured events handed to a background thread that serializes and writes them.
+
+    ``event`` is for high-frequency events: it applies per-type sampling
+    and token-bucket rate limits, and drops rather than blocks when the
+    queue is full. ``aggregate`` is for per-round summaries and is never
+    dropped. Callers pay for a dict and a queue put; JSON encoding, console
+    formatting and I/O all happen on the writer thread, flushed every
+    ``flush_interval`` seconds.
+    """
+    def __init__(self, sinks=(), sampling=None, rate_limits=None, flush_interval=0.5, max_queue=100_000):
+        self.sinks = list(sinks)
+        self.sampling = dict(sampling or {})
+        self.rate_limits = dict(DEFAULT_RATE_LIMITS if rate_limits is None else rate_limits)
+        self.flush_interval = flush_interval
+        self.emitted = 0
+        self.dropped = {}
+        self._buckets = {}  # event -> [tokens, last refill]
+        self._queue = queue.Queue(max_queue)
+        self._thread = None
+        if self.sinks:
+            self._thread = threading.Thread(target=self._run, name="metrics", daemon=True)
+            self._thread.start()
+
+    @classmethod
+    def to_file(cls, path=None, console=True, **kwargs):
+        """Emitter writing NDJSON to ``path`` (if given) plus the console view."""
+        sinks = [NDJSONSink(path)] if path else []
+        if console:
+            sinks.append(ConsoleView())
+        return cls(sinks, **kwargs)
+
+    def _drop(self, name):
+        self.dropped[name] = self.dropped.get(name, 0) + 1
+
+    def _allowed(self, name):
+        rate = self.sampling.get(name)
+        if rate is not None and random.random() >= rate:
+            return False
+        limit = self.rate_limits.get(name)
+        if limit is None:
+            return True
+        now = time.monotonic()
+        bucket = self._buckets.get(name)
+        if bucket is None:
+            bucket = self._buckets[name] = [limit, now]
+        bucket[0] = min(limit, bucket[0] + (now - bucket[1]) * limit)
+        bucket[1] = now
+        if bucket[0] < 1:
+            return False
+        bucket[0] -= 1
+        return True
+
+    def event(self, name, **fields):
+        """High-frequency event; may be sampled, rate limited or dropped under backpressure."""
+        if self._thread is None:
+            return
+        if not self._allowed(name):
+            self._drop(name)
+            return
+        if name in self.sampling:
+            fields["sample_rate"] = self.sampling[name]
+        try:
+            self._queue.put_nowait({"t": time.time(), "event": name, **fields})
+            self.emitted += 1
+        except queue.Full:
+            self._drop(name)
+
+    def aggregate(self, name, **fields):
+        """Low-frequency summary (e.g. one per round); always delivered."""
+        if self._thread is None:
+            return
+        self._queue.put({"t": time.time(), "event": name, **fields})
+        self.emitted += 1
+
+    def _run(self):
+        last_flush = time.monotonic()
+        while True:
+            try:
+                batch = [self._queue.get(timeout=self.flush_interval)]
+            except queue.Empty:
+                batch = []
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            stopping = False
+            for record in batch:
+                if record is _STOP:
+                    stopping = True
+                    continue
+                for sink in self.sinks:
+                    sink.write(record)
+            now = time.monotonic()
+            if stopping or now - last_flush >= self.flush_interval:
+                for sink in self.sinks:
+                    sink.flush()
+                last_flush = now
+            if stopping:
+                return
+
+    def close(self):
+        """Write a summary event, drain the queue and close the sinks."""
+        if self._thread is None:
+            return
+        self.aggregate("summary", emitted=self.emitted, dropped=dict(self.dropped))
+        self._queue.put(_STOP)
+        self._thread.join()
+        self._thread = None
+        for sink in self.sinks:
+            sink.close()
+
+
+_default = None
+
+
+def default_emitter():
+    """Process-wide emitter: console view, plus NDJSON when ``GASLITE_METRICS`` names a file."""
+    global _default
+    if _default is None:
+        _default = MetricsEmitter.to_file(os.environ.get("GASLITE_METRICS"),
+                                          console=os.environ.get("GASLITE_CONSOLE", "1") != "0")
+        atexit.register(_default.close)
+    return _default
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render or summarize an NDJSON metrics stream")
+    sub = parser.add_subparsers(dest="command", required=True)
+    view = sub.add_parser("view", help="print the console view of a stream")
+    view.add_argument("path")
+    counts = sub.add_parser("counts", help="count events by type")
+    counts.add_argument("path")
+    args = parser.parse_args()
+
+    with open(args.path) as f:
+        records = (json.loads(line) for line in f if line.strip())
+        if args.command == "view":
+            console = ConsoleView()
+            for record in records:
+                console.write(record)
+            console.flush()
+        else:
+            totals = {}
+            for record in records:
+                totals[record["event"]] = totals.get(record["event"], 0) + 1
+            for name, count in sorted(totals.items()):
+                print(f"{name:<12} {count}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,304 @@
+import argparse
+import json
+import struct
+import time
+
+from metrics import MetricsEmitter
+from sampling import EntropySource
+
+MAGIC = b"GRPL"
+VERSION = 1
+LENGTH = struct.Struct("<I")
+DOUBLE = struct.Struct("<d")
+CHUNK_BYTES = 1 << 16
+
+# Each record is a varint ``(value << 3) | op``; float ops carry a value of 0
+# followed by a little-endian double.
+OP_INT = 0     # randbelow / seed32 result
+OP_FLOAT = 1   # uniform result
+OP_TICK = 2    # frame dt
+OP_ACTION = 3  # bot index << 1 | holding after the change
+OP_ROUND = 4   # economy round number
+OP_CHECK = 5   # end-of-run checksum
+OP_NAMES = {OP_INT: "int", OP_FLOAT: "float", OP_TICK: "tick", OP_ACTION: "action",
+            OP_ROUND: "round", OP_CHECK: "check"}
+
+
+class ReplayDivergence(Exception):
+    """The replayed run asked for something other than what was recorded."""
+
+
+class RecordingSource(EntropySource):
+    """Live entropy that appends every draw and decision to a binary log.
+
+    Records are varint-packed into an in-memory buffer and written in 64 KiB
+    chunks, so a draw costs a few bytes and no system call.
+    """
+    def __init__(self, path, header):
+        self.path = path
+        self._file = open(path, "wb")
+        meta = json.dumps(dict(header, version=VERSION)).encode()
+        self._file.write(MAGIC + LENGTH.pack(len(meta)) + meta)
+        self._buffer = bytearray()
+        self.records = 0
+
+    def _written(self):
+        self.records += 1
+        if len(self._buffer) >= CHUNK_BYTES:
+            self._file.write(self._buffer)
+            self._buffer.clear()
+
+    def _int(self, op, value):
+        buffer = self._buffer
+        packed = (value << 3) | op
+        while packed > 0x7F:
+            buffer.append((packed & 0x7F) | 0x80)
+            packed >>= 7
+        buffer.append(packed)
+        self._written()
+        return value
+
+    def _float(self, op, value):
+        self._buffer.append(op)
+        self._buffer += DOUBLE.pack(value)
+        self._written()
+        return value
+
+    def randbelow(self, n):
+        return self._int(OP_INT, super().randbelow(n))
+
+    def uniform(self, a, b):
+        return self._float(OP_FLOAT, super().uniform(a, b))
+
+    def seed32(self):
+        return self._int(OP_INT, super().seed32())
+
+    def tick(self, dt):
+        self._float(OP_TICK, dt)
+
+    def action(self, bot, holding):
+        self._int(OP_ACTION, bot << 1 | holding)
+
+    def round(self, round_num):
+        self._int(OP_ROUND, round_num)
+
+    def check(self, value):
+        self._int(OP_CHECK, value)
+
+    def close(self):
+        if self._file.closed:
+            return
+        self._file.write(self._buffer)
+        self._buffer.clear()
+        self._file.close()
+
+
+class ReplaySource(EntropySource):
+    """Serves recorded draws back in order and verifies every recorded decision.
+
+    Any mismatch (a different draw bound, a bot acting at another tick, a
+    different checksum) raises ``ReplayDivergence`` with the record offset.
+    """
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            data = f.read()
+        if data[:4] != MAGIC:
+            raise ValueError(f"{path} is not a replay log")
+        (length,) = LENGTH.unpack_from(data, 4)
+        self.header = json.loads(data[8:8 + length])
+        if self.header.get("version") != VERSION:
+            raise ValueError(f"unsupported replay log version {self.header.get('version')}")
+        self._data = data
+        self._pos = 8 + length
+        self.records = 0
+
+    def _read(self):
+        data, pos = self._data, self._pos
+        if pos >= len(data):
+            raise ReplayDivergence(f"log ended after {self.records} records")
+        shift = value = 0
+        while True:
+            byte = data[pos]
+            pos += 1
+            value |= (byte & 0x7F) << shift
+            if byte < 0x80:
+                break
+            shift += 7
+        op = value & 7
+        if op == OP_FLOAT or op == OP_TICK:
+            (value,) = DOUBLE.unpack_from(data, pos)
+            pos += DOUBLE.size
+        else:
+            value >>= 3
+        self._pos = pos
+        self.records += 1
+        return op, value
+
+    def _expect(self, want):
+        op, value = self._read()
+        if op != want:
+            raise ReplayDivergence(f"record {self.records}: expected {OP_NAMES[want]}, log has {OP_NAMES.get(op, op)}")
+        return value
+
+    def randbelow(self, n):
+        value = self._expect(OP_INT)
+        if value >= n:
+            raise ReplayDivergence(f"record {self.records}: randbelow({n}) but log has {value}")
+        return value
+
+    def uniform(self, a, b):
+        value = self._expect(OP_FLOAT)
+        if not min(a, b) <= value <= max(a, b):
+            raise ReplayDivergence(f"record {self.records}: uniform({a}, {b}) but log has {value}")
+        return value
+
+    def seed32(self):
+        return self._expect(OP_INT)
+
+    def next_tick(self):
+        """Recorded dt of the next frame, or None once the frames run out."""
+        if self._pos >= len(self._data) or self._data[self._pos] & 7 != OP_TICK:
+            return None  # Ticks are single-byte tags, so one byte tells the op
+        return self._expect(OP_TICK)
+
+    def tick(self, dt):
+        pass  # The driver already consumed it through next_tick()
+
+    def _verify(self, op, value, what):
+        recorded = self._expect(op)
+        if recorded != value:
+            raise ReplayDivergence(f"record {self.records}: {what} {value}, log has {recorded}")
+
+    def action(self, bot, holding):
+        self._verify(OP_ACTION, bot << 1 | holding, "action")
+
+    def round(self, round_num):
+        self._verify(OP_ROUND, round_num, "round")
+
+    def check(self, value):
+        self._verify(OP_CHECK, value, "checksum")
+
+    def close(self):
+        if self._pos != len(self._data):
+            raise ReplayDivergence(f"{len(self._data) - self._pos} bytes left unreplayed")
+
+
+def _make_bots(count, rng):
+    from stress_testing import Bot
+    bots = [Bot(i, None, rng=rng) for i in range(count)]
+    for bot in bots:
+        bot.all_bots = bots
+    return bots
+
+
+def record_stress(path, bots=25, frames=3600, fps=60):
+    """Headless stress-test run with a fixed frame dt; returns the final total score."""
+    from stress_testing import BotScheduler, fleet_checksum
+    recorder = RecordingSource(path, {"kind": "stress", "bots": bots, "scheduler": True})
+    fleet = _make_bots(bots, recorder)
+    scheduler = BotScheduler(fleet)
+    for _ in range(frames):
+        scheduler.step(1 / fps, recorder)
+    recorder.check(fleet_checksum(fleet))
+    recorder.close()
+    return sum(bot.score for bot in fleet)
+
+
+def replay_stress(source):
+    """Re-run a stress log with no frame pacing; returns the number of frames."""
+    from stress_testing import BotScheduler, fleet_checksum, update_bots
+    fleet = _make_bots(source.header["bots"], source)
+    # Logs from before the scheduler were recorded with a full sweep every frame
+    step = BotScheduler(fleet).step if source.header.get("scheduler") else lambda dt, log: update_bots(fleet, dt, log)
+    frames = 0
+    dt = source.next_tick()
+    while dt is not None:
+        step(dt, source)
+        frames += 1
+        dt = source.next_tick()
+    source.check(fleet_checksum(fleet))
+    return frames
+
+
+def _run_rounds(sim, rounds, log):
+    for round_num in range(1, rounds + 1):
+        log.round(round_num)
+        for bot in sim.bots:
+            sim.bot_action(bot)
+        sim.round_num = round_num
+    log.check(len(sim.tokens))
+
+
+def record_economy(path, bots=10, rounds=20):
+    """``Botsimulation`` rounds against an in-memory DB; returns tokens minted."""
+    from Botsimulation import Simulation
+    recorder = RecordingSource(path, {"kind": "economy", "bots": bots, "rounds": rounds})
+    sim = Simulation(db_path=":memory:", rng=recorder, metrics=MetricsEmitter())
+    sim.create_bots(bots)
+    _run_rounds(sim, rounds, recorder)
+    recorder.close()
+    sim.close()
+    return len(sim.tokens)
+
+
+def replay_economy(source):
+    """Re-run an economy log; returns the number of rounds."""
+    from Botsimulation import Simulation
+    sim = Simulation(db_path=":memory:", rng=source, metrics=MetricsEmitter())
+    sim.create_bots(source.header["bots"])
+    _run_rounds(sim, source.header["rounds"], source)
+    sim.close()
+    return source.header["rounds"]
+
+
+def replay(path):
+    """Replay a log of either kind as fast as possible; returns ``(header, steps, records, seconds)``."""
+    source = ReplaySource(path)
+    start = time.perf_counter()
+    if source.header["kind"] == "stress":
+        steps = replay_stress(source)
+    elif source.header["kind"] == "economy":
+        steps = replay_economy(source)
+    else:
+        raise ValueError(f"unknown log kind {source.header['kind']!r}")
+    source.close()
+    return source.header, steps, source.records, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Record and deterministically replay bot runs")
+    sub = parser.add_subparsers(dest="command", required=True)
+    stress = sub.add_parser("record-stress", help="record a headless stress-test run")
+    stress.add_argument("log")
+    stress.add_argument("--bots", type=int, default=25)
+    stress.add_argument("--frames", type=int, default=3600)
+    stress.add_argument("--fps", type=int, default=60)
+    economy = sub.add_parser("record-economy", help="record Botsimulation rounds")
+    economy.add_argument("log")
+    economy.add_argument("--bots", type=int, default=10)
+    economy.add_argument("--rounds", type=int, default=20)
+    play = sub.add_parser("replay", help="replay a log headless and verify it")
+    play.add_argument("log")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    if args.command == "record-stress":
+        score = record_stress(args.log, args.bots, args.frames, args.fps)
+        print(f"Recorded {args.frames} frames of {args.bots} bots in {time.perf_counter() - start:.2f}s "
+              f"(total score {score})")
+    elif args.command == "record-economy":
+        tokens = record_economy(args.log, args.bots, args.rounds)
+        print(f"Recorded {args.rounds} rounds of {args.bots} bots in {time.perf_counter() - start:.2f}s "
+              f"({tokens} tokens)")
+    else:
+        try:
+            header, steps, records, elapsed = replay(args.log)
+        except ReplayDivergence as e:
+            raise SystemExit(f"Replay diverged: {e}")
+        unit = "frames" if header["kind"] == "stress" else "rounds"
+        print(f"Replayed {steps} {unit} / {records} records in {elapsed:.2f}s "
+              f"({steps / elapsed:.0f} {unit}/s, {records / elapsed:.0f} records/s) - identical")
+
+
+if __name__ == "__main__":
+    main()
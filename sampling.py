@@ -0,0 +1,162 @@
+import math
+import os
+import random
+import secrets
+from collections import Counter
+from functools import lru_cache
+
+
+class EntropySource:
+    """Where game code gets its randomness; subclasses can record or replay draws.
+
+    The live source keeps the original mix: ``secrets`` for integers and
+    ``random`` for floats.
+    """
+    def randbelow(self, n):
+        return secrets.randbelow(n)
+
+    def uniform(self, a, b):
+        return random.uniform(a, b)
+
+    def choice(self, seq):
+        return seq[self.randbelow(len(seq))]
+
+    def seed32(self):
+        """32-bit seed from fresh OS entropy, e.g. for ``np.random.RandomState``."""
+        return int.from_bytes(os.urandom(16), 'big') % (2**32)
+
+
+LIVE_ENTROPY = EntropySource()
+
+
+class SeededEntropy(EntropySource):
+    """Repeatable draws from one ``random.Random(seed)``, e.g. for sweeps and benchmarks."""
+    def __init__(self, seed):
+        self.random = random.Random(seed)
+
+    def randbelow(self, n):
+        return self.random.randrange(n)
+
+    def uniform(self, a, b):
+        return self.random.uniform(a, b)
+
+    def seed32(self):
+        return self.random.getrandbits(32)
+
+
+class AliasSampler:
+    """Walker/Vose alias table for O(1) draws from a fixed discrete distribution.
+
+    Weights are integers so the table is exact: each sample costs a single
+    ``randbelow(n * total)`` draw, split into a column index and a coin.
+    """
+    def __init__(self, values, weights, randbelow=secrets.randbelow):
+        self.values = list(values)
+        weights = [int(w) for w in weights]
+        if len(self.values) != len(weights) or not self.values:
+            raise ValueError("values and weights must be non-empty and the same length")
+        if any(w < 0 for w in weights) or sum(weights) == 0:
+            raise ValueError("weights must be non-negative with a positive total")
+        self.randbelow = randbelow
+        self.total = sum(weights)
+        self.threshold, self.alias = self._build(weights, self.total)
+        self._span = len(self.values) * self.total
+
+    @classmethod
+    def uniform(cls, values, randbelow=secrets.randbelow):
+        """Sampler giving every value the same probability."""
+        values = list(values)
+        return cls(values, [1] * len(values), randbelow=randbelow)
+
+    @classmethod
+    def from_counts(cls, counts, randbelow=secrets.randbelow):
+        """Sampler over a ``{value: count}`` mapping (e.g. a Counter)."""
+        values = list(counts)
+        return cls(values, [counts[v] for v in values], randbelow=randbelow)
+
+    @staticmethod
+    def _build(weights, total):
+        """Vose's construction with columns scaled to ``total`` units each."""
+        n = len(weights)
+        scaled = [w * n for w in weights]
+        threshold = [total] * n
+        alias = list(range(n))
+        small = [i for i, s in enumerate(scaled) if s < total]
+        large = [i for i, s in enumerate(scaled) if s >= total]
+        while small and large:
+            s, l = small.pop(), large.pop()
+            threshold[s] = scaled[s]
+            alias[s] = l
+            scaled[l] -= total - scaled[s]
+            (small if scaled[l] < total else large).append(l)
+        return threshold, alias
+
+    def sample(self, randbelow=None):
+        """Draw one value: one random integer, one table lookup.
+
+        ``randbelow`` overrides the sampler's source for this draw, so a
+        caller's ``EntropySource`` can see every draw.
+        """
+        column, coin = divmod((randbelow or self.randbelow)(self._span), self.total)
+        if coin < self.threshold[column]:
+            return self.values[column]
+        return self.values[self.alias[column]]
+
+    def probabilities(self):
+        """Return ``{value: probability}`` reconstructed from the table."""
+        mass = Counter()
+        n = len(self.values)
+        for i in range(n):
+            mass[self.values[i]] += self.threshold[i]
+            mass[self.values[self.alias[i]]] += self.total - self.threshold[i]
+        return {v: m / (n * self.total) for v, m in mass.items()}
+
+
+def chaos_factor(a, b, c, d):
+    """Clamped dominant eigenvalue of the 2x2 matrix [[a, b], [c, d]]."""
+    trace = a + d
+    det = a * d - b * c
+    discriminant = trace**2 - 4 * det
+    if discriminant < 0:
+        return 1.0
+    eig1 = (trace + math.sqrt(discriminant)) / 2
+    return max(0.5, min(2.0, eig1 / 5))
+
+
+@lru_cache(maxsize=None)
+def chaos_distribution():
+    """Exact outcome counts of ``chaos_factor`` over all 10^4 matrices with entries 1-10."""
+    entries = range(1, 11)
+    return Counter(chaos_factor(a, b, c, d) for a in entries for b in entries for c in entries for d in entries)
+
+
+@lru_cache(maxsize=None)
+def chaos_sampler():
+    """Shared alias sampler equivalent to drawing four ``secrets.randbelow(10) + 1`` entries."""
+    return AliasSampler.from_counts(chaos_distribution())
+
+
+DANK_SOUNDBITES = ["*boop*", "*yeet*", "*bruh*", "*womp*", "*vibes*"]
+
+
+def uniform_samplers(choices):
+    """``{key: sampler}`` drawing uniformly from each list in ``choices``, e.g. feedback lines per outcome."""
+    return {key: AliasSampler.uniform(values) for key, values in choices.items()}
+
+
+@lru_cache(maxsize=None)
+def soundbite_sampler():
+    """Shared sampler over ``DANK_SOUNDBITES``."""
+    return AliasSampler.uniform(DANK_SOUNDBITES)
+
+
+@lru_cache(maxsize=None)
+def power_step_sampler():
+    """Shared sampler for the power a charge tick adds: 5-30, uniform."""
+    return AliasSampler.uniform(range(5, 31))
+
+
+@lru_cache(maxsize=None)
+def temperature_step_sampler():
+    """Shared sampler for the heat a charge tick adds: 0.02-0.30 in steps of 0.01."""
+    return AliasSampler.uniform([step / 100 + 0.02 for step in range(29)])
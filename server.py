@@ -0,0 +1,377 @@
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import queue
+import secrets
+import sqlite3
+import time
+
+import tokendb
+from ledger import Ledger
+from market import OrderBook
+
+TICK_INTERVAL = 0.05  # Same cadence as the Kivy charge_up timer
+MAX_TOKENS = 5
+
+
+class TokenStorePool:
+    """Pool of SQLite connections shared by every session.
+
+    Mints are queued and flushed in batches by a single writer task, one
+    transaction per batch, so sessions never wait on disk inside a tick.
+    Each batch is appended to the token ledger in the same transaction, as
+    Gaslite's own saves are.
+    """
+    def __init__(self, path="tokens.db", size=4):
+        self.path = path
+        self.size = size
+        self._pool = queue.SimpleQueue()
+        self._pending = []
+        self._flush_needed = None
+        self._writer = None
+        self.rows_written = 0
+        self._ledgers = {}  # Pooled connection -> its Ledger, made on the connection's first flush
+        for _ in range(size):
+            self._pool.put(self._connect())
+        self.run_sync(self._create_schema)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    @staticmethod
+    def _create_schema(conn):
+        tokendb.setup(conn, tokendb.GASLITE)
+
+    def run_sync(self, fn, *args):
+        conn = self._pool.get()
+        try:
+            return fn(conn, *args)
+        finally:
+            self._pool.put(conn)
+
+    async def run(self, fn, *args):
+        """Run ``fn(conn, *args)`` on a pooled connection in a worker thread."""
+        return await asyncio.get_running_loop().run_in_executor(None, self.run_sync, fn, *args)
+
+    def start(self):
+        self._flush_needed = asyncio.Event()
+        self._writer = asyncio.create_task(self._write_loop())
+
+    def queue_token(self, token, level):
+        self._pending.append((token["sigma_x"], token["sigma_y"], token["sigma_z"],
+                              int(token["metadata"]["rare"]), level))
+        self._flush_needed.set()
+
+    def _insert_many(self, conn, rows):
+        ledger = self._ledgers.get(conn)
+        if ledger is None:
+            ledger = self._ledgers[conn] = Ledger(conn, tokendb.GASLITE)
+        with conn:
+            cursor = conn.cursor()
+            ids = []
+            for row in rows:  # One at a time for the row ids the ledger needs
+                cursor.execute(tokendb.INSERT[tokendb.GASLITE], row)
+                ids.append(cursor.lastrowid)
+            ledger.append((token_id, *row) for token_id, row in zip(ids, rows))
+        return len(rows)
+
+    async def _write_loop(self):
+        while True:
+            await self._flush_needed.wait()
+            self._flush_needed.clear()
+            await self.flush()
+
+    async def flush(self):
+        rows, self._pending = self._pending, []
+        if rows:
+            self.rows_written += await self.run(self._insert_many, rows)
+
+    async def close(self):
+        if self._writer is not None:
+            self._writer.cancel()
+            try:
+                await self._writer
+            except asyncio.CancelledError:
+                pass
+        await self.flush()
+        for _ in range(self.size):
+            self._pool.get().close()
+
+
+class SharedTicker:
+    """One task ticking every charging session; idle sessions are never visited."""
+    def __init__(self, interval=TICK_INTERVAL):
+        self.interval = interval
+        self.active = set()
+        self.ticks = 0
+        self._wake = asyncio.Event()
+
+    def add(self, session):
+        self.active.add(session)
+        self._wake.set()
+
+    def discard(self, session):
+        self.active.discard(session)
+
+    async def run(self):
+        last = time.monotonic()
+        while True:
+            if not self.active:
+                # Fully idle: sleep until a session starts charging
+                self._wake.clear()
+                await self._wake.wait()
+                last = time.monotonic()
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            dt, last = now - last, now
+            self.ticks += 1
+            for session in list(self.active):
+                session.charge_up(dt)
+
+
+class GaslightSession:
+    """Headless port of ``GaslightTokenWidget``: same rules, no Kivy."""
+    def __init__(self, session_id, server):
+        self.id = session_id
+        self.server = server
+        self.real_target = secrets.randbelow(601) + 300
+        self.fake_target = self.real_target + secrets.randbelow(201) - 100
+        self.player_power = 0
+        self.tokens = []
+        self.holding = False
+        self.hold_time = 0
+        self.temperature = 30
+        self.max_temperature = 70
+        self.wallet = 1000
+        self.level = 1
+        self.last_result = None
+
+    @property
+    def book(self):
+        return self.server.book
+
+    def start_action(self):
+        if not self.holding:
+            self.holding = True
+            self.hold_time = 0
+            self.server.ticker.add(self)
+
+    def stop_action(self):
+        if not self.holding:
+            return None
+        self.holding = False
+        self.server.ticker.discard(self)
+        real_diff = abs(self.real_target - self.player_power)
+        if real_diff < 150:
+            self.mint_token(real_diff)
+        self.reset_round()
+        self.last_result = f"Hold: {self.hold_time:.2f}s, Diff: {real_diff}"
+        return self.last_result
+
+    def charge_up(self, dt):
+        self.hold_time += dt
+        self.player_power = min(1000, self.player_power + secrets.randbelow(21) + 10)
+        self.temperature = min(self.max_temperature, self.temperature + secrets.randbelow(5) / 10 + 0.1)
+        if self.temperature >= self.max_temperature:
+            self.book.token_price -= 10
+            self.stop_action()
+
+    def mint_token(self, real_diff):
+        import numpy as np  # Deferred so the server and load generator start fast
+        entropy_seed = os.urandom(16)
+        seed_value = int.from_bytes(entropy_seed, 'big') % (2**32)
+        sigma_matrix = np.random.RandomState(seed=seed_value).rand(3, 3)
+        eigenvalues = np.linalg.eigvals(sigma_matrix)
+        sigma_x, sigma_y, sigma_z = [float(val.real) for val in eigenvalues.round(2)]
+        rare = real_diff < 10
+        metadata = {"sigma_x": sigma_x, "sigma_y": sigma_y, "sigma_z": sigma_z, "rare": rare, "level": self.level}
+        token = {"sigma_x": sigma_x, "sigma_y": sigma_y, "sigma_z": sigma_z, "metadata": metadata}
+        self.tokens.append(token)
+        self.book.token_price += secrets.randbelow(6)
+        self.server.store.queue_token(token, self.level)
+
+    def buy_token(self):
+        if self.wallet >= self.book.token_price and len(self.tokens) < MAX_TOKENS:
+            price = self.book.token_price
+            self.mint_token(150)
+            self.wallet -= price
+            self.book.token_price += secrets.randbelow(21) - 10
+            return True
+        return False
+
+    def sell_token(self):
+        if not self.tokens:
+            return False
+        self.tokens.pop(0)
+        self.wallet += self.book.token_price
+        if secrets.randbelow(100) < 10:  # 10% surge chance
+            self.book.token_price += int(self.book.token_price * (secrets.randbelow(11) + 5) / 100)
+        else:
+            self.book.token_price += secrets.randbelow(21) - 10
+        self.book.token_price = max(10, self.book.token_price)
+        return True
+
+    def reset_round(self):
+        self.player_power = 0
+        self.temperature = 30
+        self.real_target = secrets.randbelow(601) + 300
+        self.fake_target = self.real_target + secrets.randbelow(201) - 100
+        if len(self.tokens) % 5 == 0 and self.tokens:
+            self.level += 1
+            self.real_target = max(300, self.real_target - 50)
+
+    def state(self):
+        return {
+            "session": self.id,
+            "wallet": self.wallet,
+            "price": self.book.token_price,
+            "power": self.player_power,
+            "temperature": round(self.temperature, 1),
+            "holding": self.holding,
+            "level": self.level,
+            "tokens": len(self.tokens),
+            "fake_target": self.fake_target,
+        }
+
+
+class GameServer:
+    """Newline-delimited JSON over TCP, one headless session per connection.
+
+    Requests look like ``{"op": "charge", "id": 1}`` with ops ``charge``,
+    ``release``, ``buy``, ``sell`` and ``state``; every reply echoes ``id``
+    and carries ``ok`` plus the session state.
+    """
+    def __init__(self, host="127.0.0.1", port=8765, db_path="tokens.db", pool_size=4):
+        self.host = host
+        self.port = port
+        self.store = TokenStorePool(db_path, pool_size)
+        self.book = OrderBook()
+        self.ticker = None
+        self.sessions = {}
+        self.requests = 0
+        self._ids = itertools.count(1)
+        self._server = None
+        self._tasks = []
+
+    async def start(self):
+        self.ticker = SharedTicker()
+        self.store.start()
+        self._tasks.append(asyncio.create_task(self.ticker.run()))
+        self._server = await asyncio.start_server(self.handle_client, self.host, self.port, limit=2**16)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def serve_forever(self):
+        await self._server.serve_forever()
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        for task in self._tasks:
+            task.cancel()
+        await self.store.close()
+
+    def dispatch(self, session, request):
+        op = request.get("op")
+        reply = {"id": request.get("id"), "ok": True}
+        if op == "charge":
+            session.start_action()
+        elif op == "release":
+            reply["result"] = session.stop_action()
+            reply["ok"] = reply["result"] is not None
+        elif op == "buy":
+            reply["ok"] = session.buy_token()
+        elif op == "sell":
+            reply["ok"] = session.sell_token()
+        elif op != "state":
+            reply.update(ok=False, error=f"unknown op: {op}")
+        reply.update(session.state())
+        return reply
+
+    async def handle_client(self, reader, writer):
+        session = GaslightSession(next(self._ids), self)
+        self.sessions[session.id] = session
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except (ValueError, asyncio.LimitOverrunError) as e:
+                    # Over the stream limit; the rest of the line is still unread, so give up on the connection
+                    writer.write(json.dumps({"ok": False, "error": f"bad request: {e}"}).encode() + b"\n")
+                    await writer.drain()
+                    break
+                if not line:
+                    break
+                self.requests += 1
+                try:
+                    reply = self.dispatch(session, json.loads(line))
+                except (ValueError, AttributeError) as e:
+                    reply = {"ok": False, "error": f"bad request: {e}"}
+                writer.write(json.dumps(reply).encode() + b"\n")
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self.ticker.discard(session)
+            del self.sessions[session.id]
+            writer.close()
+
+
+class GameClient:
+    """Minimal asyncio client for the ``GameServer`` protocol."""
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self._ids = itertools.count(1)
+
+    @classmethod
+    async def connect(cls, host="127.0.0.1", port=8765):
+        reader, writer = await asyncio.open_connection(host, port)
+        return cls(reader, writer)
+
+    async def request(self, op):
+        self.writer.write(json.dumps({"op": op, "id": next(self._ids)}).encode() + b"\n")
+        await self.writer.drain()
+        line = await self.reader.readline()
+        if not line:
+            raise ConnectionError("server closed the connection")
+        return json.loads(line)
+
+    async def close(self):
+        self.writer.close()
+        try:
+            await self.writer.wait_closed()
+        except ConnectionError:
+            pass
+
+
+async def serve(host, port, db_path, pool_size):
+    server = await GameServer(host, port, db_path, pool_size).start()
+    print(f"Gaslight server listening on {host}:{server.port}")
+    try:
+        await server.serve_forever()
+    finally:
+        await server.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless multi-session Gaslight game server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--db", default="tokens.db")
+    parser.add_argument("--pool-size", type=int, default=4)
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.host, args.port, args.db, args.pool_size))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
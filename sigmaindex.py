@@ -0,0 +1,213 @@
+import math
+import os
+
+import numpy as np
+
+VERSION = 1
+DEFAULT_CELL = 0.05  # Sigmas are rounded to 0.01 and mostly lie within [-1, 3]
+BIAS = 1 << 20  # Cell coordinates are offset so they pack into 21 bits each
+MIN_DELTA = 1024
+
+
+def sigma_vector(sigmas):
+    """Real parts of a token's three sigmas, the coordinates the index works in."""
+    return [float(getattr(value, "real", value)) for value in sigmas]
+
+
+def _ranges(starts, stops):
+    """Concatenation of ``arange(start, stop)`` for each pair, without a Python loop."""
+    lengths = stops - starts
+    keep = lengths > 0
+    starts, lengths = starts[keep], lengths[keep]
+    if not len(starts):
+        return np.empty(0, dtype=np.int64)
+    ends = np.cumsum(lengths)
+    steps = np.ones(ends[-1], dtype=np.int64)
+    steps[0] = starts[0]
+    steps[ends[:-1]] = starts[1:] - (starts[:-1] + lengths[:-1]) + 1
+    return np.cumsum(steps)
+
+
+class SigmaIndex:
+    """Grid-bucket index over token sigma vectors for k-NN and radius queries.
+
+    Points live in arrays sorted by packed cell key, so a query reads the
+    cells around it with a handful of ``searchsorted`` calls and measures
+    only those candidates. New tokens land in a small unsorted delta that
+    every query scans; once it outgrows ``4 * sqrt(n)`` it is merged in with
+    one linear pass, so inserts cost amortized O(sqrt(n)) copies of 40 bytes.
+    """
+    def __init__(self, cell=DEFAULT_CELL, path=None):
+        self.cell = cell
+        self.path = path
+        self._keys = np.empty(0, dtype=np.int64)
+        self._ids = np.empty(0, dtype=np.int64)
+        self._points = np.empty((0, 3))
+        self._delta_ids = np.empty(MIN_DELTA, dtype=np.int64)
+        self._delta_points = np.empty((MIN_DELTA, 3))
+        self._delta = 0
+        self._lo = np.full(3, BIAS, dtype=np.int64)  # Occupied cell bounds, for stopping a search
+        self._hi = np.full(3, -BIAS, dtype=np.int64)
+
+    @classmethod
+    def open(cls, path, cell=DEFAULT_CELL):
+        """Load the index saved at ``path``, or start an empty one that will save there."""
+        index = cls(cell, path)
+        if path is None or not os.path.exists(path):
+            return index
+        with np.load(path) as data:
+            if int(data["version"]) != VERSION:
+                raise ValueError(f"{path} has unsupported sigma index version {int(data['version'])}")
+            index.cell = float(data["cell"])
+            index._keys, index._ids, index._points = data["keys"], data["ids"], data["points"]
+        if len(index._ids):
+            cells = index._cells(index._points)
+            index._lo, index._hi = cells.min(axis=0), cells.max(axis=0)
+        return index
+
+    def __len__(self):
+        return len(self._ids) + self._delta
+
+    @property
+    def max_id(self):
+        ids = [self._ids.max()] if len(self._ids) else []
+        if self._delta:
+            ids.append(self._delta_ids[:self._delta].max())
+        return int(max(ids)) if ids else 0
+
+    def _cells(self, points):
+        return np.floor(np.asarray(points) / self.cell).astype(np.int64)
+
+    @staticmethod
+    def _pack(cells):
+        cells = cells + BIAS
+        return (cells[..., 0] << 42) | (cells[..., 1] << 21) | cells[..., 2]
+
+    def add(self, token_id, sigmas):
+        point = sigma_vector(sigmas)
+        if self._delta == len(self._delta_ids):
+            if self._delta >= max(MIN_DELTA, 4 * math.isqrt(len(self._ids))):
+                self._merge()
+            else:
+                self._delta_ids = np.resize(self._delta_ids, 2 * self._delta)
+                self._delta_points = np.resize(self._delta_points, (2 * self._delta, 3))
+        self._delta_ids[self._delta] = token_id
+        self._delta_points[self._delta] = point
+        self._delta += 1
+        cell = [math.floor(v / self.cell) for v in point]
+        self._lo = np.minimum(self._lo, cell)
+        self._hi = np.maximum(self._hi, cell)
+
+    def _merge(self):
+        if not self._delta:
+            return
+        points = self._delta_points[:self._delta]
+        keys = self._pack(self._cells(points))
+        order = np.argsort(keys, kind="stable")
+        at = np.searchsorted(self._keys, keys[order], side="right")
+        self._keys = np.insert(self._keys, at, keys[order])
+        self._ids = np.insert(self._ids, at, self._delta_ids[:self._delta][order])
+        self._points = np.insert(self._points, at, points[order], axis=0)
+        self._delta = 0
+
+    def truncate(self, max_id):
+        """Drop tokens with ids above ``max_id``, e.g. rows deleted by a checkpoint restore."""
+        self._merge()
+        keep = self._ids <= max_id
+        if not keep.all():
+            self._keys, self._ids, self._points = self._keys[keep], self._ids[keep], self._points[keep]
+
+    def sync(self, db_max_id, rows_after):
+        """Match the token table: forget ids past ``db_max_id``, then add the rows minted since the last save.
+
+        ``rows_after(max_id)`` yields ``(id, sigma_x, sigma_y, sigma_z)`` for ids above ``max_id``.
+        """
+        self.truncate(db_max_id)
+        for token_id, *sigmas in rows_after(self.max_id):
+            self.add(token_id, sigmas)
+
+    def _ball(self, query, radius):
+        """Indices of sorted points in cells that intersect the ball of ``radius`` around ``query``."""
+        if not len(self._keys):
+            return np.empty(0, dtype=np.int64)
+        c = self.cell
+        radius += 1e-9  # Points are bucketed by floor(p / cell); don't lose edge points to rounding
+        lo = np.maximum(np.floor((query - radius) / c).astype(np.int64), self._lo)
+        hi = np.minimum(np.floor((query + radius) / c).astype(np.int64), self._hi)
+        if (lo > hi).any():
+            return np.empty(0, dtype=np.int64)
+        xs, ys = np.meshgrid(np.arange(lo[0], hi[0] + 1), np.arange(lo[1], hi[1] + 1), indexing="ij")
+        xs, ys = xs.ravel(), ys.ravel()
+        # Each (x, y) column only needs the z cells the ball reaches at that column's nearest point
+        dx = np.maximum(0, np.maximum(xs * c - query[0], query[0] - (xs + 1) * c))
+        dy = np.maximum(0, np.maximum(ys * c - query[1], query[1] - (ys + 1) * c))
+        reach = radius * radius - dx * dx - dy * dy
+        inside = reach >= 0
+        xs, ys, reach = xs[inside], ys[inside], np.sqrt(reach[inside])
+        zlo = np.maximum(np.floor((query[2] - reach) / c).astype(np.int64), lo[2])
+        zhi = np.minimum(np.floor((query[2] + reach) / c).astype(np.int64), hi[2])
+        starts = np.searchsorted(self._keys, self._pack(np.stack([xs, ys, zlo], axis=1)), side="left")
+        stops = np.searchsorted(self._keys, self._pack(np.stack([xs, ys, zhi], axis=1)), side="right")
+        return _ranges(starts, stops)
+
+    @staticmethod
+    def _distance2(points, query):
+        diff = points - query
+        return np.einsum("ij,ij->i", diff, diff)
+
+    def _candidates(self, query, radius):
+        """Ids and squared distances of every point that may lie within ``radius``."""
+        found = self._ball(query, radius)
+        ids = np.concatenate([self._ids[found], self._delta_ids[:self._delta]])
+        dist2 = np.concatenate([self._distance2(self._points[found], query),
+                                self._distance2(self._delta_points[:self._delta], query)])
+        return ids, dist2
+
+    def knn(self, sigmas, k=8):
+        """Ids and distances of the ``k`` tokens closest to ``sigmas``, nearest first."""
+        query = np.asarray(sigma_vector(sigmas))
+        k = min(k, len(self))
+        if not k:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        # Past this radius the ball holds every occupied cell
+        span = np.maximum(np.abs(query - self._lo * self.cell), np.abs(query - (self._hi + 1) * self.cell))
+        limit = math.sqrt(span.dot(span))
+        radius = self.cell
+        while True:
+            ids, dist2 = self._candidates(query, radius)
+            if len(dist2) >= k:
+                nearest = np.argpartition(dist2, k - 1)[:k]
+                kth = math.sqrt(dist2[nearest].max())
+                if kth <= radius or radius >= limit:
+                    order = nearest[np.argsort(dist2[nearest], kind="stable")]
+                    return ids[order], np.sqrt(dist2[order])
+                # k candidates lie within kth, so a ball that wide holds the true k nearest
+                radius = kth
+            else:
+                radius = min(radius * 2, limit)
+
+    def radius(self, sigmas, radius):
+        """Ids and distances of every token within ``radius`` of ``sigmas``, nearest first."""
+        query = np.asarray(sigma_vector(sigmas))
+        ids, dist2 = self._candidates(query, radius)
+        inside = np.flatnonzero(dist2 <= radius * radius)
+        order = inside[np.argsort(dist2[inside], kind="stable")]
+        return ids[order], np.sqrt(dist2[order])
+
+    def rarity(self, sigmas, k=8):
+        """Distance from ``sigmas`` to its ``k``-th nearest token; larger is rarer, None while the index is small."""
+        if len(self) < k:
+            return None
+        _, dist = self.knn(sigmas, k)
+        return float(dist[-1])
+
+    def save(self, path=None):
+        """Write the index atomically next to its database; a no-op for in-memory databases."""
+        path = path or self.path
+        if path is None:
+            return
+        self._merge()
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            np.savez(f, version=VERSION, cell=self.cell, keys=self._keys, ids=self._ids, points=self._points)
+        os.replace(tmp, path)
@@ -0,0 +1,162 @@
+import math
+import random
+
+DEFAULT_K = 200
+DECAY = 2 / 3  # Capacity shrink per level below the top (the KLL "c")
+
+
+class KLLSketch:
+    """Mergeable streaming quantile sketch (Karnin, Lang & Liberty).
+
+    Level ``h`` holds items of weight ``2**h``. When the sketch is over
+    capacity, the lowest full level is sorted and every other item (random
+    offset) is promoted, so memory stays O(k) for any stream length and
+    the rank error is roughly 1.7/k. Sketches built on different bots,
+    rounds or processes merge into one with the same guarantee.
+    """
+    def __init__(self, k=DEFAULT_K, seed=None):
+        self.k = k
+        self.levels = [[]]
+        self.count = 0
+        self.min = math.inf
+        self.max = -math.inf
+        self._size = 0
+        self._capacity = self._level_capacities()
+        self._rng = random.Random(seed)
+
+    def _level_capacities(self):
+        top = len(self.levels) - 1
+        caps = [max(2, int(math.ceil(self.k * DECAY ** (top - h)))) for h in range(len(self.levels))]
+        self._max_size = sum(caps)
+        return caps
+
+    def __len__(self):
+        """Items retained, not items seen (that is ``count``)."""
+        return self._size
+
+    def update(self, value):
+        self.levels[0].append(value)
+        self.count += 1
+        self._size += 1
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+        if self._size >= self._max_size:
+            self._compress()
+
+    def update_many(self, values):
+        values = [float(v) for v in values]
+        if not values:
+            return
+        self.levels[0].extend(values)
+        self.count += len(values)
+        self._size += len(values)
+        self.min = min(self.min, min(values))
+        self.max = max(self.max, max(values))
+        self._compress()
+
+    def _compress(self):
+        while self._size >= self._max_size:
+            for h, items in enumerate(self.levels):
+                if len(items) >= self._capacity[h]:
+                    break
+            else:
+                return
+            if h + 1 == len(self.levels):
+                self.levels.append([])
+                self._capacity = self._level_capacities()
+            items.sort()
+            # An odd item out stays behind so weights are conserved exactly
+            keep = [items.pop()] if len(items) % 2 else []
+            promoted = items[self._rng.getrandbits(1)::2]
+            self.levels[h + 1].extend(promoted)
+            self.levels[h] = keep
+            self._size -= len(items) - len(promoted)
+
+    def merge(self, other):
+        """Fold ``other`` into this sketch in place; returns ``self``."""
+        while len(self.levels) < len(other.levels):
+            self.levels.append([])
+        for h, items in enumerate(other.levels):
+            self.levels[h].extend(items)
+        self._capacity = self._level_capacities()
+        self.count += other.count
+        self._size += len(other)
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._compress()
+        return self
+
+    def copy(self):
+        clone = KLLSketch(self.k)
+        clone.merge(self)
+        return clone
+
+    def weighted(self):
+        """Retained ``(value, weight)`` pairs sorted by value."""
+        pairs = [(v, 1 << h) for h, items in enumerate(self.levels) for v in items]
+        pairs.sort()
+        return pairs
+
+    def quantiles(self, qs):
+        """Approximate values at each fraction in ``qs``; NaN when empty."""
+        if not self.count:
+            return [math.nan for _ in qs]
+        pairs = self.weighted()
+        total = sum(w for _, w in pairs)
+        out = []
+        for q in qs:
+            if q <= 0:
+                out.append(self.min)
+                continue
+            if q >= 1:
+                out.append(self.max)
+                continue
+            target, seen = q * total, 0
+            for value, weight in pairs:
+                seen += weight
+                if seen >= target:
+                    out.append(value)
+                    break
+        return out
+
+    def quantile(self, q):
+        return self.quantiles([q])[0]
+
+    def rank(self, value):
+        """Approximate fraction of the stream that is ``<= value``."""
+        if not self.count:
+            return math.nan
+        pairs = self.weighted()
+        return sum(w for v, w in pairs if v <= value) / sum(w for _, w in pairs)
+
+    def gini(self):
+        """Gini coefficient of the sketched values (e.g. tokens held per bot)."""
+        pairs = self.weighted()
+        total_weight = sum(w for _, w in pairs)
+        total_value = sum(v * w for v, w in pairs)
+        if not total_weight or total_value <= 0:
+            return 0.0
+        # Area under the Lorenz curve by trapezoids over the weighted points
+        area, running = 0.0, 0.0
+        for value, weight in pairs:
+            before = running
+            running += value * weight / total_value
+            area += weight / total_weight * (before + running) / 2
+        return 1 - 2 * area
+
+    def to_dict(self):
+        """JSON-ready form for shipping a shard's sketch to another process."""
+        return {"k": self.k, "count": self.count, "min": self.min, "max": self.max, "levels": self.levels}
+
+    @classmethod
+    def from_dict(cls, data):
+        sketch = cls(data["k"])
+        sketch.levels = [list(items) for items in data["levels"]]
+        sketch.count = data["count"]
+        sketch.min = data["min"]
+        sketch.max = data["max"]
+        sketch._size = sum(len(items) for items in sketch.levels)
+        sketch._capacity = sketch._level_capacities()
+        return sketch
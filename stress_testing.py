@@ -0,0 +1,527 @@
+import heapq
+import time
+import os
+from collections import deque, namedtuple
+from sampling import (LIVE_ENTROPY, chaos_sampler, power_step_sampler, soundbite_sampler,
+                      temperature_step_sampler, uniform_samplers)
+
+# pygame is imported by init_display() so Bot stays importable headless
+pygame = None
+
+# Constants
+WIDTH, HEIGHT = 1200, 800
+BOT_COUNT = 10  # Number of bots
+BOT_WIDTH = WIDTH // 5
+FPS = 60
+LEARNING_RATE = 0.1  # How quickly bots adapt to top performers
+RANDOMNESS = 0.2  # Random variation in bot decisions
+TOP_TILES = 10  # Tiles still drawn once the governor falls back to top-N
+DENSE_THRESHOLD = 50  # Above this many bots the dense grid view is the default
+OVERLAY_HEIGHT = 60  # Strip kept clear for the perf overlay in the dense view
+
+# Colors
+RED = (255, 0, 0)
+BLUE = (0, 0, 255)
+GREEN = (0, 255, 0)
+YELLOW = (255, 255, 0)
+WHITE = (255, 255, 255)
+BLACK = (0, 0, 0)
+GOLD = (255, 215, 0)  # For highlighting top bot
+
+# Game feedback
+MEME_FEEDBACK = {
+    'great': ["Chad energy!", "Big brain!"],
+    'good': ["Solid vibes!", "Kinda based!"],
+    'bad': ["Total chaos!", "Mega oof!"],
+    'overheat': ["Toasty!", "Spicy fail!"],
+    'level_up': ["Chaos god!", "Dank ascension!"],
+    'win': ["Chaos king!", "Entropy bows!"],
+    'dank_spike': ["Dank power!", "Temp roasted!"]
+}
+
+# Fixed discrete draws served from precomputed alias tables; the shared ones live in sampling
+MEME_SAMPLERS = uniform_samplers(MEME_FEEDBACK)
+
+# Rendering quality levels, best first; the governor steps down one at a time
+Quality = namedtuple("Quality", "name text_every jitter max_tiles aggregate_every")
+QUALITY_LEVELS = (
+    Quality("full", 1, True, None, 1),
+    Quality("text/4", 4, True, None, 1),
+    Quality("no jitter", 4, False, None, 1),
+    Quality(f"top {TOP_TILES}", 8, False, TOP_TILES, 1),
+    Quality("decimated", 8, False, TOP_TILES, 10),
+)
+
+# Fonts, loaded by init_display()
+FONT = None
+SMALL_FONT = None
+
+
+def init_display():
+    """Import and initialize pygame and the fonts on first use."""
+    global pygame, FONT, SMALL_FONT
+    if pygame is None:
+        import pygame as pygame_module
+        pygame_module.init()
+        pygame = pygame_module
+        FONT = pygame.font.SysFont("comicsans", 18)
+        SMALL_FONT = pygame.font.SysFont("comicsans", 14)
+
+# Bot logic class
+class Bot:
+    def __init__(self, bot_id, all_bots, rng=None):
+        self.rng = rng or LIVE_ENTROPY  # Every decision draw goes through here so runs can be replayed
+        self.id = bot_id
+        self.all_bots = all_bots  # Reference to all bots for competition
+        self.target = self.rng.randbelow(601) + 300
+        self.player_power = 0
+        self.score = 0
+        self.temperature = 30
+        self.holding = False
+        self.hold_time = 0
+        self.chaos_factor = self.calculate_chaos()
+        self.target_jitter = 0
+        self.level = 1
+        self.level_targets = [100, 250, 500, 750, 1000]
+        self.feedback = f"Bot {bot_id} ready!"
+        self.action_timer = 0
+        self.next_action = self.rng.uniform(0.5, 2.0)
+        self.hold_duration = self.rng.uniform(0.5, 2.0)
+        self.games_played = 0
+        self.total_diff = 0
+        self.avg_diff = 0
+        self.skill_level = 1.0  # Multiplier for how accurately bot aims for target
+        self.competitive_feedback = ""
+        # Strategy parameters, tuned per bot by evolve.py
+        self.randomness = RANDOMNESS
+        self.charge_rate = 15  # Assumed power gained per 0.05s of holding
+        self.action_delay = (0.5, 2.0)
+
+    def calculate_chaos(self):
+        return chaos_sampler().sample(self.rng.randbelow)
+
+    def start_action(self):
+        self.holding = True
+        self.hold_time = 0
+        self.chaos_factor = self.calculate_chaos()
+
+    def stop_action(self):
+        self.holding = False
+        diff = abs(self.target - self.player_power)
+        self.total_diff += diff
+        self.games_played += 1
+        self.avg_diff = self.total_diff / self.games_played if self.games_played > 0 else 0
+        chaos_boost = self.rng.randbelow(21) - 10
+
+        if hasattr(self, 'dank_spike'):
+            meme = self.dank_spike
+            del self.dank_spike
+        elif self.temperature > 50:
+            self.score = max(0, self.score - 10 - chaos_boost)
+            meme = MEME_SAMPLERS['overheat'].sample(self.rng.randbelow)
+        elif diff < 50:
+            self.score += int((100 - diff) * self.chaos_factor) + chaos_boost
+            meme = MEME_SAMPLERS['great'].sample(self.rng.randbelow)
+        elif diff < 100:
+            self.score += int((50 - diff // 2) * self.chaos_factor) + chaos_boost
+            meme = MEME_SAMPLERS['good'].sample(self.rng.randbelow)
+        else:
+            self.score = max(0, self.score - 5 - chaos_boost)
+            meme = MEME_SAMPLERS['bad'].sample(self.rng.randbelow)
+
+        if self.level <= 5 and self.score >= self.level_targets[self.level - 1]:
+            if self.level == 5:
+                meme = MEME_SAMPLERS['win'].sample(self.rng.randbelow)
+                self.score = 1000
+            else:
+                self.level += 1
+                meme = MEME_SAMPLERS['level_up'].sample(self.rng.randbelow)
+
+        self.player_power = 0
+        self.temperature = max(30, self.temperature - 5)
+        self.target = self.rng.randbelow(601) + 300
+        self.target_jitter = 0
+        soundbite = soundbite_sampler().sample(self.rng.randbelow)
+        self.feedback = f"Diff: {diff} | {meme} {soundbite}"
+        self.update_competitive_feedback()
+
+    def charge_up(self, dt):
+        self.hold_time += dt
+        self.player_power = min(1000, self.player_power + power_step_sampler().sample(self.rng.randbelow))
+        self.temperature += temperature_step_sampler().sample(self.rng.randbelow)
+        if self.rng.randbelow(100) < 10:
+            if self.rng.randbelow(2) == 0:
+                self.player_power = min(1000, self.player_power * 2)
+                self.dank_spike = MEME_FEEDBACK['dank_spike'][0]
+            else:
+                self.temperature = min(100, self.temperature * 2)
+                self.dank_spike = MEME_FEEDBACK['dank_spike'][1]
+        self.target_jitter = self.rng.randbelow(21) - 10
+
+    def cool_down(self, dt):
+        if not self.holding:
+            self.temperature = max(30, self.temperature - 0.5)
+
+    def estimate_hold_duration(self):
+        # Estimate time to hit target based on skill and average charge rate
+        base_duration = (self.target / self.charge_rate) * 0.05 / self.chaos_factor
+        noise = self.rng.uniform(-self.randomness, self.randomness) / self.skill_level
+        return max(0.1, base_duration * (1 + noise))
+
+    def update_competitive_feedback(self):
+        # Compare with other bots
+        top_bot = max(self.all_bots, key=lambda b: b.score, default=self)
+        avg_score = sum(b.score for b in self.all_bots) / len(self.all_bots)
+        if self is top_bot:
+            self.competitive_feedback = "Top Dog!"
+        elif self.score > avg_score:
+            self.competitive_feedback = f"Above avg! Top: {top_bot.score}"
+        else:
+            self.competitive_feedback = f"Behind! Top: {top_bot.score}"
+
+        # Learn from top bot if not the best
+        if self is not top_bot and self.games_played > 0:
+            top_avg_diff = top_bot.avg_diff
+            if top_avg_diff < self.avg_diff:
+                # Improve skill by reducing randomness
+                self.skill_level += LEARNING_RATE * (1 / (1 + top_avg_diff / (self.avg_diff + 1)))
+                self.skill_level = min(2.0, self.skill_level)  # Cap skill level
+
+    def update(self, dt):
+        self.action_timer += dt
+        if self.holding:
+            self.charge_up(dt)
+            if self.hold_time >= self.hold_duration:
+                self.stop_action()
+                self.action_timer = 0
+                self.next_action = self.rng.uniform(*self.action_delay)
+                self.hold_duration = self.estimate_hold_duration()
+        else:
+            self.cool_down(dt)
+            if self.action_timer >= self.next_action:
+                self.start_action()
+                self.action_timer = 0
+                self.hold_duration = self.estimate_hold_duration()
+
+def fleet_checksum(bots):
+    """Integer summary of every bot's results, compared at the end of a replay."""
+    return sum(bot.score + bot.total_diff * 1009 + bot.games_played * 7 + bot.level for bot in bots)
+
+def update_bots(bots, dt, log=None):
+    """Advance every bot by ``dt``; ``log`` (a recording source) sees the tick and each start/stop."""
+    if log is None:
+        for bot in bots:
+            bot.update(dt)
+        return
+    log.tick(dt)
+    for i, bot in enumerate(bots):
+        holding = bot.holding
+        bot.update(dt)
+        if bot.holding != holding:
+            log.action(i, bot.holding)
+
+class BotScheduler:
+    """Advances only the bots that have something to do this frame.
+
+    Holding bots charge every frame and stay in ``holding``. Idle bots sleep
+    in a heap keyed by the clock time their next action is due and are not
+    touched until then; the 0.5-per-frame cool-down they would have had is
+    applied in one step when they wake. Per-frame cost is
+    O(holding + due * log n) rather than O(n).
+
+    Bots are processed in index order within a frame, so a fixed entropy
+    stream gives the same games as ``update_bots``; wake times come from one
+    running clock rather than per-bot timers, so a floating-point tie can
+    still move a start by a frame.
+    """
+    def __init__(self, bots):
+        self.bots = bots
+        self.now = 0.0
+        self.frame = 0
+        self.holding = []  # Indices of charging bots, kept sorted
+        self.cooling = set()  # Sleeping bots whose temperature has not reached the floor yet
+        self._heap = []
+        self._rest = [None] * len(bots)  # (rest time, rest frame, temperature at rest) while asleep
+        for i, bot in enumerate(bots):
+            if bot.holding:
+                self.holding.append(i)
+            else:
+                self._sleep(i, bot)
+
+    def _sleep(self, i, bot):
+        rest_time = self.now - bot.action_timer
+        self._rest[i] = (rest_time, self.frame, bot.temperature)
+        heapq.heappush(self._heap, (rest_time + bot.next_action, i))
+        if bot.temperature > 30:
+            self.cooling.add(i)
+
+    def _settle(self, i, bot):
+        rest_time, rest_frame, temperature = self._rest[i]
+        bot.temperature = max(30, temperature - 0.5 * (self.frame - rest_frame))
+        bot.action_timer = self.now - rest_time
+
+    def settle_idle(self):
+        """Bring sleeping bots' temperatures up to date, e.g. before drawing them."""
+        for i in list(self.cooling):
+            bot = self.bots[i]
+            self._settle(i, bot)
+            if bot.temperature <= 30:
+                self.cooling.discard(i)
+
+    def step(self, dt, log=None):
+        """One frame: charge holding bots, wake due ones; ``log`` sees the tick and each start/stop."""
+        self.now += dt
+        self.frame += 1
+        if log is not None:
+            log.tick(dt)
+        due = []
+        heap = self._heap
+        while heap and heap[0][0] <= self.now:
+            due.append(heapq.heappop(heap)[1])
+        due.sort()
+        holding = []
+        for i in heapq.merge(self.holding, due) if due else self.holding:
+            bot = self.bots[i]
+            if bot.holding:
+                bot.update(dt)
+                if bot.holding:
+                    holding.append(i)
+                else:
+                    self._sleep(i, bot)
+                    if log is not None:
+                        log.action(i, False)
+            else:
+                self._settle(i, bot)
+                self._rest[i] = None
+                self.cooling.discard(i)
+                # The idle branch of Bot.update on the frame the timer runs out
+                bot.start_action()
+                bot.action_timer = 0
+                bot.hold_duration = bot.estimate_hold_duration()
+                holding.append(i)
+                if log is not None:
+                    log.action(i, True)
+        self.holding = holding
+
+class FrameGovernor:
+    """Trades rendering detail for frame time; bot updates are never throttled.
+
+    Update and draw times are smoothed and compared with the frame budget.
+    Running hot for ``degrade_after`` frames drops one quality level; staying
+    well under budget for ``recover_after`` frames climbs back one level.
+    """
+    DEGRADE_AT = 0.9  # Fraction of the budget that counts as running hot
+    RECOVER_AT = 0.6  # Fraction low enough to try the next level up
+
+    def __init__(self, budget, smoothing=0.1, degrade_after=10, recover_after=120):
+        self.budget = budget
+        self.smoothing = smoothing
+        self.degrade_after = degrade_after
+        self.recover_after = recover_after
+        self.level = 0
+        self.update_time = 0.0
+        self.draw_time = 0.0
+        self._hot = 0
+        self._cool = 0
+
+    @property
+    def quality(self):
+        return QUALITY_LEVELS[self.level]
+
+    @property
+    def frame_time(self):
+        return self.update_time + self.draw_time
+
+    @property
+    def headroom(self):
+        """Share of the frame budget left over, negative when over budget."""
+        return 1 - self.frame_time / self.budget
+
+    def record(self, update_time, draw_time):
+        self.update_time += self.smoothing * (update_time - self.update_time)
+        self.draw_time += self.smoothing * (draw_time - self.draw_time)
+        load = self.frame_time / self.budget
+        if load > self.DEGRADE_AT:
+            self._hot, self._cool = self._hot + 1, 0
+            if self._hot >= self.degrade_after and self.level < len(QUALITY_LEVELS) - 1:
+                self.level += 1
+                self._hot = 0
+        elif load < self.RECOVER_AT:
+            self._hot, self._cool = 0, self._cool + 1
+            if self._cool >= self.recover_after and self.level > 0:
+                self.level -= 1
+                self._cool = 0
+        else:
+            self._hot = self._cool = 0
+
+# Main stress test class
+class StressTest:
+    def __init__(self, recorder=None, bot_count=BOT_COUNT, dense=None):
+        import psutil
+        from tilerender import BulkTileRenderer
+        init_display()
+        try:
+            self.screen = pygame.display.set_mode((WIDTH, HEIGHT))
+            pygame.display.set_caption("Competitive Charging Game Stress Test")
+            self.clock = pygame.time.Clock()
+            self.recorder = recorder  # recording.RecordingSource, or None for live entropy
+            self.bot_count = bot_count
+            self.bots = [Bot(i, None, rng=recorder) for i in range(bot_count)]
+            # Shapes for every bot go through one bulk renderer per view; G toggles the view
+            self.tile_height = max(1, HEIGHT // (bot_count // 2 + 1))
+            self.tile_renderer = BulkTileRenderer((WIDTH, HEIGHT), 5, BOT_WIDTH, self.tile_height)
+            self.dense_renderer = BulkTileRenderer.dense(bot_count, (WIDTH, HEIGHT - OVERLAY_HEIGHT))
+            self.dense = bot_count > DENSE_THRESHOLD if dense is None else dense
+            for bot in self.bots:
+                bot.all_bots = self.bots  # Set reference to all bots
+            self.fps_history = deque(maxlen=100)
+            self.process = psutil.Process(os.getpid())
+            self.start_time = time.time()
+            self.governor = FrameGovernor(1.0 / FPS)
+            self.frame = 0
+            self.ranking = list(self.bots)  # Refreshed with the aggregate view
+            self.text_cache = {}  # bot id -> rendered tile text
+            self.aggregate_cache = []
+            self.avg_fps = 0
+            self.memory = 0
+        except Exception as e:
+            print(f"Initialization error: {e}")
+            pygame.quit()
+            raise
+
+    def draw_bot_text(self, bot, index):
+        quality = self.governor.quality
+        x_offset, y_offset = self.tile_renderer.origin(index)
+        # Text re-rendered every text_every frames (staggered across bots)
+        cached = self.text_cache.get(bot.id)
+        if cached is None or (self.frame + bot.id) % quality.text_every == 0:
+            is_top = bot is self.ranking[0]
+            cached = self.text_cache[bot.id] = (
+                FONT.render(f"Bot {bot.id} | Score: {bot.score}", True, WHITE),
+                FONT.render(f"Level: {bot.level} | Skill: {bot.skill_level:.2f}", True, WHITE),
+                SMALL_FONT.render(bot.feedback, True, YELLOW),
+                SMALL_FONT.render(bot.competitive_feedback, True, GOLD if is_top else RED),
+            )
+        score_text, level_text, feedback_text, comp_text = cached
+        self.screen.blit(score_text, (x_offset + 10, y_offset + 40))
+        self.screen.blit(level_text, (x_offset + 10, y_offset + 60))
+        self.screen.blit(feedback_text, (x_offset + 10, y_offset + 80))
+        self.screen.blit(comp_text, (x_offset + 10, y_offset + 100))
+
+    def refresh_aggregates(self):
+        """Re-rank the bots and re-render the perf overlay and leaderboard."""
+        self.ranking = sorted(self.bots, key=lambda b: b.score, reverse=True)
+        self.avg_fps = sum(self.fps_history) / len(self.fps_history) if self.fps_history else 0
+        self.memory = self.process.memory_info().rss / 1024 / 1024
+        governor = self.governor
+        view = "dense" if self.dense else "tiles"
+        perf_text = FONT.render(f"FPS: {self.avg_fps:.1f} | Memory: {self.memory:.1f} MB | Bots: {self.bot_count} | View: {view}",
+                                True, WHITE)
+        quality_text = SMALL_FONT.render(
+            f"Quality: {governor.quality.name} | Frame: {governor.frame_time * 1000:.1f}/{governor.budget * 1000:.1f} ms "
+            f"| Headroom: {governor.headroom:+.0%}", True, GREEN if governor.headroom >= 0 else RED)
+        self.aggregate_cache = [(perf_text, (10, HEIGHT - 50)), (quality_text, (10, HEIGHT - 25))]
+        for i, bot in enumerate(self.ranking[:3]):
+            leader_text = SMALL_FONT.render(f"#{i+1}: Bot {bot.id} ({bot.score})", True, GOLD)
+            self.aggregate_cache.append((leader_text, (WIDTH - 150, 10 + i * 20)))
+
+    def draw(self):
+        quality = self.governor.quality
+        if self.frame % quality.aggregate_every == 0:
+            self.refresh_aggregates()
+        if self.dense:
+            # Every bot, no text; the ranking decides nothing but the outline
+            layer = self.dense_renderer.draw(self.bots, self.ranking[0].id, quality.jitter)
+            self.screen.fill(BLACK)
+            self.screen.blit(layer, (0, 0))
+        else:
+            shown = self.bots if quality.max_tiles is None else self.ranking[:quality.max_tiles]
+            top = self.ranking[0].id if quality.max_tiles is None else 0
+            self.screen.blit(self.tile_renderer.draw(shown, top, quality.jitter), (0, 0))
+            for i, bot in enumerate(shown[:self.tile_renderer.capacity]):
+                self.draw_bot_text(bot, i)
+        for surface, position in self.aggregate_cache:
+            self.screen.blit(surface, position)
+        pygame.display.flip()
+
+    def run(self):
+        running = True
+        scheduler = BotScheduler(self.bots)  # Built here so --genome strategies are already applied
+        while running:
+            try:
+                dt = self.clock.tick(FPS) / 1000.0
+                self.fps_history.append(self.clock.get_fps())
+
+                for event in pygame.event.get():
+                    if event.type == pygame.QUIT:
+                        running = False
+                    elif event.type == pygame.KEYDOWN:
+                        if event.key == pygame.K_ESCAPE:
+                            running = False
+                        elif event.key == pygame.K_g:
+                            self.dense = not self.dense
+
+                # Update every due bot at full rate, then draw whatever the budget allows
+                start = time.perf_counter()
+                scheduler.step(dt, self.recorder)
+                scheduler.settle_idle()  # Only bots still cooling; their bars are drawn this frame
+                updated = time.perf_counter()
+                self.draw()
+                self.governor.record(updated - start, time.perf_counter() - updated)
+                self.frame += 1
+
+            except Exception as e:
+                print(f"Runtime error: {e}")
+                running = False
+
+        # Print final stats
+        try:
+            total_games = sum(bot.games_played for bot in self.bots)
+            avg_diff = sum(bot.total_diff for bot in self.bots) / total_games if total_games > 0 else 0
+            sorted_bots = sorted(self.bots, key=lambda b: b.score, reverse=True)
+            print("Stress Test Summary:")
+            print(f"Total Games Played: {total_games}")
+            print(f"Average Difference: {avg_diff:.2f}")
+            print(f"Average FPS: {self.avg_fps:.1f}")
+            print(f"Final Memory Usage: {self.memory:.1f} MB")
+            print(f"Final Render Quality: {self.governor.quality.name} (headroom {self.governor.headroom:+.0%})")
+            print("\nFinal Leaderboard:")
+            for i, bot in enumerate(sorted_bots[:3], 1):
+                print(f"#{i}: Bot {bot.id} | Score: {bot.score} | Avg Diff: {bot.avg_diff:.2f} | Skill: {bot.skill_level:.2f}")
+        except Exception as e:
+            print(f"Error in final stats: {e}")
+        finally:
+            if self.recorder is not None:
+                self.recorder.check(fleet_checksum(self.bots))
+                self.recorder.close()
+            pygame.quit()
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="Competitive charging stress test")
+    parser.add_argument("--record", metavar="LOG", help="record every bot decision for recording.py replay")
+    parser.add_argument("--bots", type=int, default=BOT_COUNT)
+    view = parser.add_mutually_exclusive_group()
+    view.add_argument("--dense", action="store_true", default=None, help="start in the dense grid view")
+    view.add_argument("--tiles", dest="dense", action="store_false", help="start in the per-bot tile view")
+    parser.add_argument("--genome", metavar="JSON", help="bot strategy saved by evolve.py --save")
+    args = parser.parse_args()
+    recorder = None
+    if args.record:
+        from recording import RecordingSource
+        recorder = RecordingSource(args.record, {"kind": "stress", "bots": args.bots, "scheduler": True})
+    try:
+        test = StressTest(recorder, args.bots, args.dense)
+        if args.genome:
+            import json
+            from evolve import apply_genome
+            with open(args.genome) as f:
+                genome = json.load(f)
+            for bot in test.bots:
+                apply_genome(bot, genome)
+        test.run()
+    except Exception as e:
+        print(f"Main execution error: {e}")
+
+if __name__ == "__main__":
+    main()
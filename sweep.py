@@ -0,0 +1,207 @@
+import argparse
+import csv
+import hashlib
+import itertools
+import json
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from Botsimulation import EconomyConfig
+
+VERSION = 1  # Part of every cache key; bump when Simulation changes what a config produces
+PERCENT_FIELDS = EconomyConfig._fields[1:]
+RESULTS = ("minted", "burned", "rare_tokens", "avg_energy", "energy_p50", "holdings_p50", "holdings_p90",
+           "holdings_gini", "seconds")
+
+
+def config_key(config, bots, rounds):
+    """Stable hash of everything besides the seed that decides a run's result."""
+    point = {"version": VERSION, "bots": bots, "rounds": rounds, "config": config._asdict()}
+    return hashlib.sha256(json.dumps(point, sort_keys=True).encode()).hexdigest()[:16]
+
+
+def grid(base=None, **axes):
+    """Every combination of the values in ``axes``, e.g. ``grid(casual_mint=[30, 50, 70])``."""
+    base = base or EconomyConfig()
+    names = list(axes)
+    for values in itertools.product(*(axes[name] for name in names)):
+        yield base._replace(**dict(zip(names, values)))
+
+
+def random_configs(count, ranges, base=None, seed=None):
+    """``count`` configs with each field in ``ranges`` drawn uniformly from its inclusive ``(low, high)``."""
+    base = base or EconomyConfig()
+    rng = random.Random(seed)
+    for _ in range(count):
+        yield base._replace(**{name: rng.randint(low, high) for name, (low, high) in ranges.items()})
+
+
+class ResultCache:
+    """One small JSON file per (config key, seed), so interrupted or extended sweeps reuse finished points."""
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key, seed):
+        return os.path.join(self.directory, f"{key}_{seed}.json")
+
+    def get(self, key, seed):
+        try:
+            with open(self._path(key, seed)) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def put(self, key, seed, result):
+        path = self._path(key, seed)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(result, f)
+        os.replace(tmp, path)
+
+
+def run_point(config, seed, bots=10, rounds=20):
+    """One headless ``Botsimulation`` run against an in-memory DB; returns its summary."""
+    from Botsimulation import Simulation
+    from metrics import MetricsEmitter
+    from sampling import SeededEntropy
+    start = time.perf_counter()
+    sim = Simulation(db_path=":memory:", rng=SeededEntropy(seed), metrics=MetricsEmitter(), config=config)
+    sim.create_bots(bots)
+    for round_num in range(1, rounds + 1):
+        for bot in sim.bots:
+            sim.bot_action(bot)
+        sim.round_num = round_num
+        sim.close_round()
+    total = sim.history.total().summary()
+    total_tokens, rare_tokens = sim.count_tokens()
+    result = {
+        "minted": total["minted"],
+        "burned": total["burned"],
+        "rare_tokens": rare_tokens,
+        "avg_energy": float(sim.calculate_avg_energy()),
+        "energy_p50": total["energy"]["quantiles"][0.5],
+        "holdings_p50": total["holdings"]["quantiles"][0.5],
+        "holdings_p90": total["holdings"]["quantiles"][0.9],
+        "holdings_gini": total["holdings_gini"],
+        "seconds": time.perf_counter() - start,
+    }
+    sim.close()
+    return result
+
+
+def sweep(configs, seeds, bots=10, rounds=20, workers=None, cache=None, callback=None):
+    """Run every config under every seed across a process pool, skipping points already in ``cache``.
+
+    Returns ``(config, seed, result, cached)`` tuples in input order;
+    ``callback`` sees each one as it completes.
+    """
+    points = [(config, seed) for config in configs for seed in seeds]
+    results = [None] * len(points)
+    todo = []
+    for i, (config, seed) in enumerate(points):
+        result = cache.get(config_key(config, bots, rounds), seed) if cache is not None else None
+        if result is None:
+            todo.append(i)
+        else:
+            results[i] = (config, seed, result, True)
+            if callback is not None:
+                callback(results[i])
+
+    def finish(i, result):
+        config, seed = points[i]
+        if cache is not None:
+            cache.put(config_key(config, bots, rounds), seed, result)
+        results[i] = (config, seed, result, False)
+        if callback is not None:
+            callback(results[i])
+
+    workers = min(workers or os.cpu_count() or 1, len(todo))
+    if workers <= 1:
+        for i in todo:
+            finish(i, run_point(*points[i], bots, rounds))
+    else:
+        with ProcessPoolExecutor(workers) as pool:
+            futures = {pool.submit(run_point, *points[i], bots, rounds): i for i in todo}
+            for future in as_completed(futures):
+                finish(futures[future], future.result())
+    return results
+
+
+def parse_value(name, text):
+    """One ``EconomyConfig`` field from text; behavior weights are written ``1:2:1``."""
+    if name == "behavior_weights":
+        return tuple(int(w) for w in text.split(":"))
+    return int(text)
+
+
+def _format_value(value):
+    return ":".join(map(str, value)) if isinstance(value, tuple) else str(value)
+
+
+def parse_assignment(text):
+    """Split ``FIELD=VALUES`` for argparse, checking FIELD is an ``EconomyConfig`` field."""
+    name, _, values = text.partition("=")
+    if name not in EconomyConfig._fields or not values:
+        raise argparse.ArgumentTypeError(f"expected FIELD=VALUES with FIELD one of {', '.join(EconomyConfig._fields)}")
+    return name, values
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sweep Botsimulation economy settings across a process pool with a result cache")
+    parser.add_argument("--grid", type=parse_assignment, action="append", default=[], metavar="FIELD=V1,V2",
+                        help="grid axis, e.g. casual_mint=30,50,70 or behavior_weights=1:1:1,2:1:1")
+    parser.add_argument("--random", type=int, metavar="N", help="random search: N configs instead of a grid")
+    parser.add_argument("--range", type=parse_assignment, action="append", default=[], metavar="FIELD=LOW:HIGH",
+                        help="random search range for a percentage field, e.g. aggressive_burn=20:80")
+    parser.add_argument("--seeds", type=int, default=4, help="runs per config, seeded 0..N-1")
+    parser.add_argument("--bots", type=int, default=10)
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--search-seed", type=int, default=None, help="seed for drawing random-search configs")
+    parser.add_argument("--cache-dir", default=".sweep-cache")
+    parser.add_argument("--no-cache", action="store_true")
+    parser.add_argument("--csv", help="write one row per (config, seed) here")
+    args = parser.parse_args()
+
+    if args.random:
+        ranges = {}
+        for name, values in args.range:
+            if name not in PERCENT_FIELDS:
+                parser.error(f"--range only applies to percentage fields, not {name}")
+            low, _, high = values.partition(":")
+            ranges[name] = (int(low), int(high))
+        configs = list(random_configs(args.random, ranges, seed=args.search_seed))
+    else:
+        configs = list(grid(**{name: [parse_value(name, v) for v in values.split(",")] for name, values in args.grid}))
+    cache = None if args.no_cache else ResultCache(args.cache_dir)
+    varied = [name for name in EconomyConfig._fields if len({getattr(c, name) for c in configs}) > 1]
+
+    print(f"{len(configs)} configs x {args.seeds} seeds, {args.bots} bots x {args.rounds} rounds")
+    start = time.perf_counter()
+    results = sweep(configs, range(args.seeds), args.bots, args.rounds, args.workers, cache)
+    elapsed = time.perf_counter() - start
+    reused = sum(cached for *_, cached in results)
+    print(f"{len(results) - reused} runs in {elapsed:.1f}s, {reused} from cache")
+
+    # Seeds averaged per config
+    print(" ".join(f"{name:>16}" for name in varied) + f" {'minted':>8} {'burned':>8} {'rare':>6} {'energy':>7} {'gini':>6}")
+    for i, config in enumerate(configs):
+        runs = [result for _, _, result, _ in results[i * args.seeds:(i + 1) * args.seeds]]
+        mean = {name: sum(r[name] for r in runs) / len(runs) for name in RESULTS}
+        print(" ".join(f"{_format_value(getattr(config, name)):>16}" for name in varied) +
+              f" {mean['minted']:>8.1f} {mean['burned']:>8.1f} {mean['rare_tokens']:>6.1f}"
+              f" {mean['avg_energy']:>7.2f} {mean['holdings_gini']:>6.3f}")
+
+    if args.csv:
+        with open(args.csv, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow([*EconomyConfig._fields, "seed", *RESULTS, "cached"])
+            for config, seed, result, cached in results:
+                writer.writerow([*map(_format_value, config), seed, *(result[name] for name in RESULTS), int(cached)])
+
+
+if __name__ == "__main__":
+    main()
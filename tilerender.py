@@ -0,0 +1,118 @@
+import math
+
+import numpy as np
+import pygame
+
+RED = (255, 0, 0)
+BLUE = (0, 0, 255)
+GREEN = (0, 255, 0)
+BLACK = (0, 0, 0)
+GOLD = (255, 215, 0)
+
+
+def _disk(radius):
+    """Pixel offsets ``(dx, dy)`` covering a filled circle."""
+    span = np.arange(-radius, radius + 1)
+    dx, dy = np.meshgrid(span, span, indexing="ij")
+    inside = dx * dx + dy * dy <= radius * radius
+    return dx[inside], dy[inside]
+
+
+class BulkTileRenderer:
+    """Draws the target line, power dot and temperature bar of every bot tile
+    in a handful of NumPy passes over the pixels of one offscreen surface.
+
+    Per-frame Python work is one attribute gather per field; the number of
+    pygame calls does not depend on the bot count. The caller blits
+    ``layer`` once and adds any text on top.
+    """
+    def __init__(self, size, cols, tile_w, tile_h):
+        self.size = size
+        self.cols = cols
+        self.tile_w = tile_w
+        self.tile_h = tile_h
+        self.capacity = cols * (size[1] // tile_h)
+        self.layer = pygame.Surface(size, 0, 32)
+        self.red, self.blue, self.green, self.black, self.gold = (
+            self.layer.map_rgb(color) for color in (RED, BLUE, GREEN, BLACK, GOLD))
+        self.scale_x = tile_w / 1000  # Game coordinates run 0-1000 across a tile
+        # Tile-view proportions, shrunk for small dense tiles
+        self.line_width = 2 if tile_w >= 80 else 1
+        self.dot_dx, self.dot_dy = _disk(max(0, min(5, tile_w // 20)))
+        self.bar_x = min(10, tile_w // 10)
+        self.bar_y = min(20, tile_h // 4)
+        self.bar_height = max(1, min(3, tile_h // 30))
+        self.border = 2 if tile_w >= 40 else 1
+        self.column = np.arange(tile_h)
+        self.jitter = np.random.default_rng()  # Display-only wobble of the power dot
+
+    @classmethod
+    def dense(cls, count, size):
+        """Grid of the largest square tiles that fit ``count`` bots in ``size``."""
+        width, height = size
+        tile = max(2, int(math.sqrt(width * height / max(1, count))))
+        while tile > 2 and (width // tile) * (height // tile) < count:
+            tile -= 1
+        return cls(size, width // tile, tile, tile)
+
+    def origin(self, index):
+        return (index % self.cols) * self.tile_w, (index // self.cols) * self.tile_h
+
+    def _plot(self, pixels, xs, ys, color):
+        """Set every in-bounds ``(x, y)``; ``color`` is one value or one per point."""
+        xs, ys = np.broadcast_arrays(xs, ys)
+        inside = (xs >= 0) & (xs < self.size[0]) & (ys >= 0) & (ys < self.size[1])
+        if not np.isscalar(color):
+            color = np.broadcast_to(color, xs.shape)[inside]
+        pixels[xs[inside], ys[inside]] = color
+
+    def draw(self, bots, top=None, dots=True):
+        """Render up to ``capacity`` bots in order; ``top`` is the position to outline."""
+        n = min(len(bots), self.capacity)
+        bots = bots[:n]
+        index = np.arange(n)
+        x0 = (index % self.cols) * self.tile_w
+        y0 = (index // self.cols) * self.tile_h
+        target = np.fromiter((b.target + b.target_jitter for b in bots), np.float64, n)
+        temperature = np.fromiter((b.temperature for b in bots), np.float64, n)
+
+        pixels = pygame.surfarray.pixels2d(self.layer)
+        try:
+            pixels.fill(self.black)
+
+            # Target lines: one column per line width, full tile height
+            line_x = (x0 + target * self.scale_x).astype(np.int64)
+            line_y = y0[:, None] + self.column
+            for offset in range(self.line_width):
+                self._plot(pixels, (line_x + offset)[:, None], line_y, self.red)
+
+            # Power dots: the disk offsets broadcast against every centre
+            if dots and len(self.dot_dx):
+                power = np.fromiter((b.player_power * b.chaos_factor for b in bots), np.float64, n)
+                wobble = self.jitter.integers(-5, 6, n)
+                cx = (x0 + (100 + wobble) * self.scale_x).astype(np.int64)
+                cy = (y0 + power / 1000 * self.tile_h).astype(np.int64)
+                self._plot(pixels, cx[:, None] + self.dot_dx, cy[:, None] + self.dot_dy, self.blue)
+
+            # Temperature bars: variable lengths flattened through a mask, at least
+            # one pixel so the hot/cool colour survives in tiny dense tiles
+            length = np.maximum(1, (temperature * 2 * self.scale_x).astype(np.int64))
+            if n:
+                owner, step = np.nonzero(np.arange(length.max()) < length[:, None])
+                colors = np.where(temperature > 50, self.red, self.green)[owner]
+                bar_x = x0[owner] + self.bar_x + step
+                for row in range(self.bar_height):
+                    self._plot(pixels, bar_x, y0[owner] + self.bar_y + row, colors)
+
+            if top is not None and top < n:
+                x, y = self.origin(top)
+                right = min(x + self.tile_w, self.size[0])
+                bottom = min(y + self.tile_h, self.size[1])
+                b = self.border
+                pixels[x:right, y:y + b] = self.gold
+                pixels[x:right, bottom - b:bottom] = self.gold
+                pixels[x:x + b, y:bottom] = self.gold
+                pixels[right - b:right, y:bottom] = self.gold
+        finally:
+            del pixels  # Unlocks the surface for blitting
+        return self.layer
@@ -0,0 +1,217 @@
+import argparse
+import json
+import os
+import sqlite3
+
+SIGMAS = ("sigma_x", "sigma_y", "sigma_z")
+SIMULATION = "simulation"  # simulation.db: owned tokens with energy, complex sigmas
+GASLITE = "gaslite"  # tokens.db: minted tokens with real sigmas and a level
+
+SCHEMAS = {
+    SIMULATION: '''
+        CREATE TABLE IF NOT EXISTS {table} (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            owner TEXT,
+            energy_level REAL,
+            rare INTEGER,
+            sigma_x REAL,
+            sigma_x_imag REAL,
+            sigma_y REAL,
+            sigma_y_imag REAL,
+            sigma_z REAL,
+            sigma_z_imag REAL
+        )
+    ''',
+    GASLITE: '''
+        CREATE TABLE IF NOT EXISTS {table} (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            sigma_x REAL,
+            sigma_y REAL,
+            sigma_z REAL,
+            rare INTEGER,
+            level INTEGER
+        )
+    ''',
+}
+# Created after any migration, since migrate() rebuilds the table without them
+INDEXES = {
+    SIMULATION: ["CREATE INDEX IF NOT EXISTS tokens_owner ON tokens (owner)"],  # A bot's holdings without a scan
+    GASLITE: [],
+}
+SIGMA_COLUMNS = {
+    SIMULATION: "sigma_x, sigma_x_imag, sigma_y, sigma_y_imag, sigma_z, sigma_z_imag",
+    GASLITE: "sigma_x, sigma_y, sigma_z",
+}
+COLUMNS = {
+    SIMULATION: "owner, energy_level, rare, " + SIGMA_COLUMNS[SIMULATION],
+    GASLITE: SIGMA_COLUMNS[GASLITE] + ", rare, level",
+}
+INSERT = {kind: f"INSERT INTO tokens ({names}) VALUES ({', '.join('?' * len(names.split(', ')))})"
+          for kind, names in COLUMNS.items()}
+UPDATE = {kind: f"UPDATE tokens SET {', '.join(f'{name} = ?' for name in names.split(', '))} WHERE id = ?"
+          for kind, names in COLUMNS.items()}
+DELETE = "DELETE FROM tokens WHERE id = ?"
+
+
+def split_sigmas(sigmas):
+    """``(x.real, x.imag, y.real, ...)`` for the simulation columns; numpy scalars become floats."""
+    return tuple(float(part) for value in sigmas for part in (value.real, value.imag))
+
+
+def join_sigmas(parts):
+    """Inverse of ``split_sigmas``."""
+    x, x_imag, y, y_imag, z, z_imag = parts
+    return complex(x, x_imag), complex(y, y_imag), complex(z, z_imag)
+
+
+def columns(conn):
+    return {row[1] for row in conn.execute("PRAGMA table_info(tokens)")}
+
+
+def kind_of(conn):
+    found = columns(conn)
+    if not found:
+        raise ValueError("database has no tokens table")
+    # simulation.db keys tokens by owner; tokens.db keeps a level per token
+    return SIMULATION if "owner" in found else GASLITE
+
+
+def last_id(conn):
+    """Highest id ever handed out, which outlives deleted rows unlike ``MAX(id)``."""
+    row = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'tokens'").fetchone()
+    return row[0] if row is not None else 0
+
+
+class UnitOfWork:
+    """Token inserts, updates and deletes since the last flush, written as one transaction.
+
+    ``row(token)`` gives a token's column values in ``COLUMNS[kind]``
+    order. Tokens are dicts; flushing an insert stores the new row's
+    id in ``token["id"]``, which later updates and deletes key on.
+    New rows go into ``ledger`` (a ``ledger.Ledger``), if given, in the
+    same transaction.
+    """
+    def __init__(self, kind, row, ledger=None):
+        self.kind = kind
+        self.row = row
+        self.ledger = ledger
+        self.new = []
+        self.dirty = {}  # id -> token
+        self.deleted = set()
+
+    def __len__(self):
+        return len(self.new) + len(self.dirty) + len(self.deleted)
+
+    def add(self, token):
+        self.new.append(token)
+
+    def update(self, token):
+        if "id" in token:  # A pending insert writes its current values anyway
+            self.dirty[token["id"]] = token
+
+    def delete(self, token):
+        if "id" not in token:
+            # Never reached the database: drop the pending insert
+            self.new = [pending for pending in self.new if pending is not token]
+            return
+        self.dirty.pop(token["id"], None)
+        self.deleted.add(token["id"])
+
+    def flush(self, conn):
+        """Write the pending changes and forget them; returns the newly inserted tokens.
+
+        On error the transaction rolls back and the changes stay pending.
+        """
+        if not len(self):
+            return []
+        ids = []
+        with conn:
+            conn.executemany(DELETE, ((token_id,) for token_id in self.deleted))
+            conn.executemany(UPDATE[self.kind], ((*self.row(token), token_id) for token_id, token in self.dirty.items()))
+            cursor = conn.cursor()
+            for token in self.new:
+                cursor.execute(INSERT[self.kind], self.row(token))
+                ids.append(cursor.lastrowid)
+            if self.ledger is not None:
+                self.ledger.append((token_id, *self.row(token)) for token, token_id in zip(self.new, ids))
+        inserted = self.new
+        for token, token_id in zip(inserted, ids):
+            token["id"] = token_id
+        self.new, self.dirty, self.deleted = [], {}, set()
+        return inserted
+
+
+def setup(conn, kind):
+    """Create the tokens table and its indexes, migrating one that still stores JSON metadata."""
+    conn.execute(SCHEMAS[kind].format(table="tokens"))
+    conn.commit()
+    if "metadata" in columns(conn):
+        migrate(conn, kind)
+    for statement in INDEXES[kind]:
+        conn.execute(statement)
+    conn.commit()
+
+
+def _legacy_rows(conn, kind):
+    if kind == GASLITE:
+        # The metadata blob only repeated these columns
+        yield from conn.execute(f"SELECT id, {COLUMNS[kind]} FROM tokens")
+        return
+    for token_id, owner, energy, rare, metadata in conn.execute(
+            "SELECT id, owner, energy_level, rare, metadata FROM tokens"):
+        metadata = json.loads(metadata)
+        # Complex sigmas were stringified as '(0.5+0.1j)'; real ones were plain numbers
+        sigmas = [complex(metadata[name]) for name in SIGMAS]
+        yield (token_id, owner, energy, rare, *split_sigmas(sigmas))
+
+
+def migrate(conn, kind, vacuum=True):
+    """Rewrite a JSON-metadata tokens table into typed columns, keeping ids and the id sequence.
+
+    Runs in one transaction, so an interrupted migration leaves the old table intact.
+    Returns the number of rows moved.
+    """
+    names = "id, " + COLUMNS[kind]
+    placeholders = ", ".join("?" * len(names.split(", ")))
+    conn.commit()
+    conn.execute("BEGIN")
+    try:
+        seq = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'tokens'").fetchone()
+        conn.execute("DROP TABLE IF EXISTS tokens_packed")
+        conn.execute(SCHEMAS[kind].format(table="tokens_packed"))
+        moved = conn.executemany(f"INSERT INTO tokens_packed ({names}) VALUES ({placeholders})",
+                                 _legacy_rows(conn, kind)).rowcount
+        conn.execute("DROP TABLE tokens")
+        conn.execute("ALTER TABLE tokens_packed RENAME TO tokens")
+        if seq is not None:
+            # Ids freed by deleted rows stay retired, as AUTOINCREMENT promises
+            conn.execute("UPDATE sqlite_sequence SET seq = MAX(seq, ?) WHERE name = 'tokens'", seq)
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    if vacuum:
+        conn.execute("VACUUM")
+    return moved
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Migrate token databases from JSON metadata to typed sigma columns")
+    parser.add_argument("databases", nargs="+")
+    args = parser.parse_args()
+    for path in args.databases:
+        before = os.path.getsize(path)
+        conn = sqlite3.connect(path)
+        try:
+            kind = kind_of(conn)
+            if "metadata" not in columns(conn):
+                print(f"{path}: already migrated")
+                continue
+            moved = migrate(conn, kind)
+        finally:
+            conn.close()
+        print(f"{path}: {moved} {kind} tokens migrated, {before / 1024:.0f} KiB -> {os.path.getsize(path) / 1024:.0f} KiB")
+
+
+if __name__ == "__main__":
+    main()
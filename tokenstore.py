@@ -0,0 +1,245 @@
+import json
+import os
+import struct
+
+import numpy as np
+
+MAGIC = b"GSTK"
+HEADER = struct.Struct("<4sIqq")  # magic, version, count, capacity
+HEADER_SIZE = 64
+VERSION = 2  # 2 added token_id
+NO_TOKEN = -1
+
+RECORD = np.dtype([
+    ("owner", "<i4"),
+    ("energy_level", "<f8"),
+    ("rare", "u1"),
+    ("sigma_x", "<c16"),
+    ("sigma_y", "<c16"),
+    ("sigma_z", "<c16"),
+    ("token_id", "<i8"),  # Row id in simulation.db, 0 when the token was never inserted
+    ("next", "<i8"),  # Next token in the same owner's FIFO, NO_TOKEN at the tail
+])
+
+
+class MemmapTokenStore:
+    """Append-only fixed-width token records in a file mapped with ``np.memmap``.
+
+    The file grows geometrically, so appends are amortized O(1) and RSS stays
+    bounded by the pages the OS keeps mapped rather than by tokens minted.
+    Each owner's holdings form a linked FIFO through the ``next`` field, so
+    per-bot state is three integers no matter how many tokens it holds.
+    """
+    def __init__(self, path, initial_capacity=1 << 16, growth=2.0):
+        self.path = path
+        self.growth = growth
+        self.owner_names = []
+        self._owner_codes = {}
+        self._head = []
+        self._tail = []
+        self._held = []
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                magic, version, self.count, capacity = HEADER.unpack(f.read(HEADER.size))
+            if magic != MAGIC:
+                raise ValueError(f"{path} is not a token store")
+            if version != VERSION:
+                raise ValueError(f"{path} is a version {version} token store; this build reads version {VERSION}")
+            self._load_owners()
+        else:
+            self.count = 0
+            capacity = max(1, initial_capacity)
+            self._resize_file(capacity)
+        self._map(capacity)
+
+    @property
+    def owners_path(self):
+        return self.path + ".owners.json"
+
+    def _resize_file(self, capacity):
+        mode = "r+b" if os.path.exists(self.path) else "w+b"
+        with open(self.path, mode) as f:
+            f.truncate(HEADER_SIZE + capacity * RECORD.itemsize)
+
+    def _map(self, capacity):
+        self.capacity = capacity
+        self.records = np.memmap(self.path, dtype=RECORD, mode="r+", offset=HEADER_SIZE, shape=(capacity,))
+
+    def _grow(self):
+        capacity = max(self.capacity + 1, int(self.capacity * self.growth))
+        self.records.flush()
+        del self.records
+        self._resize_file(capacity)
+        self._map(capacity)
+
+    def __len__(self):
+        return self.count
+
+    def owner_code(self, owner):
+        code = self._owner_codes.get(owner)
+        if code is None:
+            code = self._owner_codes[owner] = len(self.owner_names)
+            self.owner_names.append(owner)
+            self._head.append(NO_TOKEN)
+            self._tail.append(NO_TOKEN)
+            self._held.append(0)
+        return code
+
+    def append(self, owner, energy_level, rare, sigmas, token_id=0):
+        """Append one token; returns its record index."""
+        if self.count == self.capacity:
+            self._grow()
+        index = self.count
+        self.records[index] = (self.owner_code(owner), energy_level, rare, *sigmas, token_id, NO_TOKEN)
+        self.count += 1
+        return index
+
+    def get(self, index):
+        """Materialize a record as the token dict ``Simulation`` uses."""
+        if not 0 <= index < self.count:
+            raise IndexError(index)
+        record = self.records[index]
+        return {
+            "id": int(record["token_id"]),
+            "index": index,
+            "owner": self.owner_names[record["owner"]],
+            "energy_level": float(record["energy_level"]),
+            "rare": bool(record["rare"]),
+            "metadata": {name: complex(record[name]) for name in ("sigma_x", "sigma_y", "sigma_z")},
+        }
+
+    def column(self, name):
+        """Zero-copy view of one field over the written records."""
+        return self.records[name][:self.count]
+
+    def scan(self, name, chunk_rows=1 << 20):
+        """Yield a field in chunks so reductions touch a bounded number of pages."""
+        values = self.column(name)
+        for start in range(0, self.count, chunk_rows):
+            yield values[start:start + chunk_rows]
+
+    def mean(self, name):
+        total = sum(float(chunk.sum()) for chunk in self.scan(name))
+        return total / self.count if self.count else 0
+
+    def total(self, name):
+        return sum(int(chunk.sum(dtype=np.int64)) for chunk in self.scan(name))
+
+    def truncate(self, count):
+        """Forget records past ``count`` (e.g. ones appended after a checkpoint)."""
+        if not 0 <= count <= self.count:
+            raise ValueError(f"cannot truncate {self.count} records to {count}")
+        self.count = count
+
+    def holdings(self, owner):
+        return Holdings(self, self.owner_code(owner))
+
+    def _push(self, code, index):
+        self.records["next"][index] = NO_TOKEN
+        if not self._held[code]:
+            self._head[code] = index
+        else:
+            self.records["next"][self._tail[code]] = index
+        self._tail[code] = index
+        self._held[code] += 1
+
+    def _pop(self, code):
+        index = self._head[code]
+        if index == NO_TOKEN:
+            raise IndexError("pop from empty holdings")
+        self._held[code] -= 1
+        if self._held[code]:
+            self._head[code] = int(self.records["next"][index])
+        else:
+            # The tail's next pointer is never trusted, it may predate a resume
+            self._head[code] = self._tail[code] = NO_TOKEN
+        return index
+
+    def indices(self, owner):
+        """Record indices of ``owner``'s holdings, oldest first."""
+        code = self.owner_code(owner)
+        nexts = self.records["next"]
+        index = self._head[code]
+        for _ in range(self._held[code]):
+            yield index
+            index = int(nexts[index])
+
+    def transfer(self, indices, from_owner, to_owner):
+        """Move the records at ``indices`` from one owner's FIFO to the back of another's.
+
+        One walk over ``from_owner``'s holdings unlinks them all, so a bulk
+        transfer costs O(held + moved) rather than a walk per token.
+        """
+        moving = set(indices)
+        if not moving:
+            return
+        giver, taker = self.owner_code(from_owner), self.owner_code(to_owner)
+        kept = [index for index in self.indices(from_owner) if index not in moving]
+        nexts = self.records["next"]
+        if len(moving) != len(indices) or len(kept) != self._held[giver] - len(moving):
+            raise ValueError(f"not every token is held once by {from_owner!r}")
+        if kept:
+            nexts[kept[:-1]] = kept[1:]
+            nexts[kept[-1]] = NO_TOKEN
+            self._head[giver], self._tail[giver] = kept[0], kept[-1]
+        else:
+            self._head[giver] = self._tail[giver] = NO_TOKEN
+        self._held[giver] = len(kept)
+        self.records["owner"][list(indices)] = taker
+        for index in indices:
+            self._push(taker, index)
+
+    def flush(self, owners=True):
+        """Write records, the header and (unless ``owners`` is false) owner holdings to disk."""
+        self.records.flush()
+        with open(self.path, "r+b") as f:
+            f.write(HEADER.pack(MAGIC, VERSION, self.count, self.capacity))
+        if not owners:
+            return
+        with open(self.owners_path, "w") as f:
+            json.dump({"names": self.owner_names, "head": self._head, "tail": self._tail, "held": self._held}, f)
+
+    def _load_owners(self):
+        if not os.path.exists(self.owners_path):
+            return
+        with open(self.owners_path) as f:
+            owners = json.load(f)
+        self.owner_names = owners["names"]
+        self._owner_codes = {name: code for code, name in enumerate(self.owner_names)}
+        self.restore_owners(owners["head"], owners["tail"], owners["held"])
+
+    def owner_state(self):
+        """Per-owner ``(head, tail, held)`` lists, e.g. for a checkpoint."""
+        return list(self._head), list(self._tail), list(self._held)
+
+    def restore_owners(self, head, tail, held):
+        self._head, self._tail, self._held = list(head), list(tail), list(held)
+
+    def close(self):
+        self.flush()
+        del self.records
+
+
+class Holdings:
+    """List-like FIFO of one owner's tokens, stored inside the record file.
+
+    Supports the operations ``Simulation`` performs on ``bot["tokens"]``:
+    ``append``, ``pop(0)``, ``len`` and truthiness.
+    """
+    def __init__(self, store, code):
+        self.store = store
+        self.code = code
+
+    def append(self, token):
+        self.store._push(self.code, token["index"])
+
+    def pop(self, index=0):
+        if index != 0:
+            raise IndexError("holdings only pop from the front")
+        return self.store.get(self.store._pop(self.code))
+
+    def __len__(self):
+        return self.store._held[self.code]
+
+    def __bool__(self):
+        return len(self) > 0